@@ -0,0 +1,258 @@
+"""
+agenda_angulismo.py - Agenda del día de AngulismoTV compartida por todos los partidos
+Una sola instantánea por intervalo de refresco (todos los partidos de la noche
+están en la misma página):
+- Cache en memoria y en disco con TTL (y descartada al cambiar el día)
+- Índice por par de equipos canónico (búsqueda exacta) y por token (candidatos
+  puntuados con similitud de nombres, ver nombres_equipos)
+- Refresco en segundo plano para levantar canales agregados a último momento
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from datetime import date
+
+import nombres_equipos
+
+# ============ CONFIGURACIÓN ============
+RUTA_AGENDA = "./logs/agenda_angulismo.json"
+TTL_AGENDA = 900                   # Segundos que una instantánea se considera fresca
+INTERVALO_REFRESCO_FONDO = 600     # Refresco periódico mientras haya consultas
+INACTIVIDAD_MAXIMA_FONDO = 4 * 3600  # Sin consultas en este tiempo, el refresco se detiene
+REFRESCO_MINIMO_SIN_RESULTADO = 60   # Partido no encontrado: refrescar si la instantánea tiene más que esto
+# =======================================
+
+_RE_VS = re.compile(r'\s+vs\.?\s+|\s*\n\s*', re.IGNORECASE)
+
+
+def separar_equipos(nombre_partido):
+    """
+    'Superliga Argentina: Racing Club vs Estudiantes (LP) | Final'
+    → ['Racing Club', 'Estudiantes (LP)']
+    """
+    nombre = (nombre_partido or '').split('|')[0]
+    if ':' in nombre:
+        nombre = nombre.split(':', 1)[1]
+    equipos = [e.strip() for e in _RE_VS.split(nombre)]
+    return [e for e in equipos if e]
+
+
+def clave_partido(equipos):
+    """Clave exacta (sin orden local/visitante) con nombres canónicos"""
+    return frozenset(nombres_equipos.nombre_canonico(e) for e in equipos[:2])
+
+
+def _tokens_partido(equipos):
+    tokens = set()
+    for equipo in equipos[:2]:
+        tokens |= nombres_equipos.tokens_equipo(equipo)
+        tokens |= set(nombres_equipos.normalizar_nombre(equipo).split())
+    return tokens - nombres_equipos.TOKENS_GENERICOS
+
+
+class EventoAgenda:
+    """Un partido de la agenda con sus opciones (nombre de la opción, URL a escanear)"""
+
+    def __init__(self, nombre, opciones):
+        self.nombre = nombre
+        self.opciones = opciones
+        self.equipos = separar_equipos(nombre)
+
+    def a_dict(self):
+        return {'nombre': self.nombre, 'opciones': [list(o) for o in self.opciones]}
+
+    @classmethod
+    def desde_dict(cls, datos):
+        return cls(datos['nombre'], [tuple(o) for o in datos['opciones']])
+
+    def __repr__(self):
+        return f"<EventoAgenda: {self.nombre} ({len(self.opciones)} opciones)>"
+
+
+class AgendaAngulismo:
+    """
+    Instantánea compartida de la agenda.
+    cargador() -> lista de EventoAgenda (una scrapeada completa de la página).
+    """
+
+    def __init__(self, cargador, ruta=RUTA_AGENDA, ttl=TTL_AGENDA):
+        self.cargador = cargador
+        self.ruta = ruta
+        self.ttl = ttl
+        self._lock = threading.Lock()        # Datos de la instantánea
+        self._lock_carga = threading.Lock()  # Un solo scrape a la vez
+        self._eventos = []
+        self._indice_pares = {}
+        self._indice_tokens = {}
+        self._instante = 0
+        self._dia = None
+        self._ultima_consulta = 0
+        self._hilo = None
+        self._cargar_disco()
+
+    # ---------- Persistencia ----------
+
+    def _cargar_disco(self):
+        try:
+            with open(self.ruta, encoding='utf-8') as f:
+                datos = json.load(f)
+            self._instalar([EventoAgenda.desde_dict(e) for e in datos['eventos']],
+                           datos['instante'], datos['dia'])
+        except Exception:
+            pass
+
+    def _guardar_disco(self):
+        """Escritura atómica (archivo temporal + rename)"""
+        contenido = json.dumps({
+            'dia': self._dia,
+            'instante': self._instante,
+            'eventos': [e.a_dict() for e in self._eventos],
+        }, ensure_ascii=False)
+        try:
+            os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+            tmp = f"{self.ruta}.tmp"
+            with open(tmp, "w", encoding='utf-8') as f:
+                f.write(contenido)
+            os.replace(tmp, self.ruta)
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar la agenda: {e}")
+
+    # ---------- Instantánea ----------
+
+    def _instalar(self, eventos, instante, dia):
+        pares, tokens = {}, {}
+        for evento in eventos:
+            if len(evento.equipos) < 2:
+                continue
+            pares.setdefault(clave_partido(evento.equipos), []).append(evento)
+            for token in _tokens_partido(evento.equipos):
+                tokens.setdefault(token, []).append(evento)
+        self._eventos, self._indice_pares, self._indice_tokens = eventos, pares, tokens
+        self._instante, self._dia = instante, dia
+
+    def _vigente(self, ahora):
+        return (self._eventos and self._dia == date.today().isoformat()
+                and ahora - self._instante < self.ttl)
+
+    def refrescar(self, si_anterior_a=None):
+        """
+        Scrapea la agenda completa (una vez para todos los partidos).
+        si_anterior_a: no repetir si otro hilo ya refrescó después de ese instante.
+        Las consultas siguen respondiendo con la instantánea vieja mientras tanto.
+        """
+        with self._lock_carga:
+            if si_anterior_a is not None and self._instante > si_anterior_a:
+                return True
+
+            inicio = time.time()
+            try:
+                eventos = self.cargador()
+            except Exception as e:
+                print(f"⚠️ Agenda: error al refrescar ({str(e)[:60]})")
+                eventos = []
+
+            if not eventos:
+                return False  # Se conserva la instantánea anterior (si hay)
+
+            with self._lock:
+                nuevos = len(eventos) - len(self._eventos) if self._eventos else 0
+                self._instalar(eventos, time.time(), date.today().isoformat())
+                self._guardar_disco()
+
+        print(f"📅 Agenda: {len(eventos)} partidos en {time.time() - inicio:.1f}s"
+              + (f" (+{nuevos} nuevos)" if nuevos > 0 else ""))
+        return True
+
+    def eventos(self):
+        with self._lock:
+            self._ultima_consulta = time.time()
+            vigente, instante = self._vigente(time.time()), self._instante
+            self._iniciar_refresco_fondo()
+        if not vigente:
+            self.refrescar(si_anterior_a=instante)
+        with self._lock:
+            return list(self._eventos)
+
+    # ---------- Búsqueda ----------
+
+    def _buscar_en_instantanea(self, equipos):
+        """
+        Par canónico exacto → O(1). Si no, candidatos que comparten algún token
+        (no se recorre la agenda entera) ordenados por similitud de ambos equipos.
+        """
+        with self._lock:
+            exactos = self._indice_pares.get(clave_partido(equipos))
+            if exactos:
+                return list(exactos), self._instante
+
+            candidatos = []
+            for token in _tokens_partido(equipos):
+                for evento in self._indice_tokens.get(token, ()):
+                    if evento not in candidatos:
+                        candidatos.append(evento)
+            instante = self._instante
+
+        puntuados = [(nombres_equipos.similitud_partido(equipos, e.equipos), e) for e in candidatos]
+        puntuados = [(p, e) for p, e in puntuados if p > 0]
+        puntuados.sort(key=lambda x: x[0], reverse=True)
+        return [e for _, e in puntuados], instante
+
+    def buscar(self, nombre_partido):
+        """
+        Eventos del partido, el mejor primero ([] si ninguno alcanza el umbral).
+        Si no aparece y la instantánea no es reciente, se refresca una vez: el
+        partido pudo agregarse después de la última lectura.
+        """
+        equipos = separar_equipos(nombre_partido)
+        if len(equipos) < 2:
+            return []
+
+        self.eventos()
+        encontrados, instante = self._buscar_en_instantanea(equipos)
+        if not encontrados and time.time() - instante > REFRESCO_MINIMO_SIN_RESULTADO:
+            if self.refrescar(si_anterior_a=instante):
+                encontrados, _ = self._buscar_en_instantanea(equipos)
+        return encontrados
+
+    def buscar_varios(self, nombres_partidos):
+        """
+        buscar() para una lista de partidos con una sola instantánea: a lo sumo
+        un refresco para todos los que falten (no uno por partido).
+        Retorna {nombre_partido: [eventos]}.
+        """
+        equipos_por_nombre = {n: separar_equipos(n) for n in nombres_partidos}
+        resultados = {n: [] for n in nombres_partidos}
+        validos = [n for n, equipos in equipos_por_nombre.items() if len(equipos) >= 2]
+        if not validos:
+            return resultados
+
+        self.eventos()
+        instante = self._instante
+        for nombre in validos:
+            resultados[nombre], instante = self._buscar_en_instantanea(equipos_por_nombre[nombre])
+
+        faltantes = [n for n in validos if not resultados[n]]
+        if faltantes and time.time() - instante > REFRESCO_MINIMO_SIN_RESULTADO:
+            if self.refrescar(si_anterior_a=instante):
+                for nombre in faltantes:
+                    resultados[nombre], _ = self._buscar_en_instantanea(equipos_por_nombre[nombre])
+        return resultados
+
+    # ---------- Refresco en segundo plano ----------
+
+    def _iniciar_refresco_fondo(self):
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._loop_fondo, name="agenda-angulismo", daemon=True)
+            self._hilo.start()
+
+    def _loop_fondo(self):
+        while True:
+            time.sleep(INTERVALO_REFRESCO_FONDO)
+            with self._lock:
+                if time.time() - self._ultima_consulta > INACTIVIDAD_MAXIMA_FONDO:
+                    self._hilo = None
+                    return
+            self.refrescar()
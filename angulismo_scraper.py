@@ -6,7 +6,10 @@ angulismo_scraper.py - Módulo para Sistema Maestro v9.0
 import time
 import json
 import re
+import html
+import base64
 import requests
+from urllib.parse import urlparse, parse_qs, urljoin
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -14,11 +17,17 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
+import agenda_angulismo
+import promiedos_client
 
 # --- CONFIGURACIÓN ---
 MODO_VISIBLE = False  # False para producción (Headless)
 URL_ANGULISMO = "https://angulismotv-dnh.pages.dev"
 UA_DEFAULT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+TIMEOUT_HTTP = 10
+MAX_RECURSOS_AGENDA = 5  # JSON/JS referenciados por la agenda que se descargan buscando payloads
+ESPERA_MODAL = 4         # Máximo para que aparezca el modal o la agenda (lo que llegue primero)
+ESPERA_EXPANSION = 3     # Máximo para que las tarjetas expandidas muestren sus canales
 
 class AngulismoStream:
     """
@@ -47,35 +56,168 @@ class AngulismoStream:
     def __repr__(self):
         return f"<AngulismoStream: {self.name}>"
 
+# ==========================================
+# 0. PAYLOADS "vc" (sin navegador)
+# ==========================================
+RE_VC = re.compile(r'transmision\?vc=([A-Za-z0-9_\-]+)')
+RE_RECURSO_JSON = re.compile(r'["\']([^"\'\s<>]+\.json(?:\?[^"\'\s<>]*)?)["\']')
+
+class OpcionTransmision:
+    """Una opción (iframe) dentro de un payload vc"""
+    def __init__(self, nombre, iframe, indice):
+        self.nombre = nombre
+        self.iframe = iframe
+        self.indice = indice
+
+    def __repr__(self):
+        return f"<OpcionTransmision {self.indice}: {self.nombre}>"
+
+class PayloadTransmision:
+    """Contenido decodificado de un transmision?vc=...: partido y sus opciones"""
+    def __init__(self, vc, nombre, opciones, logo=None):
+        self.vc = vc
+        self.nombre = nombre
+        self.opciones = opciones
+        self.logo = logo
+
+    def url_opcion(self, indice):
+        """URL de AngulismoTV que abre directamente la opción indicada"""
+        return f"{URL_ANGULISMO}/transmision?vc={self.vc}&o={indice}"
+
+    def __repr__(self):
+        return f"<PayloadTransmision: {self.nombre} ({len(self.opciones)} opciones)>"
+
+def _payload_desde_dict(vc, datos):
+    if not isinstance(datos, dict) or not isinstance(datos.get('options'), list):
+        return None
+
+    opciones = []
+    for i, opcion in enumerate(datos['options']):
+        if isinstance(opcion, dict) and opcion.get('iframe'):
+            nombre = html.unescape(str(opcion.get('name') or f"Opción {i + 1}"))
+            opciones.append(OpcionTransmision(nombre, opcion['iframe'], i))
+
+    if not opciones:
+        return None
+    return PayloadTransmision(vc, html.unescape(str(datos.get('name') or '')), opciones, datos.get('logo'))
+
+def decodificar_vc(vc):
+    """base64url → JSON (UTF-8 o, si falla, latin-1). Retorna PayloadTransmision o None"""
+    if not vc:
+        return None
+    try:
+        crudo = base64.urlsafe_b64decode(vc + '=' * (-len(vc) % 4))
+        try:
+            texto = crudo.decode('utf-8')
+        except UnicodeDecodeError:
+            texto = crudo.decode('latin-1')
+        return _payload_desde_dict(vc, json.loads(texto))
+    except Exception:
+        return None
+
+def codificar_vc(datos):
+    """Inverso de decodificar_vc (para agendas que publican el JSON sin codificar)"""
+    texto = json.dumps(datos, ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decodificar_url_transmision(url):
+    """
+    Para una URL transmision?vc=...&o=N retorna (PayloadTransmision, N);
+    (None, None) si la URL no trae un payload válido
+    """
+    try:
+        query = parse_qs(urlparse(url).query)
+    except Exception:
+        return None, None
+
+    payload = decodificar_vc((query.get('vc') or [''])[0])
+    if payload is None:
+        return None, None
+
+    try:
+        indice = int((query.get('o') or ['0'])[0])
+    except ValueError:
+        indice = 0
+    return payload, indice
+
+def _payloads_en_json(datos, encontrados):
+    """Recorre un JSON buscando objetos con 'options' (formato del payload vc)"""
+    if isinstance(datos, dict):
+        if isinstance(datos.get('options'), list):
+            payload = _payload_desde_dict(codificar_vc(datos), datos)
+            if payload:
+                encontrados.append(payload)
+                return
+        for valor in datos.values():
+            _payloads_en_json(valor, encontrados)
+    elif isinstance(datos, list):
+        for valor in datos:
+            _payloads_en_json(valor, encontrados)
+
+def _descargar(url):
+    resp = requests.get(url, headers={'User-Agent': UA_DEFAULT, 'Referer': URL_ANGULISMO}, timeout=TIMEOUT_HTTP)
+    resp.raise_for_status()
+    return resp.text
+
+def obtener_agenda_http():
+    """
+    Agenda completa de AngulismoTV por HTTP plano: página principal, iframe de la
+    agenda y los JSON que referencia. Retorna lista de PayloadTransmision (sin repetir).
+    """
+    textos = []
+    principal = _descargar(URL_ANGULISMO)
+    textos.append(principal)
+
+    soup = BeautifulSoup(principal, 'html.parser')
+    frame = soup.find('iframe', id='agendaFrame')
+    if frame and frame.get('src'):
+        url_agenda = urljoin(URL_ANGULISMO + '/', frame['src'])
+        textos.append(_descargar(url_agenda))
+    else:
+        url_agenda = URL_ANGULISMO + '/'
+
+    payloads = []
+    for recurso in list(dict.fromkeys(RE_RECURSO_JSON.findall(textos[-1])))[:MAX_RECURSOS_AGENDA]:
+        try:
+            _payloads_en_json(json.loads(_descargar(urljoin(url_agenda, recurso))), payloads)
+        except Exception:
+            continue
+
+    for texto in textos:
+        for vc in RE_VC.findall(html.unescape(texto)):
+            payload = decodificar_vc(vc)
+            if payload:
+                payloads.append(payload)
+
+    unicos = {}
+    for payload in payloads:
+        unicos.setdefault(payload.vc, payload)
+    return list(unicos.values())
+
+def eventos_desde_payloads(payloads):
+    """Un EventoAgenda por payload, con la URL que abre cada opción"""
+    return [
+        agenda_angulismo.EventoAgenda(
+            payload.nombre,
+            [(opcion.nombre, payload.url_opcion(opcion.indice)) for opcion in payload.opciones]
+        )
+        for payload in payloads
+    ]
+
 # ==========================================
 # 1. FUNCIÓN PROMIEDOS (Metadata)
 # ==========================================
 def extraer_nombre_partido_de_promiedos(url_promiedos):
-    """Extrae el nombre del partido (ej: 'Metz vs PSG') de Promiedos."""
+    """
+    Nombre del partido (ej: 'Metz vs Paris Saint-Germain') desde la metadata
+    compartida de promiedos_client: misma consulta cacheada y mismos nombres
+    de equipo (alias ya registrados) que el resto del sistema.
+    """
     if not url_promiedos or "promiedos.com.ar" not in url_promiedos:
         return None
 
-    headers = {'User-Agent': UA_DEFAULT}
     try:
-        resp = requests.get(url_promiedos, headers=headers, timeout=10)
-        if resp.status_code != 200:
-            return None
-            
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        
-        # Método JSON Next.js
-        script_data = soup.find("script", id="__NEXT_DATA__")
-        if script_data:
-            try:
-                data = json.loads(script_data.string)
-                game = data['props']['pageProps']['initialData']['game']
-                return f"{game['teams'][0]['name']} vs {game['teams'][1]['name']}"
-            except: pass
-
-        # Método Título (Backup)
-        if soup.title and (" Vs " in soup.title.string or " vs " in soup.title.string):
-            return soup.title.string.split("-")[0].replace(" Vs ", " vs ").strip()
-
+        return promiedos_client.obtener_nombre_partido(url_promiedos)
     except Exception as e:
         print(f"⚠️ Error scraper Promiedos: {e}")
     
@@ -85,51 +227,180 @@ def extraer_nombre_partido_de_promiedos(url_promiedos):
 # 2. AYUDAS SELENIUM
 # ==========================================
 def cerrar_modal_bizarro(driver):
+    """
+    Espera lo primero que aparezca: el modal o el iframe de la agenda. Sin
+    modal no se espera nada más; con modal, cada paso espera su condición
+    (botón habilitado, modal cerrado) en lugar de pausas fijas.
+    """
     try:
-        checkbox = WebDriverWait(driver, 4).until(
-            EC.presence_of_element_located((By.ID, "entendidoCheckbox"))
+        WebDriverWait(driver, ESPERA_MODAL).until(
+            EC.any_of(
+                EC.presence_of_element_located((By.ID, "entendidoCheckbox")),
+                EC.presence_of_element_located((By.ID, "agendaFrame")),
+            )
+        )
+        checkbox = driver.find_elements(By.ID, "entendidoCheckbox")
+        if not checkbox:
+            return
+
+        driver.execute_script("arguments[0].click();", checkbox[0])
+        boton = WebDriverWait(driver, ESPERA_MODAL).until(
+            EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Aceptar')]"))
         )
-        driver.execute_script("arguments[0].click();", checkbox)
-        time.sleep(0.5)
-        boton = driver.find_element(By.XPATH, "//button[contains(text(), 'Aceptar')]")
         driver.execute_script("arguments[0].click();", boton)
-        time.sleep(1)
-    except: pass
+        WebDriverWait(driver, ESPERA_MODAL).until(
+            EC.invisibility_of_element_located((By.ID, "entendidoCheckbox"))
+        )
+    except Exception:
+        pass  # Sin modal ni agenda a tiempo: la espera del iframe decide
+
+RE_ATRIBUTO_DATA = re.compile(r'data-(?:iframe|url|src|link|stream|href|embed)\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+RE_URL_ENTRE_COMILLAS = re.compile(r'["\']((?:https?:)?//[^"\'\s]+|/?transmision\?[^"\'\s]+)["\']')
+RE_HANDLER = re.compile(r'\bon[a-z]+\s*=\s*(?:"([^"]*)"|\'([^\']*)\')', re.IGNORECASE)
+RE_JS_NAVEGACION = re.compile(r'(?:window\.open|location(?:\.href)?\s*=|location\.(?:assign|replace))\s*\(?\s*["\']([^"\']+)["\']')
+RE_HREF = re.compile(r'\bhref\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+# Recursos de la página (logo del canal, estilos, scripts): nunca son un stream
+EXTENSIONES_NO_STREAM = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg', '.ico', '.bmp',
+                         '.css', '.js', '.woff', '.woff2', '.ttf', '.otf', '.eot')
+RE_URL_STREAM = re.compile(r'https?://[^"\'\s]+?\.(?:m3u8|mp4|php|html?)(?:\?[^"\'\s]*)?', re.IGNORECASE)
+
+def _url_de_valor(valor, base):
+    """Valor de atributo → URL absoluta (acepta base64 de una URL); None si no es URL"""
+    valor = html.unescape(valor.strip())
+    if not valor.startswith(('http', '//', '/', 'transmision')):
+        try:
+            decodificado = base64.b64decode(valor + '=' * (-len(valor) % 4)).decode('utf-8')
+        except Exception:
+            return None
+        if not decodificado.startswith(('http', '//')):
+            return None
+        valor = decodificado
+    return urljoin(base, valor)
 
-def intentar_extraer_url_real(item_element, driver):
+def _es_url_util(url):
     """
-    Intenta sacar la URL del stream del elemento <li>.
+    Descarta la home/agenda de AngulismoTV y los recursos estáticos (imágenes,
+    CSS, JS, fuentes): escanearlos nunca da un stream
     """
-    try:
-        # 1. Buscar en el HTML si hay un link directo (regex simple)
-        html = item_element.get_attribute('outerHTML')
-        match = re.search(r"['\"](https?://.*?\.(m3u8|mp4|php).*?)['\"]", html)
-        if match:
-            return match.group(1)
-        
-        # 2. Si no hay link evidente, devolvemos la URL base para que sistema maestro
-        # intente manejarlo o al menos no falle vacío.
-        return URL_ANGULISMO 
-    except:
-        return URL_ANGULISMO
+    if not url:
+        return False
+    partes = urlparse(url)
+    if partes.path.lower().endswith(EXTENSIONES_NO_STREAM):
+        return False
+    if partes.netloc == urlparse(URL_ANGULISMO).netloc:
+        return 'vc=' in partes.query
+    return partes.scheme in ('http', 'https')
 
-# ==========================================
-# 3. FUNCIÓN PRINCIPAL (Interfaz Sistema Maestro)
-# ==========================================
-def obtener_streams_para_partido(url_promiedos, preferir_canales=None):
+def resolver_url_opcion(html_item, base=URL_ANGULISMO + '/', handlers=()):
     """
-    Función principal llamada por el Sistema Maestro.
-    Devuelve una lista de objetos AngulismoStream.
+    URL real de una opción de la agenda a partir de su HTML, en orden:
+    1. Link a transmision?vc=... (href, onclick, data-*), validando el payload
+    2. Atributos data-iframe / data-url / data-src / ... (texto plano o base64) y href
+    3. URLs entre comillas solo dentro de handlers (onclick="abrir('...')",
+       window.open, location = ...), no cualquier string del HTML (el logo del
+       canal también es una URL entre comillas)
+    4. Link directo a m3u8/mp4/php/html
+    handlers: código JS extra asignado por propiedad (p.ej. String(e.onclick)).
+    Retorna None si la opción no se puede resolver.
     """
-    print(f"[{time.strftime('%H:%M:%S')}] 🔍 Scraper: Analizando {url_promiedos}...")
-    
-    nombre_partido = extraer_nombre_partido_de_promiedos(url_promiedos)
-    if not nombre_partido:
-        print(f"[{time.strftime('%H:%M:%S')}] ⚠️ Scraper: No se pudo obtener nombre de Promiedos.")
-        return []
+    texto = html.unescape(html_item or '')
+    codigo = [a or b for a, b in RE_HANDLER.findall(texto)] + [h for h in handlers if h]
 
-    print(f"[{time.strftime('%H:%M:%S')}] 🎯 Scraper: Buscando '{nombre_partido}' en AngulismoTV")
+    vc = RE_VC.search(texto + ' ' + ' '.join(codigo))
+    payload = decodificar_vc(vc.group(1)) if vc else None
+    if payload:
+        indice = re.match(r'[^"\'\s]*?[?&]o=(\d+)', vc.string[vc.end():])
+        return payload.url_opcion(int(indice.group(1)) if indice else 0)
+
+    candidatos = [_url_de_valor(v, base) for v in RE_ATRIBUTO_DATA.findall(texto)]
+    candidatos += [urljoin(base, v) for v in RE_HREF.findall(texto) if not v.startswith(('javascript:', '#'))]
+    for fragmento in codigo:
+        candidatos += [urljoin(base, v) for v in RE_URL_ENTRE_COMILLAS.findall(fragmento)]
+        candidatos += [urljoin(base, v) for v in RE_JS_NAVEGACION.findall(fragmento)]
+    candidatos += RE_URL_STREAM.findall(texto)
+
+    for url in candidatos:
+        if _es_url_util(url):
+            return url
+    return None
+
+def url_desde_datos_item(datos):
+    """
+    URL real del stream a partir de los datos de un <li> leídos en el navegador
+    (None si no se puede resolver: mejor descartarlo que gastar un escaneo de
+    Chrome en la home). Además del HTML se usan los atributos que el JS de la
+    agenda pudo asignar por propiedad (dataset, href, onclick).
+    """
+    html_item = datos.get('html') or ''
+    html_item += ''.join(f' data-{k}="{v}"' for k, v in (datos.get('dataset') or {}).items())
+    html_item += f' href="{datos["href"]}"' if datos.get('href') else ''
+    return resolver_url_opcion(html_item, handlers=[datos.get('onclick')])
+
+# Expande todas las tarjetas de una vez (retorna cuántas)
+JS_EXPANDIR_TARJETAS = """
+var iconos = document.querySelectorAll('.match-card .expand-icon');
+iconos.forEach(function (i) { i.click(); });
+return iconos.length;
+"""
+
+# Listo cuando cada tarjeta expandible ya tiene sus canales en el DOM
+JS_TARJETAS_EXPANDIDAS = """
+var cards = document.querySelectorAll('.match-card');
+for (var i = 0; i < cards.length; i++) {
+    if (cards[i].querySelector('.expand-icon') &&
+        !cards[i].querySelector('ul.channel-menu li.channel-item')) return false;
+}
+return true;
+"""
+
+# Toda la agenda en una sola ida y vuelta: equipos y, por canal, texto y atributos
+JS_EXTRAER_AGENDA = """
+function texto(e) { return (e.innerText || e.textContent || '').replace(/\\s+/g, ' ').trim(); }
+var cards = document.querySelectorAll('.match-card');
+var salida = [];
+for (var i = 0; i < cards.length; i++) {
+    var equipos = cards[i].querySelector('.teams');
+    var items = cards[i].querySelectorAll('ul.channel-menu li.channel-item');
+    var opciones = [];
+    for (var j = 0; j < items.length; j++) {
+        var e = items[j], a = e.querySelector('a');
+        var spans = Array.prototype.map.call(e.querySelectorAll('span'), texto).join(' ');
+        opciones.push({
+            texto: texto(e) || spans.trim(),
+            html: e.outerHTML,
+            dataset: Object.assign({}, e.dataset || {}),
+            href: a ? a.href : null,
+            onclick: e.onclick ? String(e.onclick) : null
+        });
+    }
+    salida.push({equipos: equipos ? (equipos.innerText || equipos.textContent || '').trim() : '', opciones: opciones});
+}
+return JSON.stringify(salida);
+"""
+
+def eventos_desde_tarjetas(tarjetas):
+    """JSON de JS_EXTRAER_AGENDA → (lista de EventoAgenda, opciones descartadas)"""
+    eventos, descartadas = [], 0
+    for tarjeta in tarjetas:
+        opciones = []
+        for datos in tarjeta.get('opciones') or []:
+            url_opcion = url_desde_datos_item(datos)
+            if url_opcion:
+                opciones.append((datos.get('texto') or "Opción Desconocida", url_opcion))
+            else:
+                descartadas += 1
 
+        # "Local\nVisitante" (un equipo por línea en la tarjeta) → "Local vs Visitante"
+        nombre = ' vs '.join(l.strip() for l in (tarjeta.get('equipos') or '').splitlines() if l.strip())
+        if nombre and opciones:
+            eventos.append(agenda_angulismo.EventoAgenda(nombre, opciones))
+    return eventos, descartadas
+
+# ==========================================
+# 3. AGENDA COMPLETA (una lectura para todos los partidos)
+# ==========================================
+def obtener_agenda_selenium():
+    """Recorre todas las tarjetas de la agenda con Chrome (respaldo del camino HTTP)"""
     options = Options()
     if not MODO_VISIBLE:
         options.add_argument('--headless')
@@ -138,7 +409,7 @@ def obtener_streams_para_partido(url_promiedos, preferir_canales=None):
     options.add_argument('--log-level=3')
 
     driver = webdriver.Chrome(options=options)
-    streams_encontrados = []
+    eventos = []
     
     try:
         driver.get(URL_ANGULISMO)
@@ -151,7 +422,6 @@ def obtener_streams_para_partido(url_promiedos, preferir_canales=None):
             )
         except:
             print(f"[{time.strftime('%H:%M:%S')}] ❌ Scraper: No se encontró la agenda.")
-            driver.quit()
             return []
 
         # Esperar partidos
@@ -160,71 +430,126 @@ def obtener_streams_para_partido(url_promiedos, preferir_canales=None):
                 EC.presence_of_element_located((By.CLASS_NAME, "match-card"))
             )
         except:
-            driver.quit()
             return []
 
-        cards = driver.find_elements(By.CLASS_NAME, "match-card")
-        
-        # Lógica de búsqueda
-        partido_lower = nombre_partido.lower()
-        keywords = [p for p in partido_lower.split() if len(p) > 2 and p != "vs"]
-
-        for card in cards:
+        # Expandir todas las tarjetas y esperar a que aparezcan sus canales
+        if driver.execute_script(JS_EXPANDIR_TARJETAS):
             try:
-                txt = card.text.lower()
-                # Coincidencia: Nombre exacto o al menos 2 palabras clave
-                match = (partido_lower in txt) or (len(keywords) > 0 and sum(1 for k in keywords if k in txt) >= 2)
-                
-                if match:
-                    nombre_real = card.find_element(By.CLASS_NAME, "teams").text
-                    
-                    # Expandir opciones
-                    try:
-                        icon = card.find_element(By.CLASS_NAME, "expand-icon")
-                        driver.execute_script("arguments[0].click();", icon)
-                        time.sleep(0.5)
-                    except: pass
-
-                    # Recolectar canales
-                    items = card.find_elements(By.CSS_SELECTOR, "ul.channel-menu li.channel-item")
-                    
-                    for item in items:
-                        texto_opcion = item.text.replace("\n", " ").strip()
-                        if not texto_opcion:
-                            # Intentar sacar texto de spans internos
-                            texto_opcion = " ".join([s.text for s in item.find_elements(By.TAG_NAME, "span")])
-                        
-                        if not texto_opcion:
-                            texto_opcion = "Opción Desconocida"
-
-                        # Crear objeto Stream
-                        url_stream = intentar_extraer_url_real(item, driver)
-                        
-                        nombre_final = f"{nombre_real} - {texto_opcion}"
-                        
-                        stream_obj = AngulismoStream(
-                            nombre=nombre_final,
-                            url=url_stream,
-                            referer=URL_ANGULISMO
-                        )
-                        streams_encontrados.append(stream_obj)
-                        
-            except Exception:
-                continue
+                WebDriverWait(driver, ESPERA_EXPANSION).until(
+                    lambda d: d.execute_script(JS_TARJETAS_EXPANDIDAS)
+                )
+            except TimeoutException:
+                pass  # Se lee lo que haya: las tarjetas sin canales se descartan
+
+        tarjetas = json.loads(driver.execute_script(JS_EXTRAER_AGENDA) or '[]')
+        eventos, descartadas = eventos_desde_tarjetas(tarjetas)
+
+        if descartadas:
+            print(f"[{time.strftime('%H:%M:%S')}] 🗑️ Scraper: {descartadas} opciones sin URL resoluble descartadas")
 
     except Exception as e:
         print(f"[{time.strftime('%H:%M:%S')}] ❌ Error en Selenium: {e}")
     finally:
         driver.quit()
 
-    # Filtro de preferencias (Básico)
-    if streams_encontrados and preferir_canales:
-        streams_encontrados.sort(
+    return eventos
+
+def obtener_agenda():
+    """
+    Lectura completa de la agenda: HTTP + payloads vc (milisegundos) o,
+    si no da resultados, Selenium
+    """
+    try:
+        eventos = eventos_desde_payloads(obtener_agenda_http())
+    except Exception as e:
+        print(f"[{time.strftime('%H:%M:%S')}] ⚠️ Scraper: agenda HTTP falló ({str(e)[:60]})")
+        eventos = []
+
+    if eventos:
+        return eventos
+
+    print(f"[{time.strftime('%H:%M:%S')}] 🐢 Scraper: sin resultados por HTTP, usando Selenium")
+    return obtener_agenda_selenium()
+
+# Instantánea compartida por todos los partidos (memoria + disco, TTL, refresco de fondo)
+agenda = agenda_angulismo.AgendaAngulismo(obtener_agenda)
+
+# ==========================================
+# 4. FUNCIÓN PRINCIPAL (Interfaz Sistema Maestro)
+# ==========================================
+def obtener_streams_para_partido(url_promiedos, preferir_canales=None):
+    """
+    Función principal llamada por el Sistema Maestro.
+    Devuelve una lista de objetos AngulismoStream.
+    """
+    print(f"[{time.strftime('%H:%M:%S')}] 🔍 Scraper: Analizando {url_promiedos}...")
+    
+    nombre_partido = extraer_nombre_partido_de_promiedos(url_promiedos)
+    if not nombre_partido:
+        print(f"[{time.strftime('%H:%M:%S')}] ⚠️ Scraper: No se pudo obtener nombre de Promiedos.")
+        return []
+
+    print(f"[{time.strftime('%H:%M:%S')}] 🎯 Scraper: Buscando '{nombre_partido}' en AngulismoTV")
+
+    return _streams_de_eventos(agenda.buscar(nombre_partido), preferir_canales)
+
+def _nombre_partido(partido):
+    """URL de Promiedos, par (local, visitante) o 'Local vs Visitante' → nombre a buscar"""
+    if isinstance(partido, (tuple, list)):
+        return f"{partido[0]} vs {partido[1]}" if len(partido) >= 2 else None
+    if partido and "promiedos.com.ar" in partido:
+        return extraer_nombre_partido_de_promiedos(partido)
+    return partido or None
+
+def obtener_streams_para_partidos(partidos, preferir_canales=None):
+    """
+    Versión por lotes de obtener_streams_para_partido para toda la noche:
+    una sola lectura de la agenda (a lo sumo una sesión de Chrome si el camino
+    HTTP falla) y a lo sumo un refresco para los partidos que no aparezcan.
+    partidos: URLs de Promiedos y/o pares (local, visitante).
+    Retorna {partido: [AngulismoStream]} con las mismas claves (las listas pasan a tupla).
+    """
+    claves = [tuple(p) if isinstance(p, list) else p for p in partidos]
+    nombres = {clave: _nombre_partido(clave) for clave in claves}
+    for clave, nombre in nombres.items():
+        if not nombre:
+            print(f"[{time.strftime('%H:%M:%S')}] ⚠️ Scraper: sin nombre para {clave}")
+
+    buscados = list(dict.fromkeys(n for n in nombres.values() if n))
+    print(f"[{time.strftime('%H:%M:%S')}] 🎯 Scraper: Buscando {len(buscados)} partidos en AngulismoTV")
+    eventos = agenda.buscar_varios(buscados) if buscados else {}
+
+    resultados = {}
+    for clave, nombre in nombres.items():
+        resultados[clave] = _streams_de_eventos(eventos.get(nombre, []), preferir_canales) if nombre else []
+
+    encontrados = sum(1 for streams in resultados.values() if streams)
+    print(f"[{time.strftime('%H:%M:%S')}] ✅ Scraper: {encontrados}/{len(resultados)} partidos con streams")
+    return resultados
+
+def _streams_de_eventos(eventos, preferir_canales=None):
+    """Opciones útiles de los eventos encontrados como AngulismoStream"""
+    streams_encontrados = []
+    for evento in eventos:
+        for texto_opcion, url_stream in evento.opciones:
+            if not _es_url_util(url_stream):
+                continue
+            streams_encontrados.append(AngulismoStream(
+                nombre=f"{evento.nombre} - {texto_opcion}",
+                url=url_stream,
+                referer=URL_ANGULISMO
+            ))
+
+    return ordenar_por_preferencia(streams_encontrados, preferir_canales)
+
+def ordenar_por_preferencia(streams, preferir_canales=None):
+    """Filtro de preferencias (Básico): canales preferidos primero"""
+    if streams and preferir_canales:
+        streams.sort(
             key=lambda s: any(p.lower() in s.name.lower() for p in preferir_canales),
             reverse=True
         )
-
-    return streams_encontrados
+    return streams
 
 # Test rápido
 if __name__ == "__main__":
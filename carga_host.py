@@ -0,0 +1,191 @@
+"""
+carga_host.py - Concurrencia de escaneo según la carga real de la máquina
+Lee /proc para decidir cuántos navegadores pueden correr a la vez:
+- CPU libre (/proc/stat) y memoria disponible (/proc/meminfo)
+- Tráfico de red (/proc/net/dev) contra la capacidad configurada
+- Grabaciones activas (procesos ffmpeg en el sistema)
+- Pestañas persistentes de sesiones_navegador (Chrome fuera del pool de escaneo)
+El resultado queda acotado entre CONCURRENCIA_MIN y CONCURRENCIA_MAX y se
+expone como métrica (obtener_metricas).
+"""
+
+import os
+import time
+import threading
+
+# ============ CONFIGURACIÓN ============
+CONCURRENCIA_MIN = 1
+CONCURRENCIA_MAX = 8
+INTERVALO_MEDICION = 5            # Segundos que se reutiliza una medición
+CPU_POR_ESCANEO = 0.8             # Núcleos que consume un Chrome cargando una página
+CPU_RESERVADA = 1.0               # Núcleos que nunca se le dan al escaneo (ffmpeg, SO)
+MEMORIA_POR_ESCANEO_MB = 700
+MEMORIA_RESERVADA_MB = 1024
+CAPACIDAD_RED_MBPS = 100          # Enlace de subida+bajada disponible
+RED_POR_ESCANEO_MBPS = 6          # Página + reproductor + auditoría
+GRABACIONES_POR_NAVEGADOR = 5     # Cada 5 ffmpeg activos se resigna un navegador
+SESIONES_POR_NAVEGADOR = 2        # Cada 2 pestañas persistentes (video pausado) se resigna un navegador
+MEMORIA_POR_SESION_MB = 500
+PROCESO_GRABACION = 'ffmpeg'
+# =======================================
+
+
+def _leer_cpu():
+    """(ocupado, total) en jiffies desde /proc/stat"""
+    with open('/proc/stat') as f:
+        valores = [int(v) for v in f.readline().split()[1:]]
+    inactivo = valores[3] + (valores[4] if len(valores) > 4 else 0)  # idle + iowait
+    total = sum(valores[:8])
+    return total - inactivo, total
+
+
+def _leer_memoria_disponible_mb():
+    with open('/proc/meminfo') as f:
+        for linea in f:
+            if linea.startswith('MemAvailable:'):
+                return int(linea.split()[1]) / 1024
+    return None
+
+
+def _leer_bytes_red():
+    """Bytes recibidos + enviados por todas las interfaces salvo loopback"""
+    total = 0
+    with open('/proc/net/dev') as f:
+        for linea in f.readlines()[2:]:
+            interfaz, datos = linea.split(':', 1)
+            if interfaz.strip() == 'lo':
+                continue
+            campos = datos.split()
+            total += int(campos[0]) + int(campos[8])
+    return total
+
+
+def contar_grabaciones():
+    """Procesos ffmpeg vivos en el sistema (todas las grabaciones, de todos los partidos)"""
+    cantidad = 0
+    try:
+        for entrada in os.listdir('/proc'):
+            if not entrada.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entrada}/comm') as f:
+                    if f.read().strip() == PROCESO_GRABACION:
+                        cantidad += 1
+            except Exception:
+                continue
+    except Exception:
+        return 0
+    return cantidad
+
+
+class MonitorCarga:
+    """Calcula la concurrencia de escaneo a partir de mediciones de /proc"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._anterior = None      # (instante, cpu_ocupado, cpu_total, bytes_red)
+        self._ultima_medicion = 0
+        self.concurrencia = None
+        self.metricas = {}
+        self.sesiones_navegador = 0  # Informado por sesiones_navegador
+
+    def _muestra(self):
+        ocupado, total = _leer_cpu()
+        return time.time(), ocupado, total, _leer_bytes_red()
+
+    def _medir(self, en_curso):
+        actual = self._muestra()
+        if self._anterior is None:
+            time.sleep(0.5)  # Primera vez: hacen falta dos lecturas para las tasas
+            self._anterior, actual = actual, self._muestra()
+
+        instante0, ocupado0, total0, red0 = self._anterior
+        instante1, ocupado1, total1, red1 = actual
+        self._anterior = actual
+
+        nucleos = os.cpu_count() or 1
+        uso_cpu = (ocupado1 - ocupado0) / max(total1 - total0, 1)
+        red_mbps = (red1 - red0) * 8 / 1e6 / max(instante1 - instante0, 0.001)
+        memoria_mb = _leer_memoria_disponible_mb()
+        grabaciones = contar_grabaciones()
+
+        # Lo que ya consumen los escaneos en curso vuelve a estar disponible para ellos
+        cpu_libre = nucleos * (1 - uso_cpu) - CPU_RESERVADA + en_curso * CPU_POR_ESCANEO
+        limites = {
+            'cpu': int(cpu_libre / CPU_POR_ESCANEO),
+            'red': int((CAPACIDAD_RED_MBPS - red_mbps) / RED_POR_ESCANEO_MBPS) + en_curso,
+            'grabaciones': CONCURRENCIA_MAX - grabaciones // GRABACIONES_POR_NAVEGADOR,
+            'sesiones': CONCURRENCIA_MAX - self.sesiones_navegador // SESIONES_POR_NAVEGADOR,
+        }
+        if memoria_mb is not None:
+            limites['memoria'] = int((memoria_mb - MEMORIA_RESERVADA_MB) / MEMORIA_POR_ESCANEO_MB) + en_curso
+
+        concurrencia = max(CONCURRENCIA_MIN, min(CONCURRENCIA_MAX, *limites.values()))
+        limitante = min(limites, key=limites.get)
+
+        self.metricas = {
+            'concurrencia_escaneo': concurrencia,
+            'limitante': limitante,
+            'limites': limites,
+            'uso_cpu_pct': uso_cpu * 100,
+            'nucleos': nucleos,
+            'memoria_disponible_mb': memoria_mb,
+            'red_mbps': red_mbps,
+            'grabaciones_activas': grabaciones,
+            'sesiones_navegador': self.sesiones_navegador,
+            'escaneos_en_curso': en_curso,
+            'instante': instante1,
+        }
+
+        if concurrencia != self.concurrencia:
+            print(f"   ⚙️ Concurrencia de escaneo: {concurrencia} "
+                  f"(CPU {uso_cpu * 100:.0f}%, {memoria_mb or 0:.0f}MB libres, "
+                  f"red {red_mbps:.1f}Mbps, {grabaciones} grabaciones; limita {limitante})")
+        self.concurrencia = concurrencia
+
+    def concurrencia_escaneo(self, en_curso=0):
+        """Navegadores simultáneos permitidos ahora (medición cacheada INTERVALO_MEDICION)"""
+        with self._lock:
+            if self.concurrencia is None or time.time() - self._ultima_medicion >= INTERVALO_MEDICION:
+                try:
+                    self._medir(en_curso)
+                except Exception as e:
+                    # Sin /proc (u otro error de lectura): el mínimo es siempre seguro
+                    if self.concurrencia is None:
+                        print(f"   ⚠️ No se pudo medir la carga ({str(e)[:60]}), concurrencia mínima")
+                        self.concurrencia = CONCURRENCIA_MIN
+                self._ultima_medicion = time.time()
+            return self.concurrencia
+
+    def obtener_metricas(self):
+        with self._lock:
+            return dict(self.metricas)
+
+    def admite_sesion(self):
+        """Hay memoria para una pestaña persistente más sin quitarle lugar al escaneo mínimo"""
+        self.concurrencia_escaneo()
+        memoria_mb = self.obtener_metricas().get('memoria_disponible_mb')
+        if memoria_mb is None:
+            return True
+        libre = memoria_mb - MEMORIA_RESERVADA_MB - CONCURRENCIA_MIN * MEMORIA_POR_ESCANEO_MB
+        return libre >= MEMORIA_POR_SESION_MB
+
+
+monitor = MonitorCarga()
+
+
+def concurrencia_escaneo(en_curso=0):
+    return monitor.concurrencia_escaneo(en_curso)
+
+
+def obtener_metricas():
+    return monitor.obtener_metricas()
+
+
+def admite_sesion():
+    return monitor.admite_sesion()
+
+
+def registrar_sesiones_navegador(cantidad):
+    with monitor._lock:
+        monitor.sesiones_navegador = cantidad
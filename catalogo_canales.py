@@ -0,0 +1,143 @@
+"""
+catalogo_canales.py - Catálogo estático de canales compilado desde config_tv
+Respaldo independiente del scraper de AngulismoTV: cada canal de
+config_tv.GRILLA_CANALES se compila (payload vc decodificado → iframe real)
+a un archivo de búsqueda en ./logs/ (generado, no versionado) que se carga
+al arrancar sistema_maestro.
+- canal normalizado → fuentes (nombre, url de la transmisión, iframe)
+- iframe → canales que lo publican
+Los nombres de "Arg TV" de Promiedos se resuelven contra ese índice, por
+nombre exacto o ALIAS_CANALES.
+
+Uso: python catalogo_canales.py   (recompila; también se hace solo si config_tv cambió)
+"""
+
+import os
+import json
+import time
+
+import config_tv
+import angulismo_scraper
+import nombres_equipos
+import reputacion_fuentes
+
+# ============ CONFIGURACIÓN ============
+RUTA_CATALOGO = "./logs/catalogo_canales.json"
+
+# Cómo puede nombrar Promiedos a un canal de la grilla (normalizado → canal normalizado)
+ALIAS_CANALES = {
+    'directv sports': 'dsports',
+    'dtv sports': 'dsports',
+    'disney plus premium': 'disney premium',
+    'disney plus': 'disney premium',
+    'disney': 'disney premium',
+    'star plus': 'disney premium',
+    'espn premium hd': 'espn premium',
+}
+# =======================================
+
+
+def normalizar_canal(nombre):
+    """'Disney+ Premium' → 'disney plus premium' (el '+' distingue canales)"""
+    return nombres_equipos.normalizar_nombre((nombre or '').replace('+', ' plus '))
+
+
+def _clave_canal(nombre):
+    normalizado = normalizar_canal(nombre)
+    return ALIAS_CANALES.get(normalizado, normalizado)
+
+
+def compilar_catalogo(grilla=None, ruta=RUTA_CATALOGO):
+    """Decodifica cada fuente de la grilla y escribe el archivo de búsqueda"""
+    grilla = config_tv.GRILLA_CANALES if grilla is None else grilla
+    canales, iframes = {}, {}
+
+    for canal, fuentes in grilla.items():
+        entradas = []
+        for nombre, url in fuentes:
+            payload, indice = angulismo_scraper.decodificar_url_transmision(url)
+            opcion = payload.opciones[indice] if payload and 0 <= indice < len(payload.opciones) else None
+            iframe = opcion.iframe if opcion else url
+            entradas.append({
+                'nombre': nombre,
+                'url': url,
+                'iframe': iframe,
+                'opcion': opcion.nombre if opcion else None,
+                'evento': payload.nombre if payload else None,
+            })
+            canales_iframe = iframes.setdefault(reputacion_fuentes.clave_fuente(iframe), [])
+            if canal not in canales_iframe:
+                canales_iframe.append(canal)
+
+        canales[_clave_canal(canal)] = {'canal': canal, 'fuentes': entradas}
+
+    catalogo = {'generado': time.time(), 'canales': canales, 'iframes': iframes}
+
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    tmp = f"{ruta}.tmp"
+    with open(tmp, "w", encoding='utf-8') as f:
+        json.dump(catalogo, f, indent=1, ensure_ascii=False)
+    os.replace(tmp, ruta)
+
+    total = sum(len(c['fuentes']) for c in canales.values())
+    print(f"📚 Catálogo de canales: {len(canales)} canales, {total} fuentes, {len(iframes)} iframes distintos")
+    return catalogo
+
+
+def cargar_catalogo(ruta=RUTA_CATALOGO):
+    """Carga el archivo; lo recompila si falta, está roto o config_tv es más nuevo"""
+    try:
+        if os.path.getmtime(ruta) >= os.path.getmtime(config_tv.__file__):
+            with open(ruta, encoding='utf-8') as f:
+                return json.load(f)
+    except Exception:
+        pass
+
+    try:
+        return compilar_catalogo(ruta=ruta)
+    except Exception as e:
+        print(f"⚠️ No se pudo compilar el catálogo de canales: {e}")
+        return {'canales': {}, 'iframes': {}}
+
+
+def obtener_catalogo():
+    """Catálogo en memoria; se carga (o compila) la primera vez que se pide"""
+    global catalogo
+    if catalogo is None:
+        catalogo = cargar_catalogo()
+    return catalogo
+
+
+def buscar_canal(nombre_canal):
+    """
+    Entrada del catálogo para un nombre de canal (exacto o ALIAS_CANALES).
+    Sin coincidencia por palabras: "TNT Sports Premium" no es "TNT Sports".
+    """
+    return obtener_catalogo().get('canales', {}).get(_clave_canal(nombre_canal))
+
+
+def fuentes_para_canales(nombres_canales):
+    """
+    Lista de fuentes (nombre, url) para los canales de Promiedos ("Arg TV"),
+    en el orden de los canales. Las que comparten iframe se dejan: smart_selector
+    las colapsa y las usa como alternativas.
+    """
+    fuentes, vistas = [], set()
+    for nombre_canal in nombres_canales or []:
+        entrada = buscar_canal(nombre_canal)
+        if not entrada:
+            continue
+        for fuente in entrada['fuentes']:
+            if fuente['url'] not in vistas:
+                vistas.add(fuente['url'])
+                fuentes.append((fuente['nombre'], fuente['url']))
+    return fuentes
+
+
+catalogo = None
+
+
+if __name__ == "__main__":
+    catalogo = compilar_catalogo()
+    for clave, entrada in catalogo['canales'].items():
+        print(f"   {entrada['canal']} ({clave}): {len(entrada['fuentes'])} fuentes")
@@ -0,0 +1,136 @@
+"""
+descubrimiento_previo.py - Fuentes y candidatos frescos para el arranque del partido
+Las fuentes se obtienen horas antes del inicio; mientras tanto aparecen canales
+nuevos en la agenda y otros links mueren. Antes del inicio (T-60, T-20, T-5) se
+vuelve a descubrir y se aplica solo la diferencia:
+- Fuentes nuevas o cambiadas (otro embed real): se escanean y auditan
+- Fuentes que ya no aparecen: se quitan junto con su candidato
+- Candidatos ya obtenidos: se re-auditan (HTTP, sin navegador); los caídos o
+  con token que no llega al inicio se vuelven a escanear
+Al inicio de la grabación quedan candidatos auditados listos para usar.
+"""
+
+import time
+
+import smart_selector
+import motor_auditoria
+import expiracion_tokens
+
+# ============ CONFIGURACIÓN ============
+ETAPAS_MINUTOS = (60, 20, 5)       # Redescubrimientos antes del inicio de la grabación
+EDAD_MAXIMA_AGENDA = 120           # Una etapa relee la agenda si la instantánea es más vieja
+MARGEN_TOKEN_INICIO = 300          # El token de un candidato previo debe durar esto pasado el inicio
+MAX_CANDIDATOS_PREVIOS = 6
+# =======================================
+
+
+def _token_llega(candidato, inicio):
+    """False si se sabe que el token vence antes de inicio + MARGEN_TOKEN_INICIO"""
+    limite = inicio + MARGEN_TOKEN_INICIO
+    expiracion = expiracion_tokens.extraer_expiracion_token(candidato.url)
+    if expiracion:
+        return expiracion >= limite
+    vida = expiracion_tokens.registro_vida_tokens.vida_estimada(candidato.url)
+    if vida:
+        return candidato.obtenido + vida >= limite
+    return True
+
+
+class DescubrimientoPrevio:
+    """
+    Redescubrimiento incremental de fuentes de un partido hasta el inicio.
+    descubrir() -> lista de fuentes (nombre, url), o [] si falló (se conservan las anteriores)
+    """
+
+    def __init__(self, nombre_partido, descubrir, fuentes_iniciales=(), log=print):
+        self.nombre_partido = nombre_partido
+        self.descubrir = descubrir
+        self.log = log
+        self.fuentes = list(fuentes_iniciales)
+        self.candidatos = {}    # objetivo (embed real) → StreamCandidato auditado
+        self._escaneados = set()  # objetivos cuyo escaneo ya dio candidato (los fallidos se reintentan)
+
+    def _objetivos(self, fuentes):
+        return {smart_selector.objetivo_fuente(url): (nombre, url) for nombre, url in fuentes}
+
+    def _revalidar(self, inicio):
+        """
+        Re-audita en paralelo los candidatos previos (motor compartido, una sola
+        espera acotada); retorna los objetivos a volver a escanear
+        """
+        auditorias = {
+            objetivo: smart_selector.auditar_stream_async(candidato)
+            for objetivo, candidato in self.candidatos.items() if _token_llega(candidato, inicio)
+        }
+        try:
+            motor_auditoria.combinar(auditorias.values()).result(timeout=smart_selector.TIMEOUT_AUDITORIA_TOTAL)
+        except Exception:
+            pass
+
+        vencidos = []
+        for objetivo, candidato in list(self.candidatos.items()):
+            futuro = auditorias.get(objetivo)
+            if futuro is not None and futuro.done() and futuro.exception() is None and candidato.score > 0:
+                continue
+            del self.candidatos[objetivo]
+            vencidos.append(objetivo)
+        return vencidos
+
+    def etapa(self, etiqueta, inicio):
+        """
+        Un redescubrimiento: diferencia contra las fuentes conocidas y escaneo
+        solo de lo nuevo, lo cambiado y lo vencido. inicio: timestamp de la grabación.
+        """
+        nuevas = self.descubrir() or []
+        anteriores = self._objetivos(self.fuentes)
+        actuales = self._objetivos(nuevas) if nuevas else anteriores
+
+        agregados = [o for o in actuales if o not in anteriores]
+        quitados = [o for o in anteriores if o not in actuales]
+        for objetivo in quitados:
+            self.candidatos.pop(objetivo, None)
+            self._escaneados.discard(objetivo)
+        if nuevas:
+            self.fuentes = list(nuevas)
+
+        vencidos = [o for o in self._revalidar(inicio) if o in actuales]
+        pendientes = [o for o in actuales if o not in self._escaneados or o in vencidos]
+
+        self.log(self.nombre_partido,
+                 f"🔄 {etiqueta}: {len(actuales)} fuentes (+{len(agregados)} nuevas, -{len(quitados)} quitadas, "
+                 f"{len(vencidos)} candidatos vencidos), {len(pendientes)} a escanear")
+
+        if pendientes and len(self.candidatos) < MAX_CANDIDATOS_PREVIOS:
+            a_escanear = [actuales[o] for o in pendientes]
+            for candidato in smart_selector.iterar_mejores_streams(
+                a_escanear, max_buenos=MAX_CANDIDATOS_PREVIOS - len(self.candidatos)
+            ):
+                objetivo = smart_selector.objetivo_fuente(candidato.url_fuente or candidato.url)
+                self.candidatos[objetivo] = candidato
+                self._escaneados.add(objetivo)
+
+        self.log(self.nombre_partido, f"   ✅ {len(self.candidatos)} candidatos auditados listos")
+
+    def ejecutar_etapas(self, inicio):
+        """
+        Duerme hasta cada etapa que todavía no pasó y la ejecuta (la espera
+        final hasta el inicio queda del lado de quien llama).
+        Retorna las fuentes vigentes.
+        """
+        for minutos in sorted(ETAPAS_MINUTOS, reverse=True):
+            momento = inicio - minutos * 60
+            if momento <= time.time():
+                continue
+            time.sleep(momento - time.time())
+            try:
+                self.etapa(f"T-{minutos}", inicio)
+            except Exception as e:
+                self.log(self.nombre_partido, f"⚠️ T-{minutos}: redescubrimiento falló ({str(e)[:60]})")
+        return self.fuentes
+
+    def candidatos_listos(self, inicio=None):
+        """Candidatos previos todavía utilizables, de mayor a menor score"""
+        inicio = inicio or time.time()
+        listos = [c for c in self.candidatos.values() if c.score > 0 and _token_llega(c, inicio)]
+        return sorted(listos, key=lambda c: c.score, reverse=True)
+
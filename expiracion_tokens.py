@@ -0,0 +1,175 @@
+"""
+expiracion_tokens.py - Planificación de rotación según vida útil de tokens
+Calcula, para cada stream, cuándo hay que rotarlo:
+1. Expiración explícita en la URL (expires=, exp=, token=hash-xx-EXP-START, JWT)
+2. Vida útil aprendida por host (403 observados en streams anteriores)
+3. Intervalo fijo (ROTACION_PREVENTIVA_MINUTOS) como último recurso
+"""
+
+import re
+import time
+import json
+import base64
+import threading
+from collections import defaultdict
+from urllib.parse import urlparse, parse_qsl
+
+# ============ CONFIGURACIÓN ============
+MARGEN_ROTACION_TOKEN = 120      # Rotar 2min antes de que expire (escaneo + overlap)
+ROTACION_MINIMA_SEGUNDOS = 90    # Nunca programar una rotación a menos de 90s
+FACTOR_VIDA_APRENDIDA = 0.8      # Rotar al 80% de la vida mínima observada
+MIN_OBSERVACIONES_HOST = 2       # Observaciones necesarias para confiar en un host
+MAX_OBSERVACIONES_HOST = 20
+
+# Rango razonable para timestamps unix embebidos en tokens
+_TS_MIN_VALIDO = 1_500_000_000
+_TS_MAX_VALIDO = 4_000_000_000
+
+PARAMS_EXPIRACION = ['expires', 'expire', 'exp', 'expiry', 'e', 'validto', 'valid_to', 'deadline']
+# =======================================
+
+_RE_TIMESTAMP = re.compile(r'(?<!\d)(\d{10})(?!\d)')
+_RE_JWT = re.compile(r'eyJ[\w-]+\.(eyJ[\w-]+)\.[\w-]*')
+
+
+def _decodificar_jwt_exp(valor):
+    """Extrae el claim 'exp' de un JWT embebido en la URL"""
+    match = _RE_JWT.search(valor)
+    if not match:
+        return None
+
+    try:
+        payload = match.group(1)
+        payload += '=' * (-len(payload) % 4)
+        data = json.loads(base64.urlsafe_b64decode(payload))
+        exp = int(data.get('exp', 0))
+        return exp if _TS_MIN_VALIDO <= exp <= _TS_MAX_VALIDO else None
+    except Exception:
+        return None
+
+
+def extraer_expiracion_token(url, ahora=None):
+    """
+    Busca la expiración del token firmado en la URL.
+    Retorna: timestamp unix de expiración o None si no se puede determinar
+    """
+    if not url:
+        return None
+
+    ahora = ahora or time.time()
+
+    try:
+        query = urlparse(url).query
+    except Exception:
+        return None
+
+    params = parse_qsl(query, keep_blank_values=True)
+
+    # 1. Parámetros explícitos (expires=1765675000, hdnts=exp=1765675000~...)
+    for clave, valor in params:
+        if clave.lower() in PARAMS_EXPIRACION and valor.isdigit():
+            ts = int(valor)
+            if _TS_MIN_VALIDO <= ts <= _TS_MAX_VALIDO:
+                return ts
+
+        match = re.search(r'(?:^|[~&])exp=(\d{10})', valor)
+        if match:
+            return int(match.group(1))
+
+    # 2. JWT en cualquier parámetro
+    for _, valor in params:
+        exp = _decodificar_jwt_exp(valor)
+        if exp:
+            return exp
+
+    # 3. Timestamps embebidos (token=hash-98-1765675000-1765621000)
+    #    El mayor timestamp futuro es la expiración
+    candidatos = []
+    for _, valor in params:
+        for ts in _RE_TIMESTAMP.findall(valor):
+            ts = int(ts)
+            if _TS_MIN_VALIDO <= ts <= _TS_MAX_VALIDO:
+                candidatos.append(ts)
+
+    futuros = [ts for ts in candidatos if ts > ahora]
+    if futuros:
+        return max(futuros)
+
+    return None
+
+
+def host_de_url(url):
+    try:
+        return urlparse(url).netloc.lower()
+    except Exception:
+        return ""
+
+
+class RegistroVidaTokens:
+    """
+    Aprende cuánto duran los tokens de cada host a partir de los
+    streams que murieron con 403 (token expirado).
+    """
+
+    def __init__(self):
+        self._vidas = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def registrar_expiracion(self, url, vida_segundos):
+        """Registra que un stream de este host murió por token tras vida_segundos"""
+        host = host_de_url(url)
+        if not host or vida_segundos <= 0:
+            return
+
+        with self._lock:
+            vidas = self._vidas[host]
+            vidas.append(vida_segundos)
+            if len(vidas) > MAX_OBSERVACIONES_HOST:
+                del vidas[0]
+
+    def vida_estimada(self, url):
+        """Vida útil conservadora del token para este host, o None"""
+        host = host_de_url(url)
+
+        with self._lock:
+            vidas = list(self._vidas.get(host, []))
+
+        if len(vidas) < MIN_OBSERVACIONES_HOST:
+            return None
+
+        return min(vidas) * FACTOR_VIDA_APRENDIDA
+
+
+registro_vida_tokens = RegistroVidaTokens()
+
+
+def es_error_token(stderr_txt):
+    """Detecta en la salida de ffmpeg un rechazo por token (403/401/410)"""
+    if not stderr_txt:
+        return False
+
+    txt = stderr_txt.lower()
+    return any(p in txt for p in ['403 forbidden', '401 unauthorized', '410 gone', 'http error 403'])
+
+
+def calcular_deadline_rotacion(stream_obj, inicio, fallback_segundos, ahora=None):
+    """
+    Calcula cuándo rotar un stream.
+    Retorna: (timestamp_deadline, origen) con origen en 'token', 'host' o 'fijo'
+    """
+    ahora = ahora or time.time()
+    minimo = ahora + ROTACION_MINIMA_SEGUNDOS
+    url = getattr(stream_obj, 'url', '')
+
+    # 1. Expiración explícita en el token
+    expiracion = extraer_expiracion_token(url, ahora)
+    if expiracion:
+        return max(expiracion - MARGEN_ROTACION_TOKEN, minimo), "token"
+
+    # 2. Vida aprendida del host
+    vida = registro_vida_tokens.vida_estimada(url)
+    if vida:
+        return max(inicio + vida - MARGEN_ROTACION_TOKEN, minimo), "host"
+
+    # 3. Intervalo fijo
+    return max(inicio + fallback_segundos, minimo), "fijo"
@@ -0,0 +1,272 @@
+"""
+extractor_ytdlp.py - Camino rápido con yt-dlp antes de abrir Chrome
+- Páginas de AngulismoTV (transmision?vc=...): se decodifica el iframe elegido
+- Hosts de embed propios (streamtpcloud): extractor chico que busca el m3u8 en el HTML
+- Cualquier otro host: extractores de yt-dlp (incluido el genérico)
+Cache negativa: los hosts genéricos que yt-dlp no soporta se saltean por un
+tiempo; un embed puntual que falla se saltea solo unos minutos.
+Los resultados se reutilizan mientras su token siga vigente.
+"""
+
+import re
+import time
+import base64
+import threading
+from urllib.parse import urlparse, parse_qs, urljoin
+
+import expiracion_tokens
+import angulismo_scraper
+
+try:
+    import yt_dlp
+    from yt_dlp.extractor.common import InfoExtractor
+    from yt_dlp.utils import ExtractorError, UnsupportedError
+    from yt_dlp.networking.exceptions import TransportError
+except ImportError:
+    yt_dlp = None
+    InfoExtractor = object
+    ExtractorError = UnsupportedError = TransportError = Exception
+
+# ============ CONFIGURACIÓN ============
+USAR_YTDLP = True
+TIMEOUT_YTDLP = 10                 # socket_timeout de yt-dlp
+TTL_HOST_NO_SOPORTADO = 6 * 3600   # No reintentar yt-dlp en un host genérico sin soporte durante 6h
+TTL_EMBED_FALLIDO = 300            # No reintentar un embed que no dio m3u8 (página muerta o distinta)
+TTL_RESULTADO = 120                # Reusar una resolución (si el token no dice otra cosa)
+HOSTS_EMBED_PROPIOS = ('streamtpcloud.com',)
+HOSTS_ANGULISMO = ('angulismotv-dnh.pages.dev',)
+UA_YTDLP = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36"
+# =======================================
+
+_RE_M3U8 = re.compile(r'["\'](https?:)?(//[^"\'\s]+?\.m3u8[^"\'\s]*)["\']')
+_RE_ATOB = re.compile(r'atob\(\s*["\']([A-Za-z0-9+/=_-]{16,})["\']\s*\)')
+
+_cache_hosts = {}        # host → timestamp hasta el que no se intenta
+_cache_embeds = {}       # embed → timestamp hasta el que no se intenta
+_cache_resultados = {}   # url_web → (datos, expira)
+_lock_cache = threading.Lock()
+
+
+def _host(url):
+    return urlparse(url).netloc.lower().split(':')[0]
+
+
+def _es_host(host, dominios):
+    return any(host == d or host.endswith('.' + d) for d in dominios)
+
+
+def url_embed(url_web):
+    """
+    Para páginas de AngulismoTV devuelve el iframe de la opción elegida (&o=),
+    para el resto la misma URL
+    """
+    if not _es_host(_host(url_web), HOSTS_ANGULISMO):
+        return url_web
+
+    payload, indice = angulismo_scraper.decodificar_url_transmision(url_web)
+    if payload is None or not 0 <= indice < len(payload.opciones):
+        return url_web
+    return payload.opciones[indice].iframe
+
+
+def _buscar_m3u8(html, url_base):
+    """m3u8 literal en el HTML/JS o escondido en un atob('...')"""
+    match = _RE_M3U8.search(html)
+    if match:
+        return urljoin(url_base, (match.group(1) or 'https:') + match.group(2))
+
+    for codificado in _RE_ATOB.findall(html):
+        try:
+            texto = base64.b64decode(codificado + '=' * (-len(codificado) % 4)).decode('utf-8', 'ignore')
+        except Exception:
+            continue
+        if '.m3u8' in texto and texto.startswith(('http', '//')):
+            return urljoin(url_base, texto.strip())
+
+    return None
+
+
+if yt_dlp is not None:
+    class EmbedM3u8IE(InfoExtractor):
+        """Embeds que cargan Clappr/hls.js con el m3u8 en el HTML"""
+        IE_NAME = 'EmbedM3u8'
+        _VALID_URL = r'https?://(?:[^/]+\.)?(?:%s)/.+' % '|'.join(re.escape(h) for h in HOSTS_EMBED_PROPIOS)
+
+        def _real_extract(self, url):
+            query = parse_qs(urlparse(url).query)
+            video_id = (query.get('stream') or [urlparse(url).path.strip('/') or 'live'])[0]
+
+            webpage = self._download_webpage(url, video_id)
+            m3u8 = _buscar_m3u8(webpage, url)
+            if not m3u8:
+                raise ExtractorError('m3u8 no encontrado en el embed', expected=True)
+
+            partes = urlparse(url)
+            headers = {'Referer': url, 'Origin': f"{partes.scheme}://{partes.netloc}"}
+            return {
+                'id': video_id,
+                'title': video_id,
+                'is_live': True,
+                'http_headers': headers,
+                'formats': [{
+                    'url': m3u8,
+                    'manifest_url': m3u8,
+                    'protocol': 'm3u8_native',
+                    'ext': 'mp4',
+                    'http_headers': headers,
+                }],
+            }
+
+
+def _elegir_m3u8(info):
+    """(url, headers) del primer formato HLS de la info de yt-dlp"""
+    formatos = info.get('formats') or [info]
+    for fmt in formatos:
+        protocolo = fmt.get('protocol') or ''
+        url = fmt.get('manifest_url') or fmt.get('url') or ''
+        if protocolo.startswith('m3u8') or '.m3u8' in url:
+            return url, fmt.get('http_headers') or info.get('http_headers') or {}
+    return None, {}
+
+
+class _LoggerSilencioso:
+    """yt-dlp escribe los errores en stderr aunque esté en quiet"""
+    def debug(self, msg):
+        pass
+
+    warning = error = debug
+
+
+def _en_cadena(error, tipo):
+    """True si el error o alguna de sus causas (yt-dlp las envuelve) es del tipo dado"""
+    vistos = 0
+    while error is not None and vistos < 5:
+        if isinstance(error, tipo):
+            return True
+        error = (getattr(error, 'cause', None) or getattr(error, 'exc_info', (None, None))[1]
+                 or error.__cause__)
+        vistos += 1
+    return False
+
+
+def _es_error_red(error):
+    """Errores de red no dicen nada del soporte del host: no se cachean"""
+    return _en_cadena(error, TransportError)
+
+
+def _habilitado(cache, clave):
+    with _lock_cache:
+        hasta = cache.get(clave)
+    return hasta is None or hasta < time.time()
+
+
+def _marcar_host(host, soportado):
+    with _lock_cache:
+        if soportado:
+            _cache_hosts.pop(host, None)
+        else:
+            _cache_hosts[host] = time.time() + TTL_HOST_NO_SOPORTADO
+
+
+def _marcar_embed_fallido(embed):
+    with _lock_cache:
+        ahora = time.time()
+        for clave in [c for c, hasta in _cache_embeds.items() if hasta < ahora]:
+            del _cache_embeds[clave]
+        _cache_embeds[embed] = ahora + TTL_EMBED_FALLIDO
+
+
+def _desde_cache(url_web):
+    with _lock_cache:
+        entrada = _cache_resultados.get(url_web)
+    if entrada and entrada[1] > time.time():
+        return entrada[0]
+    return None
+
+
+def _guardar_resultado(url_web, datos):
+    expira = expiracion_tokens.extraer_expiracion_token(datos['url'])
+    if expira:
+        expira -= expiracion_tokens.MARGEN_ROTACION_TOKEN
+    else:
+        expira = time.time() + TTL_RESULTADO
+    with _lock_cache:
+        _cache_resultados[url_web] = (datos, expira)
+
+
+def _candidato(nombre, url_web, datos, inicio):
+    import smart_selector
+    candidato = smart_selector.StreamCandidato(
+        nombre, datos['url'], datos['ua'], datos['referer'], dict(datos['cookies'])
+    )
+    candidato.url_fuente = url_web
+    candidato.tiempo_escaneo = time.time() - inicio
+    # Desde cache: el token se emitió en la resolución original, no ahora
+    candidato.obtenido = datos.get('obtenido', candidato.obtenido)
+    return candidato
+
+
+def resolver(nombre, url_web):
+    """
+    Intenta resolver la fuente con yt-dlp (sin navegador).
+    Retorna un StreamCandidato SIN auditar o None (usar Chrome).
+    """
+    if not USAR_YTDLP or yt_dlp is None:
+        return None
+
+    inicio = time.time()
+    datos = _desde_cache(url_web)
+    if datos:
+        print(f"   📦 {nombre}: resolución yt-dlp en cache")
+        return _candidato(nombre, url_web, datos, inicio)
+
+    embed = url_embed(url_web)
+    host = _host(embed)
+    if not _habilitado(_cache_hosts, host) or not _habilitado(_cache_embeds, embed):
+        return None
+
+    opciones = {
+        'quiet': True,
+        'no_warnings': True,
+        'logger': _LoggerSilencioso(),
+        'skip_download': True,
+        'socket_timeout': TIMEOUT_YTDLP,
+        'extractor_retries': 0,
+        'nocheckcertificate': True,
+        'http_headers': {'User-Agent': UA_YTDLP, 'Referer': url_web},
+    }
+
+    try:
+        with yt_dlp.YoutubeDL(opciones) as ydl:
+            ie_key = None
+            if _es_host(host, HOSTS_EMBED_PROPIOS):
+                ydl.add_info_extractor(EmbedM3u8IE(ydl))
+                ie_key = 'EmbedM3u8'
+
+            info = ydl.extract_info(embed, download=False, ie_key=ie_key)
+            url, headers = _elegir_m3u8(info or {})
+            if not url:
+                raise ExtractorError('sin formato HLS', expected=True)
+
+            cookies = {c.name: c.value for c in ydl.cookiejar if _host(url).endswith(c.domain.lstrip('.'))}
+    except Exception as e:
+        if _es_error_red(e):
+            pass
+        elif _en_cadena(e, UnsupportedError) and not _es_host(host, HOSTS_EMBED_PROPIOS):
+            _marcar_host(host, False)
+        else:
+            _marcar_embed_fallido(embed)
+        print(f"   ↪️ {nombre}: yt-dlp no resolvió {host} ({str(e).replace('ERROR: ', '')[:60]}), usando Chrome")
+        return None
+
+    _marcar_host(host, True)
+    datos = {
+        'url': url,
+        'ua': headers.get('User-Agent', UA_YTDLP),
+        'referer': headers.get('Referer', embed),
+        'cookies': cookies,
+        'obtenido': time.time(),
+    }
+    _guardar_resultado(url_web, datos)
+    print(f"   ⚡ {nombre}: resuelto con yt-dlp en {time.time() - inicio:.1f}s")
+    return _candidato(nombre, url_web, datos, inicio)
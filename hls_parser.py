@@ -0,0 +1,368 @@
+"""
+hls_parser.py - Parser de playlists HLS (m3u8) compartido
+Un único recorrido por línea, sin regex por tag, devuelve objetos tipados:
+- PlaylistMaster: variantes (bandwidth, resolución, codecs), medios alternativos, claves de sesión
+- PlaylistMedia: segmentos (duración, secuencia, PDT, discontinuidad, byterange, clave)
+Las URLs relativas se resuelven contra la URL del playlist.
+Usado por smart_selector (auditoría), sync_manager (kickoff) y stream_health_monitor.
+"""
+
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urljoin
+
+# Formatos de clave asociados a DRM (no grabables con ffmpeg)
+KEYFORMATS_DRM = (
+    'com.widevine', 'edef8ba9-79d6-4ace-a3c8-27dcd51d21ed',   # Widevine
+    'com.microsoft.playready', '9a04f079-9840-4286-ab92-e65be0885f95',  # PlayReady
+    'com.apple.streamingkeydelivery',  # FairPlay
+)
+
+
+class Clave:
+    __slots__ = ('metodo', 'uri', 'iv', 'keyformat')
+
+    def __init__(self, metodo, uri=None, iv=None, keyformat=None):
+        self.metodo = metodo
+        self.uri = uri
+        self.iv = iv
+        self.keyformat = keyformat
+
+    @property
+    def es_drm(self):
+        if self.metodo.upper().startswith('SAMPLE-AES'):
+            return True
+        texto = f"{self.keyformat or ''} {self.uri or ''}".lower()
+        return any(k in texto for k in KEYFORMATS_DRM) or 'widevine' in texto or 'playready' in texto
+
+    def __repr__(self):
+        return f"<Clave {self.metodo}>"
+
+
+class Variante:
+    __slots__ = ('url', 'bandwidth', 'average_bandwidth', 'resolucion', 'codecs', 'frame_rate', 'audio')
+
+    def __init__(self, url, bandwidth=0, average_bandwidth=None, resolucion=None,
+                 codecs=None, frame_rate=None, audio=None):
+        self.url = url
+        self.bandwidth = bandwidth
+        self.average_bandwidth = average_bandwidth
+        self.resolucion = resolucion      # (ancho, alto) o None
+        self.codecs = codecs
+        self.frame_rate = frame_rate
+        self.audio = audio
+
+    @property
+    def altura(self):
+        return self.resolucion[1] if self.resolucion else 0
+
+    @property
+    def mbps(self):
+        return (self.average_bandwidth or self.bandwidth) / 1_000_000
+
+    def __repr__(self):
+        return f"<Variante {self.altura}p {self.mbps:.1f}Mbps>"
+
+
+class Segmento:
+    __slots__ = ('url', 'duracion', 'secuencia', 'pdt', 'discontinuidad', 'byterange', 'clave', 'titulo')
+
+    def __init__(self, url, duracion, secuencia, pdt=None, discontinuidad=False,
+                 byterange=None, clave=None, titulo=None):
+        self.url = url
+        self.duracion = duracion
+        self.secuencia = secuencia
+        self.pdt = pdt                      # datetime con tz o None
+        self.discontinuidad = discontinuidad
+        self.byterange = byterange          # (longitud, offset) o None
+        self.clave = clave
+        self.titulo = titulo
+
+    @property
+    def fin(self):
+        """Instante (PDT) en que termina el segmento"""
+        if self.pdt is None:
+            return None
+        return self.pdt + timedelta(seconds=self.duracion)
+
+    def __repr__(self):
+        return f"<Segmento #{self.secuencia} {self.duracion:.1f}s>"
+
+
+class PlaylistMaster:
+    es_master = True
+
+    def __init__(self, url):
+        self.url = url
+        self.variantes = []
+        self.medios = []           # EXT-X-MEDIA (dict de atributos)
+        self.claves = []           # EXT-X-SESSION-KEY
+        self.version = None
+
+    @property
+    def tiene_drm(self):
+        return any(c.es_drm for c in self.claves)
+
+    def variantes_ordenadas(self):
+        """De mayor a menor bandwidth"""
+        return sorted(self.variantes, key=lambda v: v.bandwidth, reverse=True)
+
+
+class PlaylistMedia:
+    es_master = False
+
+    def __init__(self, url):
+        self.url = url
+        self.segmentos = []
+        self.claves = []
+        self.target_duration = None
+        self.media_sequence = 0
+        self.discontinuity_sequence = 0
+        self.version = None
+        self.finalizado = False    # EXT-X-ENDLIST (VOD / evento terminado)
+
+    @property
+    def tiene_drm(self):
+        return any(c.es_drm for c in self.claves)
+
+    @property
+    def ultimo_segmento(self):
+        return self.segmentos[-1] if self.segmentos else None
+
+    @property
+    def ultima_secuencia(self):
+        seg = self.ultimo_segmento
+        return seg.secuencia if seg else None
+
+    @property
+    def borde_vivo(self):
+        """PDT del final del último segmento (live edge) o None"""
+        seg = self.ultimo_segmento
+        return seg.fin if seg else None
+
+    @property
+    def duracion_ventana(self):
+        return sum(s.duracion for s in self.segmentos)
+
+    def segmentos_recientes(self, cantidad):
+        return self.segmentos[-cantidad:] if cantidad else []
+
+
+# ============ PARSEO ============
+
+def parsear_atributos(texto):
+    """
+    KEY=VALUE,KEY="valor, con comas" → dict
+    Recorrido manual (más rápido que regex para listas cortas)
+    """
+    atributos = {}
+    i = 0
+    n = len(texto)
+
+    while i < n:
+        igual = texto.find('=', i)
+        if igual < 0:
+            break
+        clave = texto[i:igual].strip()
+
+        if igual + 1 < n and texto[igual + 1] == '"':
+            fin = texto.find('"', igual + 2)
+            if fin < 0:
+                fin = n
+            valor = texto[igual + 2:fin]
+            coma = texto.find(',', fin)
+        else:
+            coma = texto.find(',', igual + 1)
+            valor = texto[igual + 1:coma if coma >= 0 else n]
+
+        atributos[clave] = valor
+        if coma < 0:
+            break
+        i = coma + 1
+
+    return atributos
+
+
+def parsear_pdt(valor):
+    try:
+        pdt = datetime.fromisoformat(valor.strip().replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            from dateutil import parser
+            pdt = parser.parse(valor.strip())
+        except Exception:
+            return None
+
+    if pdt.tzinfo is None:
+        pdt = pdt.replace(tzinfo=timezone.utc)
+    return pdt
+
+
+def _a_int(valor, defecto=0):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return defecto
+
+
+def _a_float(valor, defecto=None):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return defecto
+
+
+def _parsear_resolucion(valor):
+    if not valor or 'x' not in valor:
+        return None
+    ancho, _, alto = valor.lower().partition('x')
+    try:
+        return int(ancho), int(alto)
+    except ValueError:
+        return None
+
+
+def es_playlist(texto):
+    return bool(texto) and texto.lstrip('\ufeff \r\n\t').startswith('#EXTM3U')
+
+
+def parsear_playlist(texto, url_base=""):
+    """
+    Parsea un m3u8 y devuelve PlaylistMaster o PlaylistMedia.
+    Retorna None si el texto no es un playlist.
+    """
+    if not es_playlist(texto):
+        return None
+
+    if '#EXT-X-STREAM-INF' in texto:
+        return _parsear_master(texto, url_base)
+    return _parsear_media(texto, url_base)
+
+
+def _parsear_master(texto, url_base):
+    playlist = PlaylistMaster(url_base)
+    pendiente = None
+
+    for linea in texto.splitlines():
+        linea = linea.strip()
+        if not linea:
+            continue
+
+        if linea[0] != '#':
+            if pendiente is not None:
+                pendiente.url = urljoin(url_base, linea)
+                playlist.variantes.append(pendiente)
+                pendiente = None
+            continue
+
+        tag, _, valor = linea.partition(':')
+
+        if tag == '#EXT-X-STREAM-INF':
+            attrs = parsear_atributos(valor)
+            pendiente = Variante(
+                url=None,
+                bandwidth=_a_int(attrs.get('BANDWIDTH')),
+                average_bandwidth=_a_int(attrs.get('AVERAGE-BANDWIDTH'), None),
+                resolucion=_parsear_resolucion(attrs.get('RESOLUTION')),
+                codecs=attrs.get('CODECS'),
+                frame_rate=_a_float(attrs.get('FRAME-RATE')),
+                audio=attrs.get('AUDIO'),
+            )
+        elif tag == '#EXT-X-MEDIA':
+            attrs = parsear_atributos(valor)
+            if 'URI' in attrs:
+                attrs['URI'] = urljoin(url_base, attrs['URI'])
+            playlist.medios.append(attrs)
+        elif tag == '#EXT-X-SESSION-KEY':
+            playlist.claves.append(_parsear_clave(valor, url_base))
+        elif tag == '#EXT-X-VERSION':
+            playlist.version = _a_int(valor, None)
+
+    return playlist
+
+
+def _parsear_clave(valor, url_base):
+    attrs = parsear_atributos(valor)
+    uri = attrs.get('URI')
+    return Clave(
+        metodo=attrs.get('METHOD', 'NONE'),
+        uri=urljoin(url_base, uri) if uri else None,
+        iv=attrs.get('IV'),
+        keyformat=attrs.get('KEYFORMAT'),
+    )
+
+
+def _parsear_media(texto, url_base):
+    playlist = PlaylistMedia(url_base)
+
+    secuencia = None
+    duracion = None
+    titulo = None
+    pdt = None
+    discontinuidad = False
+    byterange = None
+    clave = None
+    fin_byterange = {}    # Offset implícito por URI para EXT-X-BYTERANGE sin @offset
+
+    for linea in texto.splitlines():
+        linea = linea.strip()
+        if not linea:
+            continue
+
+        if linea[0] != '#':
+            if secuencia is None:
+                secuencia = playlist.media_sequence
+
+            url = urljoin(url_base, linea)
+            dur = duracion if duracion is not None else (playlist.target_duration or 0.0)
+
+            if byterange is not None:
+                longitud, offset = byterange
+                if offset is None:
+                    offset = fin_byterange.get(url, 0)
+                byterange = (longitud, offset)
+                fin_byterange[url] = offset + longitud
+
+            # Sin PDT propio: continuar desde el segmento anterior
+            if pdt is None and playlist.segmentos and not discontinuidad:
+                pdt = playlist.segmentos[-1].fin
+
+            playlist.segmentos.append(Segmento(
+                url, dur, secuencia, pdt, discontinuidad, byterange, clave, titulo
+            ))
+
+            secuencia += 1
+            duracion = titulo = pdt = byterange = None
+            discontinuidad = False
+            continue
+
+        tag, _, valor = linea.partition(':')
+
+        if tag == '#EXTINF':
+            dur_txt, _, titulo = valor.partition(',')
+            duracion = _a_float(dur_txt, 0.0)
+            titulo = titulo or None
+        elif tag == '#EXT-X-PROGRAM-DATE-TIME':
+            pdt = parsear_pdt(valor)
+        elif tag == '#EXT-X-DISCONTINUITY':
+            discontinuidad = True
+        elif tag == '#EXT-X-BYTERANGE':
+            longitud, _, offset = valor.partition('@')
+            byterange = (_a_int(longitud), _a_int(offset) if offset else None)
+        elif tag == '#EXT-X-KEY':
+            clave = _parsear_clave(valor, url_base)
+            if clave.metodo.upper() == 'NONE':
+                clave = None
+            else:
+                playlist.claves.append(clave)
+        elif tag == '#EXT-X-TARGETDURATION':
+            playlist.target_duration = _a_float(valor)
+        elif tag == '#EXT-X-MEDIA-SEQUENCE':
+            playlist.media_sequence = _a_int(valor)
+        elif tag == '#EXT-X-DISCONTINUITY-SEQUENCE':
+            playlist.discontinuity_sequence = _a_int(valor)
+        elif tag == '#EXT-X-VERSION':
+            playlist.version = _a_int(valor, None)
+        elif tag == '#EXT-X-ENDLIST':
+            playlist.finalizado = True
+
+    return playlist
@@ -0,0 +1,147 @@
+"""
+latencia_borde.py - Seguimiento de latencia respecto del borde vivo (live edge)
+Cada lectura de un playlist de media es una muestra:
+- Delay real = ahora - (PDT del último segmento + su duración)
+- Cadencia de refresco = segundos entre apariciones de segmentos nuevos
+- Deriva de target duration = duración media de segmento / EXT-X-TARGETDURATION
+Las muestras se acumulan durante la auditoría y la grabación, así el delay
+usado para puntuar y planificar el inicio se mantiene actualizado.
+"""
+
+import time
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from statistics import median
+
+# ============ CONFIGURACIÓN ============
+MAX_MUESTRAS = 20                 # Ventana de muestras por stream
+SEGMENTOS_DETRAS_BORDE = 3        # Sin PDT: un reproductor arranca ~3 segmentos detrás
+DELAY_MAXIMO_VALIDO = 600         # Diferencias mayores = reloj del encoder roto
+# =======================================
+
+
+class MuestraLatencia:
+    __slots__ = ('instante', 'delay_borde', 'secuencia', 'duracion_media', 'target')
+
+    def __init__(self, instante, delay_borde, secuencia, duracion_media, target):
+        self.instante = instante          # time.time() de la lectura
+        self.delay_borde = delay_borde    # Segundos detrás del borde vivo (None sin PDT)
+        self.secuencia = secuencia        # Media sequence del último segmento
+        self.duracion_media = duracion_media
+        self.target = target
+
+
+class SeguidorLatencia:
+    """Acumula muestras de un playlist de media (thread-safe)"""
+
+    def __init__(self, max_muestras=MAX_MUESTRAS):
+        self._muestras = deque(maxlen=max_muestras)
+        self._lock = threading.Lock()
+
+    def registrar(self, playlist, ahora=None):
+        """Agrega una muestra a partir de un PlaylistMedia recién leído"""
+        if playlist is None or playlist.es_master or not playlist.segmentos:
+            return None
+
+        ahora = ahora or time.time()
+        delay = None
+        borde = playlist.borde_vivo
+        if borde is not None:
+            delay = (datetime.fromtimestamp(ahora, timezone.utc) - borde).total_seconds()
+            if abs(delay) > DELAY_MAXIMO_VALIDO:
+                delay = None
+            else:
+                delay = max(0.0, delay)
+
+        muestra = MuestraLatencia(
+            ahora,
+            delay,
+            playlist.ultima_secuencia,
+            playlist.duracion_ventana / len(playlist.segmentos),
+            playlist.target_duration,
+        )
+
+        with self._lock:
+            self._muestras.append(muestra)
+        return muestra
+
+    def _copia(self):
+        with self._lock:
+            return list(self._muestras)
+
+    @property
+    def cantidad(self):
+        return len(self._copia())
+
+    @property
+    def delay_medido(self):
+        """Mediana del delay respecto del borde vivo (solo con PDT) o None"""
+        delays = [m.delay_borde for m in self._copia() if m.delay_borde is not None]
+        return median(delays) if delays else None
+
+    @property
+    def duracion_segmento(self):
+        """
+        Duración media de segmento según los EXTINF (sin redondear: TARGETDURATION
+        es un entero >= cada EXTINF y sobreestima segmentos de 5.005s o 3.2s)
+        """
+        duraciones = [m.duracion_media for m in self._copia() if m.duracion_media]
+        return sum(duraciones) / len(duraciones) if duraciones else None
+
+    @property
+    def delay(self):
+        """Delay medido o, sin PDT, estimado como SEGMENTOS_DETRAS_BORDE segmentos"""
+        medido = self.delay_medido
+        if medido is not None:
+            return medido
+
+        duracion = self.duracion_segmento
+        if duracion is None:
+            return None
+        return SEGMENTOS_DETRAS_BORDE * duracion
+
+    @property
+    def cadencia(self):
+        """Segundos por segmento nuevo observado entre lecturas (None si no avanzó)"""
+        muestras = self._copia()
+        if len(muestras) < 2:
+            return None
+
+        primera, ultima = muestras[0], muestras[-1]
+        if primera.secuencia is None or ultima.secuencia is None:
+            return None
+
+        nuevos = ultima.secuencia - primera.secuencia
+        if nuevos <= 0:
+            return None
+        return (ultima.instante - primera.instante) / nuevos
+
+    @property
+    def deriva_target(self):
+        """Duración media de segmento / target duration (1.0 = según lo anunciado)"""
+        muestras = [m for m in self._copia() if m.target]
+        if not muestras:
+            return None
+        return median(m.duracion_media / m.target for m in muestras)
+
+    @property
+    def deriva_cadencia(self):
+        """Cadencia observada / duración de segmento (>1 = el origen produce más lento que tiempo real)"""
+        cadencia = self.cadencia
+        duracion = self.duracion_segmento
+        if cadencia is None or duracion is None:
+            return None
+        return cadencia / max(duracion, 0.001)
+
+    def resumen(self):
+        partes = []
+        delay = self.delay
+        if delay is not None:
+            partes.append(f"delay {delay:.1f}s" + ("" if self.delay_medido is not None else " (estimado)"))
+        if self.deriva_cadencia is not None:
+            partes.append(f"cadencia x{self.deriva_cadencia:.2f}")
+        if self.deriva_target is not None:
+            partes.append(f"target x{self.deriva_target:.2f}")
+        partes.append(f"{self.cantidad} muestras")
+        return ", ".join(partes)
@@ -0,0 +1,250 @@
+"""
+motor_auditoria.py - Cliente HTTP compartido para auditar streams en paralelo
+- Una sola Session con pool de conexiones keep-alive (reutiliza TCP/TLS, ver precalentamiento)
+- Límite de conexiones simultáneas por host (no saturar un CDN)
+- Reintentos con backoff + jitter programados, sin dormir hilos
+- API basada en Futures para encadenar pasos (master → variante → segmentos)
+"""
+
+import heapq
+import random
+import threading
+import time
+import warnings
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+warnings.filterwarnings("ignore", message="Unverified HTTPS request")
+
+# ============ CONFIGURACIÓN ============
+MAX_HILOS_AUDITORIA = 16         # Requests HTTP simultáneos en total
+MAX_CONEXIONES_POR_HOST = 4      # Requests simultáneos contra un mismo host
+POOL_HOSTS = 32                  # Hosts distintos con conexiones keep-alive
+BACKOFF_BASE = 0.5               # Primer reintento ~0.5s
+BACKOFF_MAX = 4.0
+# =======================================
+
+
+class _Planificador:
+    """Ejecuta callbacks diferidos desde un único hilo (reemplaza time.sleep)"""
+
+    def __init__(self):
+        self._heap = []
+        self._contador = 0
+        self._cond = threading.Condition()
+        self._hilo = threading.Thread(target=self._loop, name="auditoria-planificador", daemon=True)
+        self._hilo.start()
+
+    def programar(self, retraso, funcion):
+        with self._cond:
+            self._contador += 1
+            heapq.heappush(self._heap, (time.monotonic() + retraso, self._contador, funcion))
+            self._cond.notify()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+
+                momento, _, funcion = self._heap[0]
+                espera = momento - time.monotonic()
+                if espera > 0:
+                    self._cond.wait(espera)
+                    continue
+
+                heapq.heappop(self._heap)
+
+            try:
+                funcion()
+            except Exception:
+                pass
+
+
+def calcular_backoff(intento):
+    """Backoff exponencial con jitter completo"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** intento)))
+
+
+class MotorAuditoria:
+    """
+    Ejecuta GETs concurrentes sobre una Session compartida.
+    Cada get() devuelve un Future con la Response final (o la excepción).
+    """
+
+    def __init__(self, max_hilos=MAX_HILOS_AUDITORIA, max_por_host=MAX_CONEXIONES_POR_HOST):
+        self.max_por_host = max_por_host
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=max_hilos, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.verify = False
+        # Las cookies de cada candidato van por request: no mezclarlas en el jar compartido
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        self._executor = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix="auditoria")
+        self._planificador = _Planificador()
+
+        self._lock = threading.Lock()
+        self._en_vuelo = defaultdict(int)
+        self._pendientes = defaultdict(deque)
+
+    # ---------- Límite por host ----------
+
+    def _encolar(self, host, tarea):
+        """Ejecuta la tarea si el host tiene cupo, si no la deja en espera"""
+        with self._lock:
+            if self._en_vuelo[host] >= self.max_por_host:
+                self._pendientes[host].append(tarea)
+                return
+            self._en_vuelo[host] += 1
+
+        self._executor.submit(tarea)
+
+    def _liberar(self, host):
+        with self._lock:
+            if self._pendientes[host]:
+                siguiente = self._pendientes[host].popleft()
+            else:
+                self._en_vuelo[host] -= 1
+                return
+
+        self._executor.submit(siguiente)
+
+    # ---------- API ----------
+
+    def programar(self, retraso, funcion):
+        """Programa funcion() dentro de retraso segundos sin bloquear hilos"""
+        self._planificador.programar(retraso, funcion)
+
+    def get(self, url, headers=None, cookies=None, timeout=10, intentos=1, validar=None, stream=False):
+        """
+        GET asíncrono con reintentos.
+        validar(resp) -> bool decide si la respuesta es aceptable; si no, se reintenta.
+        """
+        return self.pedir('GET', url, headers, cookies, timeout, intentos, validar, stream)
+
+    def head(self, url, headers=None, timeout=5):
+        """HEAD asíncrono sin reintentos (abre/renueva la conexión keep-alive del host)"""
+        return self.pedir('HEAD', url, headers, timeout=timeout, redirecciones=False)
+
+    def pedir(self, metodo, url, headers=None, cookies=None, timeout=10, intentos=1, validar=None,
+              stream=False, redirecciones=True):
+        futuro = Future()
+        host = urlparse(url).netloc
+
+        def _intentar(intento):
+            if futuro.cancelled():
+                self._liberar(host)
+                return
+
+            resp, error = None, None
+            inicio = time.monotonic()
+            try:
+                resp = self.session.request(
+                    metodo,
+                    url,
+                    headers=headers,
+                    cookies=cookies,
+                    timeout=timeout,
+                    allow_redirects=redirecciones,
+                    stream=stream
+                )
+                # resp.elapsed = hasta headers (TTFB); duracion_total incluye el cuerpo
+                resp.duracion_total = time.monotonic() - inicio
+            except Exception as e:
+                error = e
+            finally:
+                self._liberar(host)
+
+            if error is None and (validar is None or validar(resp)):
+                resolver(futuro, resp)
+                return
+
+            if intento + 1 < intentos:
+                self.programar(
+                    calcular_backoff(intento),
+                    lambda: self._encolar(host, lambda: _intentar(intento + 1))
+                )
+            else:
+                resolver(futuro, resp, error)
+
+        self._encolar(host, lambda: _intentar(0))
+        return futuro
+
+
+_motor = None
+_lock_motor = threading.Lock()
+
+
+def obtener_motor():
+    """Motor compartido por todo el proceso"""
+    global _motor
+    with _lock_motor:
+        if _motor is None:
+            _motor = MotorAuditoria()
+        return _motor
+
+
+def resolver(futuro, resultado=None, error=None):
+    """Completa un Future ignorando los que ya fueron cancelados"""
+    if futuro.done():
+        return
+    try:
+        if error is not None:
+            futuro.set_exception(error)
+        else:
+            futuro.set_result(resultado)
+    except Exception:
+        pass
+
+
+def encadenar(origen, destino):
+    """Propaga el resultado de un Future a otro"""
+    def _copiar(f):
+        try:
+            resolver(destino, f.result())
+        except Exception as e:
+            resolver(destino, error=e)
+
+    origen.add_done_callback(_copiar)
+
+
+def combinar(futuros):
+    """
+    Future que se completa cuando terminan todos los futuros dados.
+    Resultado: lista de (resultado, error) en el mismo orden.
+    """
+    combinado = Future()
+    futuros = list(futuros)
+    resultados = [None] * len(futuros)
+    restantes = [len(futuros)]
+    lock = threading.Lock()
+
+    if not futuros:
+        resolver(combinado, [])
+        return combinado
+
+    def _registrar(indice, f):
+        try:
+            resultados[indice] = (f.result(), None)
+        except Exception as e:
+            resultados[indice] = (None, e)
+
+        with lock:
+            restantes[0] -= 1
+            listo = restantes[0] == 0
+
+        if listo:
+            resolver(combinado, resultados)
+
+    for i, f in enumerate(futuros):
+        f.add_done_callback(lambda f, i=i: _registrar(i, f))
+
+    return combinado
@@ -0,0 +1,225 @@
+"""
+nombres_equipos.py - Normalización y comparación de nombres de equipos
+- Plegado de acentos y puntuación ("Atlético" = "atletico")
+- Alias comunes ("PSG" = "Paris Saint-Germain") y nombres cortos aprendidos
+  de Promiedos/SofaScore
+- Similitud por conjunto de tokens (estilo token_set_ratio)
+"""
+
+import re
+import threading
+import unicodedata
+from difflib import SequenceMatcher
+
+# ============ CONFIGURACIÓN ============
+UMBRAL_EQUIPO = 0.88    # Similitud mínima de cada equipo
+UMBRAL_PARTIDO = 0.9    # Similitud media de los dos equipos
+SIMILITUD_SUBCONJUNTO = 0.9  # Nombre corto contenido en el largo ("Barracas" ⊂ "Barracas Central"),
+                             # aceptado solo si el otro equipo del partido coincide
+LARGO_MINIMO_ALIAS = 4       # Códigos de 3 letras ("CEN", "RIV") se repiten entre clubes
+
+# Tokens que no distinguen equipos
+TOKENS_GENERICOS = {
+    'fc', 'cf', 'club', 'ca', 'cd', 'sc', 'ac', 'afc', 'cfc', 'ssc', 'as', 'rc',
+    'de', 'del', 'la', 'el', 'los', 'y', 'and', 'the',
+}
+
+# Prefijos de nombre oficial que se descartan ("Club Atlético Boca Juniors")
+PREFIJOS_GENERICOS = ('club atletico ', 'club social y deportivo ', 'club deportivo ', 'club ')
+
+# alias normalizado → nombre canónico normalizado
+ALIAS_EQUIPOS = {
+    # Europa
+    'psg': 'paris saint germain',
+    'paris sg': 'paris saint germain',
+    'man city': 'manchester city',
+    'man utd': 'manchester united',
+    'man united': 'manchester united',
+    'spurs': 'tottenham hotspur',
+    'tottenham': 'tottenham hotspur',
+    'wolves': 'wolverhampton',
+    'wolverhampton wanderers': 'wolverhampton',
+    'nottm forest': 'nottingham forest',
+    'newcastle utd': 'newcastle united',
+    'newcastle': 'newcastle united',
+    'brighton hove albion': 'brighton',
+    'west ham united': 'west ham',
+    'barca': 'barcelona',
+    'fc barcelona': 'barcelona',
+    'atl madrid': 'atletico madrid',
+    'atletico de madrid': 'atletico madrid',
+    'atleti': 'atletico madrid',
+    'real madrid cf': 'real madrid',
+    'athletic bilbao': 'athletic club',
+    'betis': 'real betis',
+    'bayern': 'bayern munich',
+    'bayern munchen': 'bayern munich',
+    'bvb': 'borussia dortmund',
+    'dortmund': 'borussia dortmund',
+    'leverkusen': 'bayer leverkusen',
+    'inter': 'inter milan',
+    'internazionale': 'inter milan',
+    'milan': 'ac milan',
+    'juve': 'juventus',
+    # Argentina
+    'boca': 'boca juniors',
+    'river': 'river plate',
+    'racing': 'racing club',
+    'velez': 'velez sarsfield',
+    'argentinos': 'argentinos juniors',
+    'newells': 'newells old boys',
+    'newell s old boys': 'newells old boys',
+    'estudiantes lp': 'estudiantes la plata',
+    'estudiantes de la plata': 'estudiantes la plata',
+    'gimnasia lp': 'gimnasia la plata',
+    'gimnasia y esgrima la plata': 'gimnasia la plata',
+    'gimnasia y esgrima lp': 'gimnasia la plata',
+    'def y just': 'defensa y justicia',
+    'defensa': 'defensa y justicia',
+    'atl tucuman': 'atletico tucuman',
+    'talleres': 'talleres cordoba',
+    'talleres de cordoba': 'talleres cordoba',
+    'union': 'union santa fe',
+    'union de santa fe': 'union santa fe',
+    'ind rivadavia': 'independiente rivadavia',
+    'riestra': 'deportivo riestra',
+    'central cordoba sde': 'central cordoba',
+    'central cordoba se': 'central cordoba',
+}
+# =======================================
+
+_alias_aprendidos = {}
+_alias_ambiguos = set()  # Aprendidos para dos equipos distintos: no se usan
+_lock_alias = threading.Lock()
+
+
+def normalizar_nombre(texto):
+    """minúsculas, sin acentos ni puntuación, espacios simples"""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    texto = texto.replace("'", '')  # Newell's → newells
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', texto).split())
+
+
+def _buscar_alias(normalizado):
+    with _lock_alias:
+        aprendido = _alias_aprendidos.get(normalizado)
+    return aprendido or ALIAS_EQUIPOS.get(normalizado)
+
+
+def nombre_canonico(nombre):
+    """Forma normalizada con alias resueltos (clave exacta del índice)"""
+    normalizado = normalizar_nombre(nombre)
+    canonico = _buscar_alias(normalizado)
+    if canonico:
+        return canonico
+
+    for prefijo in PREFIJOS_GENERICOS:
+        if normalizado.startswith(prefijo) and len(normalizado) > len(prefijo):
+            normalizado = normalizado[len(prefijo):]
+            break
+
+    # Con o sin tokens genéricos ("FC Barcelona" → "barcelona")
+    sin_genericos = ' '.join(t for t in normalizado.split() if t not in TOKENS_GENERICOS)
+    return _buscar_alias(normalizado) or _buscar_alias(sin_genericos) or normalizado
+
+
+def registrar_alias(*nombres):
+    """
+    Nombres del mismo equipo (p.ej. name / short_name de Promiedos o SofaScore):
+    todos pasan a resolver al canónico del primero. Los nombres muy cortos no
+    se aprenden y un alias que aparece para dos equipos distintos se descarta.
+    """
+    nombres = [n for n in nombres if n]
+    if len(nombres) < 2:
+        return
+    canonico = nombre_canonico(nombres[0])
+    with _lock_alias:
+        for nombre in nombres:
+            normalizado = normalizar_nombre(nombre)
+            if (len(normalizado) < LARGO_MINIMO_ALIAS or normalizado == canonico
+                    or normalizado in ALIAS_EQUIPOS or normalizado in _alias_ambiguos):
+                continue
+            anterior = _alias_aprendidos.get(normalizado)
+            if anterior and anterior != canonico:
+                del _alias_aprendidos[normalizado]
+                _alias_ambiguos.add(normalizado)
+            else:
+                _alias_aprendidos[normalizado] = canonico
+
+
+def registrar_alias_de_equipos(equipos):
+    """
+    Dicts de equipo de Promiedos (name/short_name) o SofaScore (name/shortName).
+    nameCode ("RIV") no se registra: el mismo código lo usan clubes distintos.
+    """
+    for equipo in equipos or []:
+        if isinstance(equipo, dict):
+            registrar_alias(equipo.get('name'), equipo.get('short_name'), equipo.get('shortName'))
+
+
+def tokens_equipo(nombre):
+    """Tokens significativos del nombre canónico"""
+    tokens = set(nombre_canonico(nombre).split())
+    return (tokens - TOKENS_GENERICOS) or tokens
+
+
+def similitud(a, b):
+    """
+    Similitud 0..1 por conjunto de tokens: intersección ordenada contra
+    intersección + resto de cada lado (tolera orden distinto y palabras de más,
+    sin dar 1.0 a un subconjunto: "Milan" no es "Inter Milan")
+    """
+    ca, cb = nombre_canonico(a), nombre_canonico(b)
+    if ca == cb:
+        return 1.0
+
+    ta, tb = tokens_equipo(a), tokens_equipo(b)
+    comunes = ' '.join(sorted(ta & tb))
+    resto_a = ' '.join(sorted(ta - tb))
+    resto_b = ' '.join(sorted(tb - ta))
+    t1 = f"{comunes} {resto_a}".strip()
+    t2 = f"{comunes} {resto_b}".strip()
+
+    ratio = SequenceMatcher(None, t1, t2).ratio()
+    if not comunes:
+        return ratio
+    subconjunto = (SequenceMatcher(None, comunes, t1).ratio() + SequenceMatcher(None, comunes, t2).ratio()) / 2
+    return max(ratio, subconjunto)
+
+
+def _palabras(nombre):
+    palabras = [t for t in nombre_canonico(nombre).split() if t not in TOKENS_GENERICOS]
+    return palabras or nombre_canonico(nombre).split()
+
+def es_subconjunto(a, b):
+    """
+    Todas las palabras de un nombre están al comienzo del otro
+    ("Godoy Cruz" / "Godoy Cruz Antonio Tomba"). Solo como prefijo: "Milan"
+    está contenido en "Inter Milan" pero es otro club.
+    """
+    pa, pb = _palabras(a), _palabras(b)
+    corto, largo = sorted((pa, pb), key=len)
+    return bool(corto) and largo[:len(corto)] == corto
+
+def similitud_partido(equipos_a, equipos_b):
+    """
+    Mejor emparejamiento local/visitante entre dos partidos.
+    Un equipo cuyo nombre está contenido en el otro vale SIMILITUD_SUBCONJUNTO
+    si el rival sí alcanza UMBRAL_EQUIPO por sí solo.
+    Retorna la media o 0 si algún equipo no alcanza UMBRAL_EQUIPO o la media
+    no llega a UMBRAL_PARTIDO.
+    """
+    if len(equipos_a) < 2 or len(equipos_b) < 2:
+        return 0.0
+
+    mejor = 0.0
+    for x, y in ((equipos_b[0], equipos_b[1]), (equipos_b[1], equipos_b[0])):
+        s1, s2 = similitud(equipos_a[0], x), similitud(equipos_a[1], y)
+        if s1 < UMBRAL_EQUIPO <= s2 and es_subconjunto(equipos_a[0], x):
+            s1 = max(s1, SIMILITUD_SUBCONJUNTO)
+        elif s2 < UMBRAL_EQUIPO <= s1 and es_subconjunto(equipos_a[1], y):
+            s2 = max(s2, SIMILITUD_SUBCONJUNTO)
+        if min(s1, s2) >= UMBRAL_EQUIPO:
+            mejor = max(mejor, (s1 + s2) / 2)
+    return mejor if mejor >= UMBRAL_PARTIDO else 0.0
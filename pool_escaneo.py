@@ -0,0 +1,356 @@
+"""
+pool_escaneo.py - Pool de procesos para los escaneos con navegador
+Chrome + selenium-wire corren en procesos worker separados del proceso que
+supervisa las grabaciones:
+- Cantidad de workers según la carga de la máquina (carga_host), compartidos por todos los partidos
+- Timeout por trabajo: un driver colgado se mata con todo su árbol de procesos
+- Límite de memoria: workers que crecen de más se reciclan (o se matan si se disparan)
+- Resultados vuelven por una cola y se entregan como Futures
+"""
+
+import os
+import time
+import queue
+import atexit
+import signal
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, TimeoutError as TimeoutFuturo
+
+import motor_auditoria
+import carga_host
+
+# ============ CONFIGURACIÓN ============
+TAMAÑO_POOL_ESCANEO = None         # Navegadores simultáneos (None = adaptativo según carga_host)
+TIMEOUT_TRABAJO_ESCANEO = 150      # Segundos máximos por escaneo antes de matar el worker
+MEMORIA_RECICLAR_MB = 1500         # RSS (worker + Chrome) para reciclar al terminar un trabajo
+MEMORIA_LIMITE_DURO_MB = 3000      # RSS para matar el worker en medio de un trabajo
+MAX_TRABAJOS_POR_WORKER = 20       # Reciclar igual cada N escaneos (fugas lentas)
+INTERVALO_CONTROL_MEMORIA = 5
+# =======================================
+
+_PAGINA_KB = os.sysconf('SC_PAGE_SIZE') // 1024 if hasattr(os, 'sysconf') else 4
+
+
+def rss_arbol_mb(pid):
+    """RSS del proceso y todos sus descendientes (Chrome, chromedriver) vía /proc"""
+    hijos = {}
+    try:
+        for entrada in os.listdir('/proc'):
+            if not entrada.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entrada}/stat') as f:
+                    # El nombre va entre paréntesis y puede tener espacios
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+                hijos.setdefault(ppid, []).append(int(entrada))
+            except Exception:
+                continue
+    except Exception:
+        return 0.0
+
+    total_kb = 0
+    pendientes = [pid]
+    while pendientes:
+        actual = pendientes.pop()
+        try:
+            with open(f'/proc/{actual}/statm') as f:
+                total_kb += int(f.read().split()[1]) * _PAGINA_KB
+        except Exception:
+            pass
+        pendientes.extend(hijos.get(actual, []))
+
+    return total_kb / 1024
+
+
+def serializar_candidato(candidato):
+    if candidato is None:
+        return None
+    return {
+        'fuente': candidato.fuente,
+        'url': candidato.url,
+        'ua': candidato.ua,
+        'referer': candidato.referer,
+        'cookies': candidato.cookies,
+        'url_fuente': candidato.url_fuente,
+        'tiempo_escaneo': candidato.tiempo_escaneo,
+    }
+
+
+def reconstruir_candidato(datos):
+    if not datos:
+        return None
+    import smart_selector
+    candidato = smart_selector.StreamCandidato(
+        datos['fuente'], datos['url'], datos['ua'], datos['referer'], datos['cookies']
+    )
+    candidato.url_fuente = datos['url_fuente']
+    candidato.tiempo_escaneo = datos['tiempo_escaneo']
+    return candidato
+
+
+def _loop_worker(id_worker, tareas, resultados):
+    """Proceso worker: escanea lo que llega por su cola hasta recibir None"""
+    try:
+        os.setpgrp()  # Grupo propio: matar el worker mata también a Chrome
+    except Exception:
+        pass
+
+    import smart_selector
+
+    while True:
+        tarea = tareas.get()
+        if tarea is None:
+            break
+
+        id_tarea, nombre, url = tarea
+        try:
+            candidato = smart_selector.extraer_candidato(nombre, url)
+        except Exception:
+            candidato = None
+
+        resultados.put((id_worker, id_tarea, serializar_candidato(candidato), rss_arbol_mb(os.getpid())))
+
+
+class _Trabajo:
+    def __init__(self, id_tarea, nombre, url, cancelar):
+        self.id = id_tarea
+        self.nombre = nombre
+        self.url = url
+        self.cancelar = cancelar
+        self.futuro = Future()
+        self.inicio = None
+
+
+class _Worker:
+    def __init__(self, ctx, id_worker, resultados):
+        self.id = id_worker
+        self.tareas = ctx.Queue()
+        self.proceso = ctx.Process(
+            target=_loop_worker,
+            args=(id_worker, self.tareas, resultados),
+            name=f"escaneo-{id_worker}",
+            daemon=True
+        )
+        self.proceso.start()
+        self.trabajo = None
+        self.completados = 0
+        self.ultimo_control_memoria = time.time()
+
+    def matar(self):
+        try:
+            os.killpg(self.proceso.pid, signal.SIGKILL)
+        except Exception:
+            try:
+                self.proceso.kill()
+            except Exception:
+                pass
+        self.proceso.join(timeout=5)
+
+    def detener(self):
+        try:
+            self.tareas.put(None)
+            self.proceso.join(timeout=10)
+        except Exception:
+            pass
+        if self.proceso.is_alive():
+            self.matar()
+
+
+class PoolEscaneo:
+    """
+    Pool acotado de procesos de escaneo.
+    enviar() devuelve un Future con el StreamCandidato (sin auditar) o None.
+    """
+
+    def __init__(self, tamaño=TAMAÑO_POOL_ESCANEO):
+        self.tamaño = tamaño
+        self._ctx = multiprocessing.get_context('spawn')
+        self._resultados = self._ctx.Queue()
+        self._workers = {}
+        self._pendientes = deque()
+        self._lock = threading.Lock()
+        self._contador_tareas = 0
+        self._contador_workers = 0
+        self._activo = True
+
+        self._supervisor = threading.Thread(target=self._supervisar, name="pool-escaneo", daemon=True)
+        self._supervisor.start()
+
+    # ---------- API ----------
+
+    def enviar(self, nombre, url, cancelar=None):
+        with self._lock:
+            self._contador_tareas += 1
+            trabajo = _Trabajo(self._contador_tareas, nombre, url, cancelar)
+            self._pendientes.append(trabajo)
+        return trabajo.futuro
+
+    def escanear(self, nombre, url, cancelar=None):
+        """Versión bloqueante: espera el resultado o la cancelación"""
+        futuro = self.enviar(nombre, url, cancelar)
+        limite = time.time() + TIMEOUT_TRABAJO_ESCANEO * 2
+
+        while time.time() < limite:
+            if cancelar is not None and cancelar.is_set():
+                futuro.cancel()
+                return None
+            try:
+                return futuro.result(timeout=0.5)
+            except TimeoutFuturo:
+                continue
+            except Exception:
+                return None
+
+        futuro.cancel()
+        return None
+
+    def cerrar(self):
+        self._activo = False
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+            pendientes = list(self._pendientes)
+            self._pendientes.clear()
+
+        for trabajo in pendientes:
+            trabajo.futuro.cancel()
+        for w in workers:
+            if w.trabajo:
+                motor_auditoria.resolver(w.trabajo.futuro, None)
+            w.detener()
+
+    # ---------- Supervisor ----------
+
+    def _tamaño_objetivo(self):
+        if self.tamaño:
+            return self.tamaño
+        en_curso = sum(1 for w in self._workers.values() if w.trabajo is not None)
+        return carga_host.concurrencia_escaneo(en_curso)
+
+    def _nuevo_worker(self):
+        with self._lock:
+            self._contador_workers += 1
+            id_worker = self._contador_workers
+        w = _Worker(self._ctx, id_worker, self._resultados)  # Arranca el proceso fuera del lock
+        with self._lock:
+            self._workers[w.id] = w
+        return w
+
+    def _reemplazar(self, w, razon):
+        print(f"   ♻️ Worker de escaneo {w.id} reemplazado ({razon})")
+        if w.trabajo:
+            motor_auditoria.resolver(w.trabajo.futuro, None)
+            w.trabajo = None
+        w.matar()
+        with self._lock:
+            self._workers.pop(w.id, None)
+
+    def _recibir(self):
+        try:
+            id_worker, id_tarea, datos, rss_mb = self._resultados.get(timeout=0.5)
+        except queue.Empty:
+            return
+        except Exception:
+            return
+
+        w = self._workers.get(id_worker)
+        if w is None or w.trabajo is None or w.trabajo.id != id_tarea:
+            return  # Worker ya reemplazado: resultado huérfano
+
+        trabajo = w.trabajo
+        w.trabajo = None
+        w.completados += 1
+
+        try:
+            motor_auditoria.resolver(trabajo.futuro, reconstruir_candidato(datos))
+        except Exception:
+            motor_auditoria.resolver(trabajo.futuro, None)
+
+        if rss_mb > MEMORIA_RECICLAR_MB:
+            self._reemplazar(w, f"{rss_mb:.0f}MB")
+        elif w.completados >= MAX_TRABAJOS_POR_WORKER:
+            self._reemplazar(w, f"{w.completados} escaneos")
+
+    def _controlar(self, ahora):
+        for w in list(self._workers.values()):
+            if not w.proceso.is_alive():
+                self._reemplazar(w, "proceso muerto")
+                continue
+
+            trabajo = w.trabajo
+            if trabajo is None:
+                continue
+
+            if trabajo.cancelar is not None and trabajo.cancelar.is_set():
+                self._reemplazar(w, "escaneo cancelado")
+            elif ahora - trabajo.inicio > TIMEOUT_TRABAJO_ESCANEO:
+                print(f"   ⏱️ Escaneo de {trabajo.nombre} excedió {TIMEOUT_TRABAJO_ESCANEO}s")
+                self._reemplazar(w, "timeout")
+            elif ahora - w.ultimo_control_memoria >= INTERVALO_CONTROL_MEMORIA:
+                w.ultimo_control_memoria = ahora
+                rss_mb = rss_arbol_mb(w.proceso.pid)
+                if rss_mb > MEMORIA_LIMITE_DURO_MB:
+                    self._reemplazar(w, f"{rss_mb:.0f}MB en escaneo")
+
+    def _achicar(self, objetivo):
+        """Con la máquina cargada se detienen los workers ociosos que sobran"""
+        sobrantes = len(self._workers) - objetivo
+        for w in list(self._workers.values()):
+            if sobrantes <= 0:
+                return
+            if w.trabajo is None:
+                with self._lock:
+                    self._workers.pop(w.id, None)
+                w.detener()
+                sobrantes -= 1
+
+    def _despachar(self, ahora):
+        objetivo = self._tamaño_objetivo()
+        self._achicar(objetivo)
+
+        while True:
+            with self._lock:
+                if not self._pendientes:
+                    return
+                libres = [w for w in self._workers.values() if w.trabajo is None]
+                if not libres and len(self._workers) >= objetivo:
+                    return
+                trabajo = self._pendientes.popleft()
+
+            cancelado = trabajo.cancelar is not None and trabajo.cancelar.is_set()
+            if cancelado or not trabajo.futuro.set_running_or_notify_cancel():
+                if cancelado:
+                    trabajo.futuro.cancel()
+                continue
+
+            w = libres[0] if libres else self._nuevo_worker()
+            trabajo.inicio = ahora
+            w.trabajo = trabajo
+            w.tareas.put((trabajo.id, trabajo.nombre, trabajo.url))
+
+    def _supervisar(self):
+        while self._activo:
+            try:
+                self._recibir()
+                ahora = time.time()
+                self._controlar(ahora)
+                self._despachar(ahora)
+            except Exception as e:
+                print(f"   ⚠️ Supervisor de escaneo: {str(e)[:80]}")
+                time.sleep(0.5)
+
+
+_pool = None
+_lock_pool = threading.Lock()
+
+
+def obtener_pool():
+    """Pool compartido por todo el proceso (se crea al primer uso)"""
+    global _pool
+    with _lock_pool:
+        if _pool is None:
+            _pool = PoolEscaneo()
+            atexit.register(_pool.cerrar)
+        return _pool
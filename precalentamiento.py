@@ -0,0 +1,196 @@
+"""
+precalentamiento.py - DNS y conexiones TLS listas antes de rotar o arrancar
+- Cache de DNS en proceso (socket.getaddrinfo) con TTL
+- Conexiones keep-alive abiertas de antemano en la Session de motor_auditoria,
+  renovadas con un HEAD cada INTERVALO_KEEPALIVE mientras el host interese
+- Memoria de qué hosts CDN entregó cada fuente, para calentarlos antes de
+  la rotación y del inicio del partido
+Auditorías, chequeos de salud y yt-dlp (mismo proceso) usan la cache de DNS
+una vez que sistema_maestro la instala (instalar_cache_dns); las auditorías
+y chequeos además reutilizan las conexiones ya abiertas.
+"""
+
+import time
+import socket
+import threading
+from collections import defaultdict, deque
+from urllib.parse import urlparse
+
+import motor_auditoria
+
+# ============ CONFIGURACIÓN ============
+CACHE_DNS = True
+TTL_DNS = 60                      # Segundos que se reutiliza una resolución (los CDN rotan IPs)
+MAX_ENTRADAS_DNS = 256            # Tope de la cache; al superarlo se descartan las más viejas
+INTERVALO_KEEPALIVE = 30          # Renovar antes de que el servidor cierre la conexión ociosa
+DURACION_PRECALENTAMIENTO = 600   # Cuánto mantener caliente un host pedido
+PRECALENTAR_ANTES_INICIO = 120    # Antes de empezar a grabar el partido
+PRECALENTAR_ANTES_ROTACION = 180  # Antes del deadline de rotación de un stream
+MAX_HOSTS_POR_FUENTE = 3          # Hosts CDN recordados por página de origen
+TIMEOUT_PRECALENTAR = 5
+# =======================================
+
+_getaddrinfo_original = socket.getaddrinfo
+_cache_dns = {}
+_lock_dns = threading.Lock()
+
+
+def _getaddrinfo_cacheado(host, port, family=0, type=0, proto=0, flags=0):
+    clave = (host, port, family, type, proto, flags)
+    with _lock_dns:
+        entrada = _cache_dns.get(clave)
+    if entrada and entrada[1] > time.time():
+        return entrada[0]
+
+    resultado = _getaddrinfo_original(host, port, family, type, proto, flags)
+    ahora = time.time()
+    with _lock_dns:
+        _cache_dns[clave] = (resultado, ahora + TTL_DNS)
+        if len(_cache_dns) > MAX_ENTRADAS_DNS:
+            _podar_cache_dns(ahora)
+    return resultado
+
+
+def _podar_cache_dns(ahora):
+    """Quita las entradas vencidas y, si sigue llena, las más próximas a vencer (con _lock_dns tomado)"""
+    for clave in [c for c, (_, vence) in _cache_dns.items() if vence <= ahora]:
+        del _cache_dns[clave]
+    exceso = len(_cache_dns) - MAX_ENTRADAS_DNS
+    if exceso > 0:
+        for clave in sorted(_cache_dns, key=lambda c: _cache_dns[c][1])[:exceso]:
+            del _cache_dns[clave]
+
+
+def instalar_cache_dns():
+    """Reemplaza socket.getaddrinfo por la versión con cache (si CACHE_DNS está activo)"""
+    if CACHE_DNS and socket.getaddrinfo is not _getaddrinfo_cacheado:
+        socket.getaddrinfo = _getaddrinfo_cacheado
+        return True
+    return False
+
+
+def _origen(url):
+    """'https://host[:puerto]' de una URL, o None"""
+    try:
+        partes = urlparse(url)
+    except Exception:
+        return None
+    if partes.scheme not in ('http', 'https') or not partes.hostname:
+        return None
+    return f"{partes.scheme}://{partes.netloc.lower()}"
+
+
+def resolver_dns(origen):
+    """Resuelve el host con los mismos parámetros que usa urllib3 (queda en cache)"""
+    partes = urlparse(origen)
+    puerto = partes.port or (443 if partes.scheme == 'https' else 80)
+    try:
+        from urllib3.util.connection import allowed_gai_family
+        familia = allowed_gai_family()
+    except Exception:
+        familia = socket.AF_UNSPEC
+    try:
+        socket.getaddrinfo(partes.hostname, puerto, familia, socket.SOCK_STREAM)
+        return True
+    except OSError:
+        return False
+
+
+class Precalentador:
+    """
+    Mantiene calientes (DNS + TLS) los hosts que se van a necesitar pronto.
+    Todo el trabajo de red corre en el hilo de fondo: precalentar() solo encola.
+    """
+
+    def __init__(self):
+        self._calientes = {}  # origen → timestamp hasta el que se mantiene
+        self._nuevos = deque()  # orígenes pedidos que el hilo todavía no resolvió
+        self._hosts_por_fuente = defaultdict(lambda: deque(maxlen=MAX_HOSTS_POR_FUENTE))
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._hilo = None
+
+    def registrar_candidato(self, url_fuente, url_stream):
+        """Recuerda el host CDN que entregó una fuente"""
+        origen = _origen(url_stream)
+        if not url_fuente or not origen:
+            return
+        with self._lock:
+            hosts = self._hosts_por_fuente[url_fuente]
+            if origen in hosts:
+                hosts.remove(origen)
+            hosts.append(origen)
+
+    def hosts_conocidos(self, urls_fuente):
+        with self._lock:
+            return [h for url in urls_fuente for h in self._hosts_por_fuente.get(url, ())]
+
+    def _tocar(self, origen):
+        """HEAD a la raíz: abre o renueva la conexión keep-alive en la Session compartida"""
+        motor_auditoria.obtener_motor().head(f"{origen}/", timeout=TIMEOUT_PRECALENTAR)
+
+    def precalentar(self, urls, duracion=DURACION_PRECALENTAMIENTO):
+        """
+        Encola la resolución DNS y la apertura de conexiones a los hosts de las
+        URLs (streams o páginas); no bloquea.
+        Retorna la cantidad de hosts nuevos encolados.
+        """
+        hasta = time.time() + duracion
+        nuevos = []
+        with self._lock:
+            for url in urls:
+                origen = _origen(url)
+                if not origen:
+                    continue
+                if origen not in self._calientes:
+                    nuevos.append(origen)
+                self._calientes[origen] = max(self._calientes.get(origen, 0), hasta)
+
+            self._nuevos.extend(nuevos)
+            if self._calientes and (self._hilo is None or not self._hilo.is_alive()):
+                self._hilo = threading.Thread(target=self._loop, name="precalentamiento", daemon=True)
+                self._hilo.start()
+
+        if nuevos:
+            self._despertar.set()
+            print(f"   🔥 Precalentando {len(nuevos)} hosts (DNS + TLS)")
+        return len(nuevos)
+
+    def _calentar_nuevos(self):
+        while True:
+            with self._lock:
+                if not self._nuevos:
+                    return
+                origen = self._nuevos.popleft()
+            try:
+                if resolver_dns(origen):
+                    self._tocar(origen)
+            except Exception:
+                pass
+
+    def _loop(self):
+        proximo_keepalive = time.time() + INTERVALO_KEEPALIVE
+        while True:
+            self._calentar_nuevos()
+            self._despertar.wait(max(0, proximo_keepalive - time.time()))
+            self._despertar.clear()
+
+            ahora = time.time()
+            if ahora < proximo_keepalive:
+                continue
+            proximo_keepalive = ahora + INTERVALO_KEEPALIVE
+
+            with self._lock:
+                for origen, hasta in list(self._calientes.items()):
+                    if hasta < ahora:
+                        del self._calientes[origen]
+                vigentes = list(self._calientes)
+                if not vigentes and not self._nuevos:
+                    self._hilo = None
+                    return
+
+            for origen in vigentes:
+                self._tocar(origen)
+
+
+precalentador = Precalentador()
@@ -3,6 +3,7 @@ import json
 from bs4 import BeautifulSoup
 from datetime import datetime
 import time
+import nombres_equipos
 
 # Cache para evitar consultas repetitivas
 _cache_metadata = {}
@@ -56,6 +57,7 @@ def obtener_metadata_partido(url_promiedos, reintentos=3):
                 # 1. Extraer equipos
                 team_1 = game_props['teams'][0]['short_name']
                 team_2 = game_props['teams'][1]['short_name']
+                nombres_equipos.registrar_alias_de_equipos(game_props['teams'])
                 nombre_archivo = f"{team_1}_vs_{team_2}".replace(" ", "_").replace("/", "-")
                 
                 # 2. Extraer hora
@@ -134,6 +136,21 @@ def obtener_metadata_partido(url_promiedos, reintentos=3):
     
     return None
 
+def obtener_nombre_partido(url_promiedos):
+    """
+    'Local vs Visitante' con los nombres completos de estado_obj
+    (sale de la metadata cacheada: no hace otra consulta si ya se pidió)
+    """
+    metadata = obtener_metadata_partido(url_promiedos)
+    if not metadata:
+        return None
+
+    equipos = metadata['estado_obj'].get('teams') or []
+    if len(equipos) < 2:
+        return None
+    nombres = [e.get('name') or e.get('short_name') for e in equipos[:2]]
+    return f"{nombres[0]} vs {nombres[1]}" if all(nombres) else None
+
 def obtener_estado_partido(url_promiedos, usar_cache=True):
     """
     Consulta el estado del partido con caché temporal.
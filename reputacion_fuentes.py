@@ -0,0 +1,197 @@
+"""
+reputacion_fuentes.py - Historial persistente de fuentes entre partidos
+Registra por fuente: resolución OK/fallida, score de auditoría, tiempo hasta
+el primer segmento, congelamientos por hora y vida útil del token.
+smart_selector lo usa para ordenar el escaneo (Thompson sampling):
+las fuentes buenas se escanean primero y las muertas solo de vez en cuando.
+"""
+
+import os
+import json
+import math
+import time
+import random
+import threading
+from urllib.parse import urlparse, parse_qsl, urlencode
+
+# ============ CONFIGURACIÓN ============
+RUTA_REPUTACION = "./logs/reputacion_fuentes.json"
+MIN_INTENTOS_MUERTA = 4          # Intentos antes de poder declarar una fuente muerta
+UMBRAL_FUENTE_MUERTA = 0.15      # Tasa de éxito esperada por debajo de la cual se explora poco
+PROB_EXPLORAR_MUERTA = 0.15      # Probabilidad de re-escanear una fuente muerta
+PENALIZACION_CONGELAMIENTO = 0.1 # Por cada congelamiento/hora se resta a la muestra
+OLVIDO = 0.95                    # Decaimiento de observaciones viejas (fuentes cambian)
+
+# Parámetros de query que cambian en cada carga y no identifican la fuente
+PARAMS_VOLATILES = {'token', 'expires', 'exp', 'e', 'ip', 'hdnts', 'hdnea', 'st', 'sig', 'signature', 't', '_'}
+# =======================================
+
+
+def clave_fuente(url):
+    """Identificador estable de una fuente (sin tokens ni parámetros volátiles)"""
+    try:
+        partes = urlparse(url)
+    except Exception:
+        return url or ""
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(partes.query, keep_blank_values=True)
+        if k.lower() not in PARAMS_VOLATILES
+    )
+    clave = f"{partes.netloc.lower()}{partes.path}"
+    if query:
+        clave += "?" + urlencode(query)
+    return clave
+
+
+def _media_movil(anterior, nuevo, n):
+    if anterior is None:
+        return nuevo
+    return anterior + (nuevo - anterior) / n
+
+
+class ReputacionFuentes:
+    """Store JSON de reputación por fuente (thread-safe)"""
+
+    def __init__(self, ruta=RUTA_REPUTACION):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._datos = self._cargar()
+
+    def _cargar(self):
+        try:
+            with open(self.ruta, encoding='utf-8') as f:
+                datos = json.load(f)
+            return datos if isinstance(datos, dict) else {}
+        except Exception:
+            return {}
+
+    def guardar(self):
+        """Escritura atómica (archivo temporal + rename)"""
+        with self._lock:
+            contenido = json.dumps(self._datos, indent=1, ensure_ascii=False)
+
+        try:
+            os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+            tmp = f"{self.ruta}.tmp"
+            with open(tmp, "w", encoding='utf-8') as f:
+                f.write(contenido)
+            os.replace(tmp, self.ruta)
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar reputación: {e}")
+
+    def _entrada(self, url):
+        clave = clave_fuente(url)
+        entrada = self._datos.get(clave)
+        if entrada is None:
+            entrada = {
+                "exitos": 0.0,
+                "fallos": 0.0,
+                "intentos": 0,
+                "score_medio": None,
+                "tiempo_primer_segmento": None,
+                "horas_grabadas": 0.0,
+                "congelamientos": 0,
+                "vida_token": None,
+                "ultimo_uso": 0,
+            }
+            self._datos[clave] = entrada
+        return entrada
+
+    # ---------- Registro de resultados ----------
+
+    def registrar_escaneo(self, url, exito, score=None, tiempo_primer_segmento=None):
+        with self._lock:
+            e = self._entrada(url)
+            e["exitos"] = e["exitos"] * OLVIDO + (1 if exito else 0)
+            e["fallos"] = e["fallos"] * OLVIDO + (0 if exito else 1)
+            e["intentos"] += 1
+            e["ultimo_uso"] = time.time()
+
+            if exito and score is not None:
+                e["score_medio"] = _media_movil(e["score_medio"], score, min(e["intentos"], 10))
+            if exito and tiempo_primer_segmento is not None:
+                e["tiempo_primer_segmento"] = _media_movil(
+                    e["tiempo_primer_segmento"], tiempo_primer_segmento, min(e["intentos"], 10)
+                )
+
+    def registrar_grabacion(self, url, segundos, congelado=False):
+        """Tiempo grabado por un proceso de esta fuente y si terminó congelado"""
+        with self._lock:
+            e = self._entrada(url)
+            e["horas_grabadas"] += max(0, segundos) / 3600
+            if congelado:
+                e["congelamientos"] += 1
+
+    def registrar_vida_token(self, url, segundos):
+        with self._lock:
+            e = self._entrada(url)
+            e["vida_token"] = segundos if e["vida_token"] is None else min(e["vida_token"], segundos)
+
+    # ---------- Consultas ----------
+
+    def obtener(self, url):
+        with self._lock:
+            entrada = self._datos.get(clave_fuente(url))
+            return dict(entrada) if entrada else None
+
+    def tasa_exito(self, url):
+        """Media de la Beta posterior (1.0 = siempre resuelve)"""
+        e = self.obtener(url)
+        if not e:
+            return 0.5
+        return (e["exitos"] + 1) / (e["exitos"] + e["fallos"] + 2)
+
+    def congelamientos_por_hora(self, url):
+        e = self.obtener(url)
+        if not e or e["horas_grabadas"] < 0.1:
+            return 0.0
+        return e["congelamientos"] / e["horas_grabadas"]
+
+    def esta_muerta(self, url):
+        e = self.obtener(url)
+        return bool(e) and e["intentos"] >= MIN_INTENTOS_MUERTA and self.tasa_exito(url) < UMBRAL_FUENTE_MUERTA
+
+    def _muestra(self, url):
+        """Thompson sampling: muestra de la Beta menos penalización por congelamientos"""
+        e = self.obtener(url)
+        if not e:
+            muestra = random.betavariate(1, 1)
+        else:
+            muestra = random.betavariate(e["exitos"] + 1, e["fallos"] + 1)
+        return muestra - PENALIZACION_CONGELAMIENTO * self.congelamientos_por_hora(url)
+
+    def planificar(self, lista_fuentes, max_buenos=None, max_workers=None):
+        """
+        Decide orden de escaneo y cantidad de workers.
+        Retorna: (fuentes_ordenadas, workers)
+        """
+        fuentes = list(lista_fuentes)
+        seleccionadas = []
+
+        for fuente in fuentes:
+            _, url = fuente
+            if self.esta_muerta(url) and random.random() > PROB_EXPLORAR_MUERTA:
+                continue
+            seleccionadas.append(fuente)
+
+        # Si todo parece muerto, escanear todo igual
+        if not seleccionadas:
+            seleccionadas = fuentes
+
+        muestras = {id(f): self._muestra(f[1]) for f in seleccionadas}
+        seleccionadas.sort(key=lambda f: muestras[id(f)], reverse=True)
+
+        workers = len(seleccionadas)
+        if max_buenos:
+            # Escaneos esperados para conseguir K buenos con la tasa de las primeras fuentes
+            primeras = seleccionadas[:max(max_buenos, 1) * 2]
+            tasa = sum(self.tasa_exito(u) for _, u in primeras) / len(primeras)
+            workers = math.ceil(max_buenos / max(tasa, 0.1))
+        if max_workers:
+            workers = min(workers, max_workers)
+
+        return seleccionadas, max(1, min(workers, len(seleccionadas)))
+
+
+reputacion = ReputacionFuentes()
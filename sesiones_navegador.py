@@ -0,0 +1,302 @@
+"""
+sesiones_navegador.py - Pestañas persistentes por fuente para refrescar tokens
+Mientras se graba una fuente, su página queda abierta (video pausado y mudo)
+en un proceso aparte. Cuando el token está por vencer se recarga esa misma
+pestaña y se captura el nuevo m3u8 firmado y sus cookies en pocos segundos,
+sin levantar un navegador nuevo ni pasar por el pool de escaneo.
+- Cupo global compartido por todos los partidos y descontado de carga_host
+- La recarga corre en segundo plano (el bucle de salud solo toma el resultado)
+- Una sesión sin grabaciones de su fuente se cierra (conservar)
+"""
+
+import os
+import time
+import signal
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+import pool_escaneo
+import carga_host
+import smart_selector
+
+# ============ CONFIGURACIÓN ============
+MAX_SESIONES_VIVAS = 4             # Pestañas persistentes simultáneas (entre todos los partidos)
+TIMEOUT_APERTURA_SESION = 120      # Primera carga (arranque de Chrome incluido)
+TIMEOUT_REFRESCO_SESION = smart_selector.DURACION_MAXIMA_CAPTURA + 15  # Recarga + captura, con margen
+MAX_REFRESCOS_SIN_RESPUESTA = 3    # Recién ahí se da la sesión por colgada y se cierra
+MEMORIA_MAXIMA_SESION_MB = 1500    # Sesión que supera esto se cierra (fuga)
+# =======================================
+
+_lock_cupo = threading.Lock()
+_sesiones_abiertas = 0
+
+
+def _tomar_cupo():
+    global _sesiones_abiertas
+    with _lock_cupo:
+        if _sesiones_abiertas >= MAX_SESIONES_VIVAS or not carga_host.admite_sesion():
+            return False
+        _sesiones_abiertas += 1
+        carga_host.registrar_sesiones_navegador(_sesiones_abiertas)
+        return True
+
+
+def _liberar_cupo():
+    global _sesiones_abiertas
+    with _lock_cupo:
+        _sesiones_abiertas = max(0, _sesiones_abiertas - 1)
+        carga_host.registrar_sesiones_navegador(_sesiones_abiertas)
+
+
+def sesiones_abiertas():
+    with _lock_cupo:
+        return _sesiones_abiertas
+
+
+def _loop_sesion(nombre, url_web, conexion):
+    """Proceso de la sesión: un driver abierto que responde 'refrescar' / 'cerrar'"""
+    try:
+        os.setpgrp()
+    except Exception:
+        pass
+
+    import smart_selector
+
+    driver = None
+    try:
+        driver = smart_selector.crear_driver()
+        comando = 'refrescar'
+
+        while comando == 'refrescar':
+            try:
+                candidato = smart_selector.capturar_stream(driver, nombre, url_web)
+            except Exception as e:
+                print(f"   💀 Sesión {nombre}: {str(e)[:80]}")
+                candidato = None
+
+            smart_selector.pausar_reproduccion(driver)
+            conexion.send(pool_escaneo.serializar_candidato(candidato))
+            comando = conexion.recv()
+    except (EOFError, OSError):
+        pass
+    finally:
+        if driver:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+class SesionFuente:
+    """Pestaña persistente de una fuente en su propio proceso"""
+
+    def __init__(self, nombre, url_web):
+        self.nombre = nombre
+        self.url_web = url_web
+        self._lock = threading.Lock()
+
+        ctx = multiprocessing.get_context('spawn')
+        self._conexion, extremo_hijo = ctx.Pipe()
+        self.proceso = ctx.Process(
+            target=_loop_sesion,
+            args=(nombre, url_web, extremo_hijo),
+            name=f"sesion-{nombre}",
+            daemon=True
+        )
+        self.proceso.start()
+        # La captura de la apertura llega sin pedirla; si llega antes de un refresco ya está vieja
+        self._respuesta_pendiente = True
+        self._abriendo = True       # Sin ninguna respuesta aún (Chrome arrancando)
+        self._sin_respuesta = 0
+
+    @property
+    def viva(self):
+        return self.proceso.is_alive()
+
+    def _recibir(self, timeout):
+        if not self._conexion.poll(timeout):
+            return None, False
+        return pool_escaneo.reconstruir_candidato(self._conexion.recv()), True
+
+    def refrescar(self, timeout=TIMEOUT_REFRESCO_SESION):
+        """
+        Recarga la pestaña y devuelve un StreamCandidato (sin auditar) con
+        URL y cookies recién firmadas, o None.
+        Una recarga lenta solo falla ese refresco: la pestaña sigue abierta y su
+        respuesta tardía se usa (o descarta) en el próximo. Se cierra si el
+        proceso murió o tras MAX_REFRESCOS_SIN_RESPUESTA refrescos sin respuesta.
+        """
+        with self._lock:
+            if not self.viva:
+                return None
+
+            try:
+                # Una respuesta anterior que ya llegó es vieja: descartarla y pedir otra.
+                # Si todavía no llegó, la captura en curso es la que se espera.
+                if self._respuesta_pendiente and self._conexion.poll(0):
+                    self._conexion.recv()
+                    self._respuesta_pendiente = self._abriendo = False
+
+                if not self._respuesta_pendiente:
+                    self._conexion.send('refrescar')
+                    self._respuesta_pendiente = True
+
+                espera = TIMEOUT_APERTURA_SESION if self._abriendo else timeout
+                candidato, ok = self._recibir(espera)
+            except Exception as e:
+                print(f"   ⚠️ Sesión {self.nombre} caída ({e or type(e).__name__}), cerrando")
+                self._matar()
+                return None
+
+            if ok:
+                self._respuesta_pendiente = self._abriendo = False
+                self._sin_respuesta = 0
+                return candidato
+
+            self._sin_respuesta += 1
+            if self._sin_respuesta >= MAX_REFRESCOS_SIN_RESPUESTA:
+                print(f"   ⚠️ Sesión {self.nombre} sin respuesta {self._sin_respuesta} veces, cerrando")
+                self._matar()
+            else:
+                print(f"   ⏳ Sesión {self.nombre}: refresco sin respuesta en {espera:.0f}s (la pestaña sigue abierta)")
+            return None
+
+    def memoria_mb(self):
+        return pool_escaneo.rss_arbol_mb(self.proceso.pid) if self.viva else 0.0
+
+    def _matar(self):
+        try:
+            os.killpg(self.proceso.pid, signal.SIGKILL)
+        except Exception:
+            try:
+                self.proceso.kill()
+            except Exception:
+                pass
+        self.proceso.join(timeout=5)
+
+    def cerrar(self):
+        with self._lock:  # Espera a que termine un refresco en curso
+            self._cerrar()
+
+    def _cerrar(self):
+        try:
+            self._conexion.send('cerrar')
+            self.proceso.join(timeout=10)
+        except Exception:
+            pass
+        if self.proceso.is_alive():
+            self._matar()
+
+
+class GestorSesiones:
+    """
+    Sesiones persistentes de un partido indexadas por URL de la fuente.
+    El límite de sesiones es global (MAX_SESIONES_VIVAS entre todos los gestores).
+    """
+
+    def __init__(self):
+        self._sesiones = {}
+        self._refrescos = {}  # url_web → Future del refresco en curso
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=MAX_SESIONES_VIVAS, thread_name_prefix="sesion")
+
+    def abrir(self, nombre, url_web):
+        """Abre (en segundo plano) la pestaña de una fuente si hay cupo"""
+        if not url_web:
+            return False
+
+        with self._lock:
+            self._limpiar()
+            if url_web in self._sesiones:
+                return True
+            if not _tomar_cupo():
+                return False
+            self._sesiones[url_web] = SesionFuente(nombre, url_web)
+
+        print(f"   🗂️ Sesión persistente abierta: {nombre}")
+        return True
+
+    def _refrescar(self, url_web, procesar=None):
+        with self._lock:
+            sesion = self._sesiones.get(url_web)
+
+        if sesion is None:
+            return None
+
+        if sesion.memoria_mb() > MEMORIA_MAXIMA_SESION_MB:
+            print(f"   ♻️ Sesión {sesion.nombre} excedió {MEMORIA_MAXIMA_SESION_MB}MB, reabriendo")
+            self.cerrar(url_web)
+            self.abrir(sesion.nombre, url_web)
+            return None
+
+        inicio = time.time()
+        candidato = sesion.refrescar()
+        if candidato:
+            print(f"   🔁 Token renovado por sesión ({sesion.nombre}) en {time.time() - inicio:.1f}s")
+            if procesar:
+                candidato = procesar(candidato)
+        return candidato
+
+    def refrescar_async(self, url_web, procesar=None):
+        """
+        Lanza la recarga de la pestaña sin bloquear (una por fuente a la vez).
+        procesar(candidato) -> candidato o None: p.ej. auditarlo en el mismo hilo.
+        """
+        with self._lock:
+            if url_web not in self._sesiones or url_web in self._refrescos:
+                return False
+            self._refrescos[url_web] = self._executor.submit(self._refrescar, url_web, procesar)
+        return True
+
+    def tomar_refresco(self, url_web):
+        """Resultado del refresco si ya terminó (None si no hay, falló o sigue en curso)"""
+        with self._lock:
+            futuro = self._refrescos.get(url_web)
+            if futuro is None or not futuro.done():
+                return None
+            del self._refrescos[url_web]
+        try:
+            return futuro.result()
+        except Exception:
+            return None
+
+    def _limpiar(self):
+        for url, sesion in list(self._sesiones.items()):
+            if not sesion.viva:
+                del self._sesiones[url]
+                _liberar_cupo()
+
+    def _cerrar_en_fondo(self, sesiones):
+        for sesion in sesiones:
+            _liberar_cupo()
+            self._executor.submit(sesion.cerrar)
+
+    def cerrar(self, url_web):
+        with self._lock:
+            sesion = self._sesiones.pop(url_web, None)
+            self._refrescos.pop(url_web, None)
+        if sesion:
+            self._cerrar_en_fondo([sesion])
+
+    def conservar(self, urls_web):
+        """Cierra (en segundo plano) las sesiones de fuentes que ya no se graban"""
+        urls_web = set(urls_web)
+        with self._lock:
+            sobrantes = [u for u in self._sesiones if u not in urls_web]
+            cerradas = [self._sesiones.pop(u) for u in sobrantes]
+            for url in sobrantes:
+                self._refrescos.pop(url, None)
+        for sesion in cerradas:
+            print(f"   🗂️ Sesión cerrada (sin grabaciones): {sesion.nombre}")
+        self._cerrar_en_fondo(cerradas)
+
+    def cerrar_todas(self):
+        with self._lock:
+            sesiones = list(self._sesiones.values())
+            self._sesiones.clear()
+            self._refrescos.clear()
+        for sesion in sesiones:
+            _liberar_cupo()
+            sesion.cerrar()
+        self._executor.shutdown(wait=False)
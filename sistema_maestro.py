@@ -5,7 +5,8 @@ CAMBIOS CRÍTICOS:
 2. Detección AGRESIVA de streams congelados (15s en lugar de 30s)
 3. Rescate inmediato sin esperar confirmación
 4. Validación de archivos antes de usar
-5. Rotación de streams cada 10 minutos preventivamente
+5. Rotación de streams según expiración de tokens (intervalo fijo como respaldo)
+6. Cambio de variante (calidad) en la misma master según throughput, sin re-escaneo
 """
 
 import time
@@ -14,13 +15,23 @@ import threading
 import signal
 import subprocess
 import json
+import itertools
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from collections import defaultdict
 import promiedos_client
 import sofascore_client
 import smart_selector
 import uploader
 import angulismo_scraper  # NUEVO
+import expiracion_tokens
+import reputacion_fuentes
+import stream_health_monitor
+import sesiones_navegador
+import carga_host
+import precalentamiento
+import catalogo_canales
+import descubrimiento_previo
 from urllib.parse import urlparse
 
 # ================= CONFIGURACIÓN CRÍTICA =================
@@ -36,10 +47,29 @@ UMBRAL_SIN_CRECIMIENTO = 15  # CRÍTICO: 15s en lugar de 30s
 MAX_RESCATES_CONSECUTIVOS = 3  # NUEVO: Límite de rescates
 
 # Rotación preventiva
-ROTACION_PREVENTIVA_MINUTOS = 10  # Rotar streams cada 10min preventivamente
+ROTACION_PREVENTIVA_MINUTOS = 10  # Respaldo si no se conoce la expiración del token
+VENTANA_AGRUPAR_ROTACION = 120  # Rotar juntos los streams que vencen en los próximos 2min
+REINTENTO_ROTACION_FALLIDA = 60  # Si el re-escaneo falla, reintentar en 1min
+
+# Pestaña persistente por fuente: renovar tokens recargando la misma página
+MANTENER_SESIONES_NAVEGADOR = True
+
+# Cambio de variante dentro de la misma master (sin re-escaneo)
+VENTANA_TASA_ESCRITURA = 60  # Cada cuánto medir la tasa de escritura de ffmpeg
+UMBRAL_DEGRADACION_VARIANTE = 0.6  # Tasa de escritura / bitrate nominal por debajo = degradado
+VENTANAS_DEGRADADAS_PARA_BAJAR = 2  # Ventanas seguidas degradadas antes de bajar
+ESTABLE_PARA_SUBIR_SEGUNDOS = 300  # Tiempo estable antes de probar la variante superior
+MAX_SONDEOS_PARALELOS = 4  # Mediciones de segmento y cierres tras overlap, fuera del bucle de salud
 
 # Overlap
 OVERLAP_SEGUNDOS = 60
+OVERLAP_CAMBIO_VARIANTE = 20
+
+# Latencia: re-muestrear el borde vivo de cada stream durante la grabación
+INTERVALO_MUESTREO_LATENCIA = 60
+
+# Canales que se prueban primero entre las fuentes de AngulismoTV
+CANALES_PREFERIDOS = ["ESPN Premium", "Disney+", "TNT Sports", "Fox Sports"]
 
 # Buffers
 BUFFER_INICIO_PARTIDO = 180
@@ -52,6 +82,9 @@ THRESHOLD_TAMAÑO_CORTE = 512 * 1024
 _lock_partidos = threading.Lock()
 _partidos_activos = {}
 
+# Sondeos de throughput y cierres de grabaciones salientes (no bloquean el monitoreo)
+_sondeos = ThreadPoolExecutor(max_workers=MAX_SONDEOS_PARALELOS, thread_name_prefix="sondeo")
+
 cache_streams = {}
 lock_cache = threading.Lock()
 procesos_activos = {}
@@ -109,7 +142,7 @@ def obtener_fuentes_dinamicas(url_promiedos):
     try:
         fuentes = angulismo_scraper.obtener_streams_para_partido(
             url_promiedos,
-            preferir_canales=["ESPN Premium", "Disney+", "TNT Sports", "Fox Sports"]
+            preferir_canales=CANALES_PREFERIDOS
         )
         
         if fuentes:
@@ -123,6 +156,17 @@ def obtener_fuentes_dinamicas(url_promiedos):
         log_partido("sistema", f"❌ Error obteniendo fuentes: {str(e)[:80]}")
         return []
 
+def redescubrir_fuentes(url_promiedos, canales):
+    """
+    Fuentes actuales del partido para el descubrimiento previo al inicio: relee
+    la agenda si la instantánea tiene más de EDAD_MAXIMA_AGENDA (una sola vez
+    para todos los partidos) y usa el catálogo si AngulismoTV no trae nada
+    """
+    angulismo_scraper.agenda.refrescar(
+        si_anterior_a=time.time() - descubrimiento_previo.EDAD_MAXIMA_AGENDA
+    )
+    return obtener_fuentes_dinamicas(url_promiedos) or catalogo_canales.fuentes_para_canales(canales)
+
 def obtener_estado_con_backup(url_promiedos, url_sofascore=None):
     """
     Estado del partido con backup
@@ -277,61 +321,256 @@ def detener_grabacion_suave(proceso, nombre_partido, etiqueta=""):
 
 # ================= GRABACIÓN CON ROTACIÓN PREVENTIVA =================
 
+def crear_registro_proceso(proc, ruta, stream, idx, inicio):
+    """
+    Registro de un proceso de grabación con su deadline de rotación
+    """
+    # El token puede haberse emitido antes (candidato previo al inicio)
+    emision = min(inicio, getattr(stream, "obtenido", None) or inicio)
+    deadline, origen = expiracion_tokens.calcular_deadline_rotacion(
+        stream, emision, ROTACION_PREVENTIVA_MINUTOS * 60
+    )
+    
+    return {
+        "proc": proc,
+        "ruta": ruta,
+        "stream": stream,
+        "idx": idx,
+        "estado": "ok",
+        "last_check": inicio,
+        "last_size": 0,
+        "stream_id": idx,
+        "tiempo_inicio": inicio,
+        "deadline_rotacion": deadline,
+        "origen_deadline": origen,
+        "muestra_tasa": (inicio, 0),
+        "tasa_mbps": None,
+        "ventanas_degradadas": 0,
+        "estable_desde": inicio,
+        "ultimo_muestreo_latencia": inicio,
+        "precalentado": False,
+        "bitrate_medido": None,   # Bitrate real del segmento si la variante no declara AVERAGE-BANDWIDTH
+        "sondeo": None,           # (tipo, Future) de una medición de segmento en curso
+        "detener_en": None,       # Grabación saliente: se detiene pasado el overlap
+        "sondeo_origen": None     # Future del chequeo del playlist tras un congelamiento
+    }
+
+def _lanzar_sondeo(p_obj, tipo, url_playlist=None):
+    """Medición de segmento en segundo plano; evaluar_cambio_variante toma el resultado"""
+    p_obj["sondeo"] = (tipo, _sondeos.submit(smart_selector.medir_segmento, p_obj["stream"], url_playlist))
+
+def bitrate_referencia(p_obj):
+    """
+    Bitrate contra el que se compara la tasa de escritura: AVERAGE-BANDWIDTH
+    de la variante o el bitrate medido de sus segmentos. BANDWIDTH es el pico
+    y un stream sano escribe bastante por debajo de él.
+    """
+    variante = p_obj["stream"].variantes[p_obj["stream"].variante_idx]
+    if variante.average_bandwidth:
+        return variante.average_bandwidth / 1_000_000
+    return p_obj["bitrate_medido"]
+
+def actualizar_tasa_escritura(p_obj, now, tamaño):
+    """
+    Mide cada VENTANA_TASA_ESCRITURA la tasa a la que ffmpeg escribe y la
+    compara con el bitrate de referencia de la variante que graba
+    """
+    t0, tamaño0 = p_obj["muestra_tasa"]
+    if now - t0 < VENTANA_TASA_ESCRITURA:
+        return
+    
+    p_obj["tasa_mbps"] = (tamaño - tamaño0) * 8 / (now - t0) / 1_000_000
+    p_obj["muestra_tasa"] = (now, tamaño)
+    
+    stream = p_obj["stream"]
+    if not stream.variantes or stream.variante_idx is None:
+        return
+    
+    nominal = bitrate_referencia(p_obj)
+    if nominal is None:
+        if p_obj["sondeo"] is None:
+            _lanzar_sondeo(p_obj, "referencia")
+        return
+    
+    if p_obj["tasa_mbps"] < nominal * UMBRAL_DEGRADACION_VARIANTE:
+        p_obj["ventanas_degradadas"] += 1
+        p_obj["estable_desde"] = now
+    else:
+        p_obj["ventanas_degradadas"] = 0
+
+def evaluar_cambio_variante(p_obj, now):
+    """
+    Decide si un proceso debe bajar o subir de variante en su master.
+    Las mediciones corren en segundo plano: una llamada lanza el sondeo y una
+    posterior usa el resultado.
+    Retorna el índice de la nueva variante o None.
+    """
+    stream = p_obj["stream"]
+    variantes = stream.variantes
+    idx = stream.variante_idx
+    if not variantes or idx is None:
+        return None
+    
+    if p_obj["sondeo"] is not None:
+        tipo, futuro = p_obj["sondeo"]
+        if not futuro.done():
+            return None
+        p_obj["sondeo"] = None
+        try:
+            throughput, bitrate = futuro.result()
+        except Exception:
+            throughput, bitrate = None, None
+        
+        if tipo == "referencia":
+            p_obj["bitrate_medido"] = bitrate
+        elif tipo == "bajar":
+            nuevo = smart_selector.seleccionar_variante(variantes, throughput or p_obj["tasa_mbps"])
+            return min(max(nuevo, idx + 1), len(variantes) - 1)
+        elif tipo == "subir" and throughput and smart_selector.seleccionar_variante(variantes, throughput) < idx:
+            return idx - 1
+        return None
+    
+    # Bajar: ffmpeg no da abasto con el bitrate de la variante
+    if p_obj["ventanas_degradadas"] >= VENTANAS_DEGRADADAS_PARA_BAJAR and idx < len(variantes) - 1:
+        _lanzar_sondeo(p_obj, "bajar")
+    
+    # Subir: tras un período estable, probar la variante superior de a un escalón
+    elif idx > 0 and now - p_obj["estable_desde"] >= ESTABLE_PARA_SUBIR_SEGUNDOS:
+        p_obj["estable_desde"] = now
+        _lanzar_sondeo(p_obj, "subir", variantes[idx - 1].url)
+    
+    return None
+
+def registrar_fin_proceso(p_obj, now, congelado=False):
+    """
+    Suma el tiempo grabado (y el congelamiento) a la reputación de la fuente
+    """
+    url_fuente = getattr(p_obj["stream"], "url_fuente", None)
+    if url_fuente:
+        reputacion_fuentes.reputacion.registrar_grabacion(
+            url_fuente, now - p_obj["tiempo_inicio"], congelado=congelado
+        )
+
+def registrar_muerte_proceso(p_obj, now):
+    """
+    Si ffmpeg murió por token rechazado (403), aprende la vida útil del host.
+    Una salida de ffmpeg (fin de stream, 403, caída) no es un congelamiento:
+    eso lo registra solo el health check cuando el archivo deja de crecer.
+    """
+    registrar_fin_proceso(p_obj, now)
+    
+    try:
+        stderr = p_obj["proc"].stderr.read().decode('utf-8', errors='ignore')
+    except:
+        return
+    
+    if expiracion_tokens.es_error_token(stderr):
+        vida = now - p_obj["tiempo_inicio"]
+        expiracion_tokens.registro_vida_tokens.registrar_expiracion(p_obj["stream"].url, vida)
+        
+        url_fuente = getattr(p_obj["stream"], "url_fuente", None)
+        if url_fuente:
+            reputacion_fuentes.reputacion.registrar_vida_token(url_fuente, vida)
+
+def precalentar_fuentes(fuentes_canal, streams=()):
+    """DNS + TLS de los streams dados, sus espejos y los CDN que ya entregaron estas fuentes"""
+    urls = [url for _, url in fuentes_canal]
+    for stream in streams:
+        urls.append(stream.url)
+        urls.extend(alt.url for alt in stream.alternativas)
+    urls.extend(precalentamiento.precalentador.hosts_conocidos([url for _, url in fuentes_canal]))
+    return precalentamiento.precalentador.precalentar(urls)
+
+def es_duplicado(stream, vigentes):
+    """Mismo URL o misma señal (huella de segmentos) que un stream ya en uso"""
+    return any(stream.url == v.url or stream.misma_senal(v) for v in vigentes)
+
+def _auditar_renovado(candidato):
+    """Auditoría del candidato de una pestaña recargada (corre en el hilo del refresco)"""
+    smart_selector.auditar_stream(candidato)
+    return candidato if candidato.score > 0 else None
+
+def pedir_renovacion(sesiones, p_obj):
+    """Recarga en segundo plano la pestaña de la fuente del stream (no bloquea el monitoreo)"""
+    url_fuente = getattr(p_obj["stream"], "url_fuente", None)
+    if sesiones is not None and url_fuente:
+        sesiones.refrescar_async(url_fuente, procesar=_auditar_renovado)
+
+def renovar_por_sesiones(sesiones, vencidos):
+    """
+    Reemplazos auditados ya obtenidos recargando la pestaña persistente de la
+    fuente de cada stream vencido (sin navegador nuevo). Solo toma refrescos
+    terminados: lo que sigue en curso no demora la rotación.
+    """
+    if sesiones is None:
+        return
+    
+    for p_obj in vencidos:
+        url_fuente = getattr(p_obj["stream"], "url_fuente", None)
+        candidato = sesiones.tomar_refresco(url_fuente) if url_fuente else None
+        if candidato:
+            yield candidato
+
 def grabar_con_rotacion_preventiva(fuentes_canal, ruta_base, nombre_partido,
-                                   url_promiedos, url_sofascore, estados_fin):
+                                   url_promiedos, url_sofascore, estados_fin,
+                                   candidatos_previos=()):
     """
-    Graba con rotación preventiva cada 10 minutos
-    Evita que streams se congelen por tokens expirados
+    Graba con rotación preventiva por stream
+    Cada stream rota antes de que expire su token (expiración en la URL,
+    vida aprendida del host o cada ROTACION_PREVENTIVA_MINUTOS como respaldo)
+    candidatos_previos: ya auditados antes del inicio (descubrimiento_previo);
+    se usan primero y sus fuentes no se vuelven a escanear
     """
     log_partido(nombre_partido, f"🚀 GRABACIÓN CON ROTACIÓN PREVENTIVA")
     log_partido(nombre_partido, f"   • Streams paralelos: {MAX_STREAMS_PARALELOS}")
-    log_partido(nombre_partido, f"   • Rotación cada: {ROTACION_PREVENTIVA_MINUTOS}min")
+    log_partido(nombre_partido, f"   • Rotación: según token (respaldo {ROTACION_PREVENTIVA_MINUTOS}min)")
     log_partido(nombre_partido, f"   • Detección congelamiento: {UMBRAL_SIN_CRECIMIENTO}s")
     
     procesos = []
     cambios_stream = 0
+    sesiones = sesiones_navegador.GestorSesiones() if MANTENER_SESIONES_NAVEGADOR else None
     rescates_consecutivos = 0
     ultimo_rescate_time = 0
-    ultima_rotacion_time = time.time()
-    
-    # Obtener streams
-    candidatos = smart_selector.obtener_mejores_streams(fuentes_canal)
-    
-    if not candidatos:
-        log_partido(nombre_partido, "❌ No hay streams disponibles")
-        return []
-    
-    # Filtrar duplicados
-    urls_usadas = set()
-    streams_unicos = []
-    for s in candidatos:
-        if s.url not in urls_usadas:
-            streams_unicos.append(s)
-            urls_usadas.add(s.url)
     
-    max_streams = min(len(streams_unicos), MAX_STREAMS_PARALELOS)
-    streams_respaldo = streams_unicos[max_streams:]
+    # Obtener streams: cada uno arranca a grabar apenas se valida
+    streams_usados = []
     
-    log_partido(nombre_partido, f"📊 {max_streams} streams primarios + {len(streams_respaldo)} respaldo")
+    objetivos_previos = {
+        smart_selector.objetivo_fuente(c.url_fuente or c.url) for c in candidatos_previos
+    }
+    fuentes_restantes = [
+        (nombre, url) for nombre, url in fuentes_canal
+        if smart_selector.objetivo_fuente(url) not in objetivos_previos
+    ]
+    if candidatos_previos:
+        log_partido(nombre_partido, f"   ⚡ {len(candidatos_previos)} candidatos previos, "
+                                    f"{len(fuentes_restantes)} fuentes a escanear")
     
-    # Iniciar streams
-    for i in range(max_streams):
-        stream = streams_unicos[i]
+    for stream in itertools.chain(candidatos_previos,
+                                  smart_selector.iterar_mejores_streams(fuentes_restantes)):
+        # Filtrar duplicados (mismo URL o espejo del mismo stream)
+        if es_duplicado(stream, streams_usados):
+            continue
+        streams_usados.append(stream)
+        
+        i = len(procesos)
         ruta = f"{ruta_base}_p{cambios_stream}_s{i}.mp4"
         p = iniciar_grabacion_robusta(stream, ruta, nombre_partido, f" [S{i}]")
         
         if p:
-            procesos.append({
-                "proc": p,
-                "ruta": ruta,
-                "stream": stream,
-                "idx": i,
-                "estado": "ok",
-                "last_check": time.time(),
-                "last_size": 0,
-                "stream_id": i,
-                "tiempo_inicio": time.time()
-            })
+            p_obj = crear_registro_proceso(p, ruta, stream, i, time.time())
+            procesos.append(p_obj)
+            if sesiones:
+                sesiones.abrir(stream.fuente, stream.url_fuente)
+            minutos = (p_obj["deadline_rotacion"] - time.time()) / 60
+            log_partido(nombre_partido, f"   ⏲️ S{i}: rotación en {minutos:.0f}min ({p_obj['origen_deadline']})")
+        
+        if len(procesos) >= MAX_STREAMS_PARALELOS:
+            break
+    
+    if not procesos:
+        log_partido(nombre_partido, "❌ No hay streams disponibles")
+        return []
     
     log_partido(nombre_partido, f"✅ {len([p for p in procesos if p['estado']=='ok'])} streams activos")
     
@@ -344,51 +583,85 @@ def grabar_con_rotacion_preventiva(fuentes_canal, ruta_base, nombre_partido,
         time.sleep(INTERVALO_HEALTH_CHECK)
         now = time.time()
         
-        # A) ROTACIÓN PREVENTIVA cada 10 minutos
-        if now - ultima_rotacion_time >= (ROTACION_PREVENTIVA_MINUTOS * 60):
-            log_partido(nombre_partido, "🔄 ROTACIÓN PREVENTIVA (evitar expiración de tokens)")
+        # A0) Calentar DNS/TLS de los posibles reemplazos antes de la rotación
+        por_rotar = [
+            p_obj for p_obj in procesos
+            if p_obj["estado"] == "ok" and not p_obj["precalentado"]
+            and p_obj["deadline_rotacion"] - precalentamiento.PRECALENTAR_ANTES_ROTACION <= now
+        ]
+        if por_rotar:
+            precalentar_fuentes(fuentes_canal, [p_obj["stream"] for p_obj in por_rotar])
+            for p_obj in por_rotar:
+                p_obj["precalentado"] = True
+                pedir_renovacion(sesiones, p_obj)
+        
+        # A) ROTACIÓN PREVENTIVA de los streams cuyo token está por vencer
+        vencidos = [
+            p_obj for p_obj in procesos
+            if p_obj["estado"] == "ok"
+            and p_obj["deadline_rotacion"] - VENTANA_AGRUPAR_ROTACION <= now
+        ]
+        
+        if any(p_obj["deadline_rotacion"] <= now for p_obj in vencidos):
+            origenes = ", ".join(f"S{p['idx']}:{p['origen_deadline']}" for p in vencidos)
+            log_partido(nombre_partido, f"🔄 ROTACIÓN PREVENTIVA ({origenes})")
             
-            # Obtener nuevos streams
-            nuevos_streams = smart_selector.obtener_mejores_streams(fuentes_canal)
+            # No duplicar streams que siguen grabando
+            streams_vigentes = [
+                p_obj["stream"] for p_obj in procesos
+                if p_obj["estado"] == "ok" and p_obj not in vencidos
+            ]
+            
+            # Obtener nuevos streams: primero recargando las pestañas persistentes,
+            # luego escaneo (cortado apenas hay reemplazos suficientes)
+            nuevos_procesos = []
+            reemplazos = itertools.chain(
+                renovar_por_sesiones(sesiones, vencidos),
+                smart_selector.iterar_mejores_streams(fuentes_canal)
+            )
             
-            if nuevos_streams and len(nuevos_streams) >= 2:
-                # Reemplazar todos los streams con overlap
-                nuevos_procesos = []
+            for nuevo_s in reemplazos:
+                if es_duplicado(nuevo_s, streams_vigentes):
+                    continue
+                streams_vigentes.append(nuevo_s)
                 
-                for i, nuevo_s in enumerate(nuevos_streams[:MAX_STREAMS_PARALELOS]):
-                    cambios_stream += 1
-                    ruta_nuevo = f"{ruta_base}_rot{cambios_stream}.mp4"
-                    
-                    proc_nuevo = iniciar_grabacion_robusta(
-                        nuevo_s, ruta_nuevo, nombre_partido, f" [ROT-{i}]"
+                i = len(nuevos_procesos)
+                cambios_stream += 1
+                ruta_nuevo = f"{ruta_base}_rot{cambios_stream}.mp4"
+                
+                proc_nuevo = iniciar_grabacion_robusta(
+                    nuevo_s, ruta_nuevo, nombre_partido, f" [ROT-{i}]"
+                )
+                
+                if proc_nuevo:
+                    nuevos_procesos.append(
+                        crear_registro_proceso(proc_nuevo, ruta_nuevo, nuevo_s, 100 + cambios_stream, now)
                     )
-                    
-                    if proc_nuevo:
-                        nuevos_procesos.append({
-                            "proc": proc_nuevo,
-                            "ruta": ruta_nuevo,
-                            "stream": nuevo_s,
-                            "idx": 100 + i,
-                            "estado": "ok",
-                            "last_check": now,
-                            "last_size": 0,
-                            "stream_id": 100 + i,
-                            "tiempo_inicio": now
-                        })
+                    if sesiones:
+                        sesiones.abrir(nuevo_s.fuente, nuevo_s.url_fuente)
                 
-                if nuevos_procesos:
-                    log_partido(nombre_partido, f"   ⏳ Overlap {OVERLAP_SEGUNDOS}s...")
-                    time.sleep(OVERLAP_SEGUNDOS)
-                    
-                    # Detener viejos
-                    for p_obj in procesos:
-                        if p_obj["estado"] == "ok":
-                            detener_grabacion_suave(p_obj["proc"], nombre_partido, f"S{p_obj['idx']}")
-                            p_obj["estado"] = "dead"
-                    
-                    procesos = nuevos_procesos
-                    ultima_rotacion_time = now
-                    log_partido(nombre_partido, "   ✅ Rotación completada")
+                if len(nuevos_procesos) >= len(vencidos):
+                    break
+            
+            if nuevos_procesos:
+                log_partido(nombre_partido, f"   ⏳ Overlap {OVERLAP_SEGUNDOS}s...")
+                time.sleep(OVERLAP_SEGUNDOS)
+                
+                # Detener solo los viejos reemplazados (los más próximos a vencer primero)
+                vencidos.sort(key=lambda p_obj: p_obj["deadline_rotacion"])
+                for p_obj in vencidos[:len(nuevos_procesos)]:
+                    detener_grabacion_suave(p_obj["proc"], nombre_partido, f"S{p_obj['idx']}")
+                    p_obj["estado"] = "dead"
+                    registrar_fin_proceso(p_obj, time.time())
+                
+                procesos.extend(nuevos_procesos)
+                log_partido(nombre_partido, f"   ✅ Rotación completada ({len(nuevos_procesos)}/{len(vencidos)})")
+            
+            # Los que no pudieron reemplazarse se reintentan más tarde
+            for p_obj in vencidos:
+                if p_obj["estado"] == "ok":
+                    p_obj["deadline_rotacion"] = now + REINTENTO_ROTACION_FALLIDA
+                    pedir_renovacion(sesiones, p_obj)
         
         # B) VERIFICAR ESTADO DEL PARTIDO
         if now - ultimo_check_metadata >= 20:
@@ -415,12 +688,22 @@ def grabar_con_rotacion_preventiva(fuentes_canal, ruta_base, nombre_partido,
             
             ultimo_check_metadata = now
         
+        # C0) Resultado de los chequeos de origen lanzados en pasadas anteriores
+        for p_obj in procesos:
+            futuro = p_obj["sondeo_origen"]
+            if futuro is not None and futuro.done():
+                p_obj["sondeo_origen"] = None
+                try:
+                    log_partido(nombre_partido, f"      Origen S{p_obj['idx']}: {futuro.result()['razon']}")
+                except Exception:
+                    pass
+        
         # C) HEALTH CHECK AGRESIVO
         procesos_vivos = 0
         streams_congelados = []
         
         for p_obj in procesos:
-            if p_obj["estado"] == "dead":
+            if p_obj["estado"] != "ok":
                 continue
             
             if p_obj["proc"].poll() is None:
@@ -431,18 +714,85 @@ def grabar_con_rotacion_preventiva(fuentes_canal, ruta_base, nombre_partido,
                         p_obj["last_size"] = tamaño_actual
                         p_obj["last_check"] = now
                         procesos_vivos += 1
+                        actualizar_tasa_escritura(p_obj, now, tamaño_actual)
+                        
+                        # Muestra del borde vivo en segundo plano (delay actualizado)
+                        if now - p_obj["ultimo_muestreo_latencia"] >= INTERVALO_MUESTREO_LATENCIA:
+                            p_obj["ultimo_muestreo_latencia"] = now
+                            smart_selector.muestrear_latencia_async(p_obj["stream"])
                     else:
                         # CRÍTICO: 15s en lugar de 30s
                         if now - p_obj["last_check"] > UMBRAL_SIN_CRECIMIENTO:
                             log_partido(nombre_partido, f"   ❄️ S{p_obj['idx']} congelado {int(now - p_obj['last_check'])}s")
+                            
+                            # ¿Se congeló el origen o solo ffmpeg? (en segundo plano, se informa en C0)
+                            stream = p_obj["stream"]
+                            p_obj["sondeo_origen"] = _sondeos.submit(
+                                stream_health_monitor.verificar_playlist_en_vivo,
+                                stream.url,
+                                headers={'User-Agent': stream.ua, 'Referer': stream.referer},
+                                timeout=5,
+                                seguidor=stream.latencia
+                            )
                             streams_congelados.append(p_obj['idx'])
                             p_obj["estado"] = "dead"
+                            registrar_fin_proceso(p_obj, now, congelado=True)
                 except:
                     pass
             else:
                 p_obj["estado"] = "dead"
+                registrar_muerte_proceso(p_obj, now)
                 log_partido(nombre_partido, f"   ☠️ S{p_obj['idx']} murió")
         
+        # C2) CAMBIO DE VARIANTE en la misma master según throughput
+        for p_obj in [p for p in procesos if p["estado"] == "ok"]:
+            nuevo_idx = evaluar_cambio_variante(p_obj, now)
+            if nuevo_idx is None:
+                continue
+            
+            stream = p_obj["stream"]
+            anterior = stream.variantes[stream.variante_idx]
+            variante = stream.variantes[nuevo_idx]
+            flecha = "⬇️" if nuevo_idx > stream.variante_idx else "⬆️"
+            log_partido(nombre_partido, f"{flecha} S{p_obj['idx']}: {anterior} → {variante}")
+            
+            nuevo_s = smart_selector.candidato_en_variante(stream, nuevo_idx)
+            cambios_stream += 1
+            ruta_var = f"{ruta_base}_var{cambios_stream}.mp4"
+            proc_var = iniciar_grabacion_robusta(nuevo_s, ruta_var, nombre_partido, f" [VAR-{p_obj['idx']}]")
+            
+            if not proc_var:
+                p_obj["ventanas_degradadas"] = 0
+                continue
+            
+            # Índice propio, como rotación (100+) y rescate (200+): no compartir registro con la saliente
+            nuevo_obj = crear_registro_proceso(proc_var, ruta_var, nuevo_s, 300 + cambios_stream, time.time())
+            log_partido(nombre_partido, f"   S{p_obj['idx']} continúa como S{nuevo_obj['idx']}")
+            # Mismo token que la variante anterior: no extender su vida
+            if nuevo_obj["deadline_rotacion"] > p_obj["deadline_rotacion"]:
+                nuevo_obj["deadline_rotacion"] = p_obj["deadline_rotacion"]
+                nuevo_obj["origen_deadline"] = p_obj["origen_deadline"]
+            
+            # Overlap sin frenar el monitoreo: la anterior se detiene en C2b
+            p_obj["estado"] = "saliente"
+            p_obj["detener_en"] = now + OVERLAP_CAMBIO_VARIANTE
+            p_obj["etiqueta_salida"] = f"S{p_obj['idx']} ({anterior})"
+            procesos.append(nuevo_obj)
+        
+        # C2b) Detener (en segundo plano) las variantes salientes cumplido su overlap
+        for p_obj in procesos:
+            if p_obj["estado"] == "saliente" and now >= p_obj["detener_en"]:
+                p_obj["estado"] = "dead"
+                _sondeos.submit(detener_grabacion_suave, p_obj["proc"], nombre_partido, p_obj["etiqueta_salida"])
+                registrar_fin_proceso(p_obj, now)
+        
+        # C3) Cerrar las pestañas de fuentes sin grabaciones (rotadas, congeladas, muertas)
+        if sesiones:
+            sesiones.conservar(
+                p_obj["stream"].url_fuente for p_obj in procesos
+                if p_obj["estado"] == "ok" and getattr(p_obj["stream"], "url_fuente", None)
+            )
+        
         # D) RESCATE INMEDIATO si hay congelados
         if streams_congelados and procesos_vivos < MAX_STREAMS_PARALELOS:
             # Prevenir rescates infinitos
@@ -455,32 +805,41 @@ def grabar_con_rotacion_preventiva(fuentes_canal, ruta_base, nombre_partido,
             
             log_partido(nombre_partido, "🚨 RESCATE INMEDIATO")
             
-            nuevos = smart_selector.obtener_mejores_streams(fuentes_canal)
+            streams_vigentes = [p_obj["stream"] for p_obj in procesos if p_obj["estado"] == "ok"]
+            rescatados = 0
             
-            if nuevos:
-                # Reemplazar solo los congelados
-                for i, nuevo_s in enumerate(nuevos[:len(streams_congelados)]):
-                    cambios_stream += 1
-                    ruta_res = f"{ruta_base}_rescue{cambios_stream}.mp4"
-                    
-                    proc_res = iniciar_grabacion_robusta(
-                        nuevo_s, ruta_res, nombre_partido, f" [RESCUE-{i}]"
+            # Primero los espejos ya conocidos de los congelados (sin escanear), luego escaneo
+            espejos = [
+                alt for p_obj in procesos if p_obj["idx"] in streams_congelados
+                for alt in p_obj["stream"].alternativas
+            ]
+            
+            # Reemplazar solo los congelados, con el primer stream válido que aparezca
+            for nuevo_s in itertools.chain(espejos, smart_selector.iterar_mejores_streams(fuentes_canal)):
+                if es_duplicado(nuevo_s, streams_vigentes):
+                    continue
+                streams_vigentes.append(nuevo_s)
+                
+                cambios_stream += 1
+                ruta_res = f"{ruta_base}_rescue{cambios_stream}.mp4"
+                
+                proc_res = iniciar_grabacion_robusta(
+                    nuevo_s, ruta_res, nombre_partido, f" [RESCUE-{rescatados}]"
+                )
+                
+                if proc_res:
+                    procesos.append(
+                        crear_registro_proceso(proc_res, ruta_res, nuevo_s, 200 + cambios_stream, now)
                     )
-                    
-                    if proc_res:
-                        procesos.append({
-                            "proc": proc_res,
-                            "ruta": ruta_res,
-                            "stream": nuevo_s,
-                            "idx": 200 + cambios_stream,
-                            "estado": "ok",
-                            "last_check": now,
-                            "last_size": 0,
-                            "stream_id": 200 + cambios_stream,
-                            "tiempo_inicio": now
-                        })
-                        procesos_vivos += 1
+                    procesos_vivos += 1
+                    rescatados += 1
+                    if sesiones:
+                        sesiones.abrir(nuevo_s.fuente, nuevo_s.url_fuente)
                 
+                if rescatados >= len(streams_congelados):
+                    break
+            
+            if rescatados:
                 ultimo_rescate_time = now
                 rescates_consecutivos += 1
                 log_partido(nombre_partido, f"✅ Rescate {rescates_consecutivos}/{MAX_RESCATES_CONSECUTIVOS}")
@@ -491,7 +850,12 @@ def grabar_con_rotacion_preventiva(fuentes_canal, ruta_base, nombre_partido,
         
         # E) Log periódico
         if int(now) % 30 == 0:
-            log_partido(nombre_partido, f"📊 {procesos_vivos} streams vivos, fase: {fase_actual}")
+            carga = carga_host.obtener_metricas()
+            log_partido(nombre_partido, f"📊 {procesos_vivos} streams vivos, fase: {fase_actual}, "
+                                        f"concurrencia escaneo: {carga.get('concurrencia_escaneo', '-')}")
+            for p_obj in procesos:
+                if p_obj["estado"] == "ok" and p_obj["stream"].latencia.cantidad:
+                    log_partido(nombre_partido, f"   ⏱️ S{p_obj['idx']}: {p_obj['stream'].latencia.resumen()}")
     
     # Buffer final
     log_partido(nombre_partido, f"⏳ Buffer final {BUFFER_FIN_PARTIDO}s...")
@@ -499,8 +863,13 @@ def grabar_con_rotacion_preventiva(fuentes_canal, ruta_base, nombre_partido,
     
     # Detener todos
     for p_obj in procesos:
-        if p_obj["estado"] == "ok" and p_obj["proc"].poll() is None:
+        if p_obj["estado"] in ("ok", "saliente") and p_obj["proc"].poll() is None:
             detener_grabacion_suave(p_obj["proc"], nombre_partido, "final")
+            registrar_fin_proceso(p_obj, time.time())
+    
+    reputacion_fuentes.reputacion.guardar()
+    if sesiones:
+        sesiones.cerrar_todas()
     
     time.sleep(5)
     
@@ -538,9 +907,10 @@ def seleccionar_mejor_video(rutas, nombre_partido):
 
 # ================= GESTOR PRINCIPAL =================
 
-def gestionar_partido_v9(url_promiedos, url_sofascore, nombre_archivo, hora_inicio):
+def gestionar_partido_v9(url_promiedos, url_sofascore, nombre_archivo, hora_inicio, fuentes_iniciales=None):
     """
     Gestor v9 con scraper dinámico y rotación preventiva
+    fuentes_iniciales: fuentes ya obtenidas por lote (obtener_streams_para_partidos)
     """
     with _lock_partidos:
         if nombre_archivo in _partidos_activos:
@@ -554,7 +924,7 @@ def gestionar_partido_v9(url_promiedos, url_sofascore, nombre_archivo, hora_inic
     try:
         log_partido(nombre_archivo, f"📅 INICIANDO GESTIÓN v9.0")
         log_partido(nombre_archivo, f"   • Scraper dinámico de AngulismoTV")
-        log_partido(nombre_archivo, f"   • Rotación preventiva cada {ROTACION_PREVENTIVA_MINUTOS}min")
+        log_partido(nombre_archivo, f"   • Rotación preventiva según token (respaldo {ROTACION_PREVENTIVA_MINUTOS}min)")
         log_partido(nombre_archivo, f"   • Detección congelamiento: {UMBRAL_SIN_CRECIMIENTO}s")
         
         # Metadata
@@ -563,11 +933,18 @@ def gestionar_partido_v9(url_promiedos, url_sofascore, nombre_archivo, hora_inic
             log_partido(nombre_archivo, "❌ No se pudo obtener metadata")
             return
         
-        # Obtener fuentes dinámicamente
-        fuentes_canal = obtener_fuentes_dinamicas(url_promiedos)
+        # Obtener fuentes dinámicamente (si el lote no las trajo)
+        fuentes_canal = fuentes_iniciales or obtener_fuentes_dinamicas(url_promiedos)
+        
+        # Respaldo: canales de Promiedos ("Arg TV") contra el catálogo compilado de config_tv
+        if not fuentes_canal:
+            fuentes_canal = catalogo_canales.fuentes_para_canales(meta.get('canales'))
+            if fuentes_canal:
+                log_partido(nombre_archivo, f"📚 {len(fuentes_canal)} fuentes del catálogo para "
+                                            f"{', '.join(meta['canales'])}")
         
         if not fuentes_canal:
-            log_partido(nombre_archivo, "❌ No se obtuvieron fuentes de AngulismoTV")
+            log_partido(nombre_archivo, "❌ No se obtuvieron fuentes de AngulismoTV ni del catálogo")
             return
         
         # Calcular hora
@@ -584,11 +961,25 @@ def gestionar_partido_v9(url_promiedos, url_sofascore, nombre_archivo, hora_inic
         log_partido(nombre_archivo, f"⏰ Hora programada: {h_match.strftime('%H:%M:%S')}")
         log_partido(nombre_archivo, f"   Inicio grabación: {hora_inicio_real.strftime('%H:%M:%S')}")
         
-        # Esperar
-        sec_wait = (hora_inicio_real - datetime.now()).total_seconds()
+        # Esperar, redescubriendo fuentes en T-60 / T-20 / T-5
+        inicio_ts = hora_inicio_real.timestamp()
+        sec_wait = inicio_ts - time.time()
         if sec_wait > 0:
             log_partido(nombre_archivo, f"⏳ Esperando {int(sec_wait/60)}m hasta inicio...")
-            time.sleep(max(0, sec_wait))
+        
+        descubrimiento = descubrimiento_previo.DescubrimientoPrevio(
+            nombre_archivo,
+            lambda: redescubrir_fuentes(url_promiedos, meta.get('canales')),
+            fuentes_canal,
+            log=log_partido
+        )
+        fuentes_canal = descubrimiento.ejecutar_etapas(inicio_ts)
+        
+        # DNS/TLS listos para el escaneo y la auditoría del arranque
+        time.sleep(max(0, inicio_ts - precalentamiento.PRECALENTAR_ANTES_INICIO - time.time()))
+        candidatos_previos = descubrimiento.candidatos_listos(inicio_ts)
+        precalentar_fuentes(fuentes_canal, candidatos_previos)
+        time.sleep(max(0, inicio_ts - time.time()))
         
         with _lock_partidos:
             _partidos_activos[nombre_archivo]['estado'] = 'grabando'
@@ -601,7 +992,8 @@ def gestionar_partido_v9(url_promiedos, url_sofascore, nombre_archivo, hora_inic
         
         rutas_generadas = grabar_con_rotacion_preventiva(
             fuentes_canal, ruta_base, nombre_archivo,
-            url_promiedos, url_sofascore, ["NO_JUGANDO", "FINAL", "ENTRETIEMPO"]
+            url_promiedos, url_sofascore, ["NO_JUGANDO", "FINAL", "ENTRETIEMPO"],
+            candidatos_previos=candidatos_previos
         )
         
         # Procesar
@@ -639,13 +1031,16 @@ def gestionar_partido_v9(url_promiedos, url_sofascore, nombre_archivo, hora_inic
 
 if __name__ == "__main__":
     setup_directorios()
+    if precalentamiento.instalar_cache_dns():
+        print(f"🧭 Cache de DNS activa (TTL {precalentamiento.TTL_DNS}s)")
+    catalogo_canales.obtener_catalogo()
     
     print("\n" + "="*70)
     print("🚀 SISTEMA MAESTRO v9.0 - CORREGIDO")
     print("="*70)
     print("\n🎯 MEJORAS v9:")
     print("   • Scraper dinámico de AngulismoTV (sin config_tv.py)")
-    print("   • Rotación preventiva cada 10min")
+    print("   • Rotación preventiva según expiración de token")
     print("   • Detección congelamiento en 15s (antes 30s)")
     print("   • Validación de archivos antes de usar")
     print("   • Límite de rescates consecutivos")
@@ -661,6 +1056,15 @@ if __name__ == "__main__":
     
     hilos = []
     
+    # Una sola lectura de la agenda para toda la noche
+    try:
+        fuentes_por_partido = angulismo_scraper.obtener_streams_para_partidos(
+            [p['promiedos'] for p in PARTIDOS], preferir_canales=CANALES_PREFERIDOS
+        )
+    except Exception as e:
+        print(f"⚠️ Lote de AngulismoTV falló ({str(e)[:60]}), cada partido buscará sus fuentes")
+        fuentes_por_partido = {}
+    
     for partido in PARTIDOS:
         meta, fuente = obtener_metadata_con_scraper(
             partido['promiedos'],
@@ -671,7 +1075,8 @@ if __name__ == "__main__":
             t = threading.Thread(
                 target=gestionar_partido_v9,
                 args=(partido['promiedos'], partido.get('sofascore'),
-                      meta['nombre'], meta['hora']),
+                      meta['nombre'], meta['hora'],
+                      fuentes_por_partido.get(partido['promiedos'])),
                 daemon=False
             )
             t.start()
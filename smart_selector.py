@@ -1,30 +1,104 @@
 import threading
 import time
 import re
-import requests
 import warnings
-from datetime import datetime, timezone
-from dateutil import parser
 from urllib.parse import urljoin, urlparse, parse_qs
-from concurrent.futures import ThreadPoolExecutor
+import copy
+import hashlib
+import heapq
+import queue
+from concurrent.futures import ThreadPoolExecutor, Future
 from seleniumwire import webdriver 
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import TimeoutException
+import motor_auditoria
+import hls_parser
+import latencia_borde
+import reputacion_fuentes
+import pool_escaneo
+import carga_host
+import precalentamiento
+import extractor_ytdlp
 
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 warnings.filterwarnings("ignore", category=RuntimeWarning)
 warnings.filterwarnings("ignore", message=".*pkg_resources.*")
 
 # ============ CONFIGURACIÓN OPTIMIZADA ============
-MAX_WORKERS = 3
+MAX_WORKERS = None  # None = según la carga de la máquina (carga_host)
+ESCANEO_EN_PROCESOS = True  # Chrome en pool_escaneo (procesos aparte) en lugar de hilos locales
 TIMEOUT_PAGINA = 40  # Aumentado
-ESPERA_CLAPPR = 8    # Tiempo para que Clappr inicie
+ESPERA_CLAPPR = 8    # Máximo a esperar la señal de reproductor listo
+ESPERA_M3U8 = 25              # Búsqueda del playlist en el tráfico tras reproducir
+ESPERA_PLAYLIST_FINAL = 15    # Si solo apareció el master: esperar la variante
+ESPERA_REINTENTO_FINAL = 10   # Si no apareció nada: último intento
+# Peor caso de capturar_stream (carga + reproductor + búsquedas + pausas entre ellas)
+DURACION_MAXIMA_CAPTURA = (
+    TIMEOUT_PAGINA + ESPERA_CLAPPR + 2 + ESPERA_M3U8
+    + max(5 + ESPERA_PLAYLIST_FINAL, 3 + ESPERA_REINTENTO_FINAL)
+)
+INTERVALO_SONDEO_REPRODUCTOR = 0.25
 TIMEOUT_AUDITAR = 10
 MAX_INTENTOS_AUDITAR = 2
+MAX_NIVELES_MASTER = 2  # master → variante (→ variante anidada)
+COINCIDENCIAS_HUELLA = 3  # Segmentos consecutivos (ruta + secuencia) iguales para declarar espejo
+
+# Escalera de calidades: la mejor variante <= CALIDAD_OBJETIVO que el throughput sostenga
+CALIDAD_OBJETIVO = 720            # Altura máxima deseada (None = sin límite)
+MARGEN_THROUGHPUT = 1.3           # Exigir 30% de throughput por encima del bitrate nominal
+
+# Auditoría profunda: descargar los últimos segmentos y medir entrega real
+AUDITORIA_PROFUNDA = True
+SEGMENTOS_AUDITORIA_PROFUNDA = 2
+TIMEOUT_SEGMENTO = 15
+FACTOR_TIEMPO_REAL_MINIMO = 1.5   # Descargar al menos 1.5x más rápido que tiempo real
+PENALIZACION_STALL = 40           # Candidato que descarga más lento que tiempo real
+PENALIZACION_SIN_SEGMENTOS = 50   # Playlist OK pero ningún segmento descargable
+PENALIZACION_POR_SEG_TTFB = 10    # Por cada segundo de TTFB por encima de 0.5s
+PENALIZACION_POR_SEG_REFRESCO = 5 # Por cada segundo de refresco de playlist por encima de 1s
+
+# Perfil liviano: cortar a nivel de red lo que no hace falta para capturar el m3u8
+PERFIL_LIGERO = True
+DOMINIOS_BLOQUEADOS = (
+    'doubleclick.net', 'googlesyndication.com', 'googleadservices.com', 'googletagmanager.com',
+    'google-analytics.com', 'googletagservices.com', 'adservice.google.com', 'facebook.net',
+    'facebook.com', 'twitter.com', 'hotjar.com', 'scorecardresearch.com', 'amazon-adsystem.com',
+    'adnxs.com', 'taboola.com', 'outbrain.com', 'popads.net', 'popcash.net', 'propellerads.com',
+    'exoclick.com', 'juicyads.com', 'adsterra.com', 'histats.com', 'disqus.com',
+    'cloudflareinsights.com', 'yandex.ru', 'mc.yandex.com', 'a-ads.com', 'onclickads.net',
+)
+PALABRAS_HOST_BLOQUEADAS = ('adserver', 'popunder', 'tracker', 'analytics', 'adsco', 'banner')
+EXTENSIONES_BLOQUEADAS = (
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg', '.ico',
+    '.woff', '.woff2', '.ttf', '.otf', '.eot', '.css',
+)
+
+# Latencia: varias lecturas del playlist para medir el borde vivo y la cadencia
+MUESTRAS_LATENCIA_AUDITORIA = 3   # Lecturas totales durante la auditoría
+INTERVALO_MUESTRA_LATENCIA_MAX = 3.0
+TOLERANCIA_DERIVA_CADENCIA = 1.1  # Origen hasta 10% más lento que tiempo real sin penalizar
+PENALIZACION_POR_DERIVA_CADENCIA = 30
+
+TIMEOUT_AUDITORIA_TOTAL = (
+    (TIMEOUT_AUDITAR + motor_auditoria.BACKOFF_MAX) * MAX_INTENTOS_AUDITAR * (MAX_NIVELES_MASTER + 1)
+    + (TIMEOUT_SEGMENTO if AUDITORIA_PROFUNDA else 0)
+    + MUESTRAS_LATENCIA_AUDITORIA * (INTERVALO_MUESTRA_LATENCIA_MAX + TIMEOUT_AUDITAR)
+)
 # ==================================================
 
+class EscaneoCancelado(Exception):
+    """El consumidor ya tiene suficientes candidatos"""
+    pass
+
+def _pausa(segundos, cancelar=None):
+    """time.sleep interrumpible por el evento de cancelación"""
+    if cancelar is None:
+        time.sleep(segundos)
+    elif cancelar.wait(segundos):
+        raise EscaneoCancelado()
+
 class StreamCandidato:
     def __init__(self, fuente, url, ua, referer, cookies=None):
         self.fuente = fuente
@@ -35,100 +109,474 @@ class StreamCandidato:
         self.delay = 0
         self.score = -1
         self.bitrate = 0
+        self.url_fuente = None      # Página de origen (clave de reputación)
+        self.tiempo_escaneo = None  # Segundos que tardó el navegador en resolverlo
+        self.obtenido = time.time() # Emisión aproximada del token (puede preceder a la grabación)
+        # Auditoría profunda (None = no medido)
+        self.ttfb = None
+        self.velocidad_mbps = None
+        self.factor_tiempo_real = None
+        self.latencia_refresco = None
+        # Escalera de variantes si vino de un master (de mayor a menor bandwidth)
+        self.url_master = None
+        self.variantes = []
+        self.variante_idx = None
+        # Identidad del stream subyacente y espejos equivalentes colapsados
+        self.huella = None
+        self.alternativas = []
+        # Muestras del borde vivo (auditoría + grabación)
+        self.latencia = latencia_borde.SeguidorLatencia()
+    
+    def misma_senal(self, otro):
+        """True si ambos candidatos sirven los mismos segmentos (otro host/token)"""
+        return self.huella is not None and self.huella.equivalente(getattr(otro, 'huella', None))
 
-def auditar_stream(candidato):
-    """Auditoría con resolución de master playlist"""
-    for intento in range(MAX_INTENTOS_AUDITAR):
+_RE_COMPONENTE_TOKEN = re.compile(r'^(?=.*\d)(?=.*[a-zA-Z])[\w\-=~.]{32,}$')
+
+def normalizar_ruta_segmento(url):
+    """Path del segmento sin host, query ni componentes con forma de token"""
+    partes = [p for p in urlparse(url).path.split('/') if p]
+    if not partes:
+        return ''
+    directorio = [p for p in partes[:-1] if not _RE_COMPONENTE_TOKEN.match(p)]
+    return '/'.join(directorio + partes[-1:])
+
+class HuellaStream:
+    """
+    Huella del stream subyacente, independiente de host y token:
+    rutas normalizadas de la ventana con su media sequence + hash del último segmento
+    """
+    def __init__(self, rutas, hash_ultimo=None):
+        self.rutas = rutas              # {ruta normalizada: secuencia}
+        self.hash_ultimo = hash_ultimo
+    
+    @classmethod
+    def desde_playlist(cls, playlist):
+        return cls({normalizar_ruta_segmento(s.url): s.secuencia for s in playlist.segmentos})
+    
+    def equivalente(self, otra):
+        """
+        Mismo contenido del último segmento, o una racha de COINCIDENCIAS_HUELLA
+        segmentos consecutivos con la misma ruta y secuencia (una sola coincidencia
+        no alcanza: empaquetadores que nombran por timestamp o número se repiten
+        entre canales del mismo origen)
+        """
+        if otra is None:
+            return False
+        if self.hash_ultimo and self.hash_ultimo == otra.hash_ultimo:
+            return True
+
+        comunes = sorted(s for ruta, s in self.rutas.items() if otra.rutas.get(ruta) == s)
+        racha = mejor = 0
+        for i, secuencia in enumerate(comunes):
+            racha = racha + 1 if i and secuencia == comunes[i - 1] + 1 else 1
+            mejor = max(mejor, racha)
+        return mejor >= COINCIDENCIAS_HUELLA
+
+def _headers_candidato(candidato):
+    referer = urlparse(candidato.referer)
+    return {
+        'User-Agent': candidato.ua, 
+        'Referer': candidato.referer,
+        'Origin': referer.scheme + '://' + referer.netloc,
+        'Accept': '*/*',
+        'Connection': 'keep-alive',
+    }
+
+def _playlist_valido(resp):
+    """Respuesta 200 con contenido m3u8 (si no, el motor reintenta)"""
+    return resp.status_code == 200 and len(resp.text) >= 50 and hls_parser.es_playlist(resp.text)
+
+CODECS_AUDIO = ('mp4a', 'ac-3', 'ec-3', 'opus')
+
+def _es_solo_audio(variante):
+    if not variante.codecs:
+        return False
+    return all(c.strip().lower().startswith(CODECS_AUDIO) for c in variante.codecs.split(','))
+
+def seleccionar_variante(variantes, throughput_mbps=None, calidad_objetivo=CALIDAD_OBJETIVO):
+    """
+    Elige en la escalera (ordenada de mayor a menor bandwidth) la variante a grabar:
+    la más alta que no supere la calidad objetivo y que el throughput medido sostenga.
+    Sin medición, la más alta dentro del objetivo. Retorna el índice o None.
+    """
+    if not variantes:
+        return None
+    
+    permitidas = [
+        i for i, v in enumerate(variantes)
+        if not calidad_objetivo or not v.altura or v.altura <= calidad_objetivo
+    ]
+    if not permitidas:
+        permitidas = [len(variantes) - 1]
+    
+    if not throughput_mbps:
+        return permitidas[0]
+    
+    for i in permitidas:
+        v = variantes[i]
+        if not v.bandwidth or v.mbps * MARGEN_THROUGHPUT <= throughput_mbps:
+            return i
+    return len(variantes) - 1
+
+def candidato_en_variante(candidato, idx):
+    """Copia del candidato apuntando a otra variante de la misma master (sin re-escaneo)"""
+    nuevo = copy.copy(candidato)
+    variante = candidato.variantes[idx]
+    nuevo.url = variante.url
+    nuevo.variante_idx = idx
+    nuevo.latencia = latencia_borde.SeguidorLatencia()
+    if variante.bandwidth:
+        nuevo.bitrate = variante.mbps
+    return nuevo
+
+def _evaluar_playlist(candidato, playlist):
+    """
+    Puntúa el candidato a partir del playlist parseado.
+    Retorna la URL de la variante si es un master que hay que resolver.
+    """
+    # Anti-DRM
+    if playlist.tiene_drm:
+        candidato.score = -1
+        return None
+
+    # CRÍTICO: Si es master playlist, resolver al playlist final
+    if playlist.es_master:
+        if not playlist.variantes:
+            candidato.score = -1
+            return None
+        candidato.url_master = playlist.url
+        candidato.variantes = [v for v in playlist.variantes_ordenadas() if not _es_solo_audio(v)] \
+            or playlist.variantes_ordenadas()
+        candidato.variante_idx = seleccionar_variante(candidato.variantes)
+        variante = candidato.variantes[candidato.variante_idx]
+        if variante.bandwidth:
+            candidato.bitrate = variante.mbps
+        return variante.url
+
+    if not playlist.segmentos:
+        candidato.score = -1
+        return None
+    
+    candidato.huella = HuellaStream.desde_playlist(playlist)
+    
+    # Bitrate (del master si vino de uno)
+    if not candidato.bitrate:
+        candidato.bitrate = 2.0
+
+    # Delay respecto del borde vivo (primera muestra; se refina con más lecturas)
+    candidato.latencia.registrar(playlist)
+    candidato.delay = candidato.latencia.delay
+    
+    candidato.score = (100 - min(candidato.delay, 100)) + (candidato.bitrate * 5)
+    
+    if candidato.score > 0:
+        print(f"   ✅ {candidato.fuente}: OK (Delay: {candidato.delay:.1f}s, Bitrate: {candidato.bitrate:.1f}Mbps)")
+        print(f"      URL final: {candidato.url[:80]}...")
+    return None
+
+def auditar_stream_async(candidato, profundidad=0):
+    """
+    Auditoría no bloqueante sobre el motor compartido.
+    Retorna un Future que se completa con el candidato ya puntuado.
+    """
+    resultado = Future()
+    motor = motor_auditoria.obtener_motor()
+    
+    futuro_http = motor.get(
+        candidato.url,
+        headers=_headers_candidato(candidato),
+        cookies=candidato.cookies,
+        timeout=TIMEOUT_AUDITAR,
+        intentos=MAX_INTENTOS_AUDITAR,
+        validar=_playlist_valido
+    )
+    
+    def _al_responder(f):
         try:
-            headers = {
-                'User-Agent': candidato.ua, 
-                'Referer': candidato.referer,
-                'Origin': urlparse(candidato.referer).scheme + '://' + urlparse(candidato.referer).netloc,
-                'Accept': '*/*',
-                'Connection': 'keep-alive',
-            }
-            
-            session = requests.Session()
-            for k, v in candidato.cookies.items():
-                session.cookies.set(k, v)
-            
-            resp = session.get(
-                candidato.url, 
-                headers=headers, 
-                timeout=TIMEOUT_AUDITAR, 
-                allow_redirects=True, 
-                verify=False
-            )
-            
-            if resp.status_code != 200:
-                if intento < MAX_INTENTOS_AUDITAR - 1:
-                    time.sleep(2)
-                    continue
+            resp = f.result()
+            if not _playlist_valido(resp):
                 candidato.score = -1
+                motor_auditoria.resolver(resultado, candidato)
                 return
-
-            m3u8_txt = resp.text
             
-            # Validación
-            if len(m3u8_txt) < 50 or '#EXTM3U' not in m3u8_txt:
-                if intento < MAX_INTENTOS_AUDITAR - 1: 
-                    time.sleep(2)
-                    continue
-                candidato.score = -1
-                return
+            playlist = hls_parser.parsear_playlist(resp.text, resp.url or candidato.url)
+            url_variante = _evaluar_playlist(candidato, playlist)
+        except Exception:
+            candidato.score = -1
+            motor_auditoria.resolver(resultado, candidato)
+            return
+        
+        if url_variante and profundidad < MAX_NIVELES_MASTER:
+            print(f"      🔀 Resolviendo master → {url_variante[:80]}...")
+            candidato.url = url_variante
+            motor_auditoria.encadenar(auditar_stream_async(candidato, profundidad + 1), resultado)
+            return
+        
+        if url_variante:
+            candidato.score = -1
+        
+        if candidato.score > 0:
+            motor_auditoria.encadenar(_completar_auditoria_async(candidato, playlist), resultado)
+            return
+        
+        motor_auditoria.resolver(resultado, candidato)
+    
+    futuro_http.add_done_callback(_al_responder)
+    return resultado
 
-            # Anti-DRM
-            if any(p in m3u8_txt.lower() for p in ['method=sample-aes', 'widevine', 'playready']):
-                candidato.score = -1
-                return
+def _headers_segmento(headers, segmento):
+    """Agrega Range si el segmento es un byterange"""
+    if not segmento.byterange:
+        return headers
+    longitud, offset = segmento.byterange
+    return dict(headers, Range=f"bytes={offset}-{offset + longitud - 1}")
 
-            # CRÍTICO: Si es master playlist, resolver al playlist final
-            if '#EXT-X-STREAM-INF' in m3u8_txt and 'tracks-v1a1' in m3u8_txt:
-                # Es un master, extraer URL del primer variant
-                for line in m3u8_txt.split('\n'):
-                    line = line.strip()
-                    if line and not line.startswith('#'):
-                        # Esta es la URL del playlist
-                        playlist_url = urljoin(candidato.url, line)
-                        print(f"      🔀 Resolviendo master → {playlist_url[:80]}...")
-                        
-                        # Actualizar URL y volver a auditar
-                        candidato.url = playlist_url
-                        return auditar_stream(candidato)  # Recursión para auditar el playlist final
-
-            # Bitrate
-            bitrate_match = re.search(r'BANDWIDTH[=:](\d+)', m3u8_txt, re.IGNORECASE)
-            candidato.bitrate = int(bitrate_match.group(1)) / 1_000_000 if bitrate_match else 2.0
-
-            # Delay
-            match = re.search(r'#EXT-X-PROGRAM-DATE-TIME:(.*)', m3u8_txt)
-            if match:
-                try:
-                    stream_time = parser.parse(match.group(1).strip())
-                    diff = (datetime.now(timezone.utc) - stream_time).total_seconds()
-                    candidato.delay = diff if 0 <= diff <= 300 else 10.0
-                except: 
-                    candidato.delay = 10.0
-            else:
-                candidato.delay = 8.0
-            
-            candidato.score = (100 - min(candidato.delay, 100)) + (candidato.bitrate * 5)
+def _aplicar_mediciones(candidato, segmentos, respuestas, refresco, tiempo_total):
+    """Ajusta el score con TTFB, throughput y latencia de refresco medidos"""
+    ttfbs = []
+    bytes_total = 0
+    duracion_media = 0.0
+    
+    for segmento, (resp, error) in zip(segmentos, respuestas):
+        if error is not None or resp.status_code not in (200, 206) or not resp.content:
+            continue
+        ttfbs.append(resp.elapsed.total_seconds())
+        bytes_total += len(resp.content)
+        duracion_media += segmento.duracion
+    
+    # Hash del segmento más reciente descargado (huella de contenido)
+    if candidato.huella is not None:
+        for segmento, (resp, error) in reversed(list(zip(segmentos, respuestas))):
+            if error is None and resp.status_code in (200, 206) and resp.content:
+                candidato.huella.hash_ultimo = hashlib.sha1(resp.content).hexdigest()
+                break
+    
+    resp_refresco, error_refresco = refresco
+    if error_refresco is None and resp_refresco.status_code == 200:
+        candidato.latencia_refresco = resp_refresco.duracion_total
+        candidato.latencia.registrar(hls_parser.parsear_playlist(resp_refresco.text, resp_refresco.url))
+    
+    if not ttfbs:
+        candidato.score -= PENALIZACION_SIN_SEGMENTOS
+        print(f"   ⚠️ {candidato.fuente}: Segmentos no descargables (Score: {candidato.score:.1f})")
+        return
+    
+    tiempo_total = max(tiempo_total, 0.001)
+    candidato.ttfb = sum(ttfbs) / len(ttfbs)
+    candidato.velocidad_mbps = (bytes_total * 8) / tiempo_total / 1_000_000
+    candidato.factor_tiempo_real = duracion_media / tiempo_total
+    
+    # Bajar en la escalera si el CDN no sostiene la variante elegida
+    if candidato.variantes and candidato.variante_idx is not None:
+        idx = seleccionar_variante(candidato.variantes, candidato.velocidad_mbps)
+        if idx > candidato.variante_idx:
+            anterior = candidato.variantes[candidato.variante_idx]
+            variante = candidato.variantes[idx]
+            print(f"   ⬇️ {candidato.fuente}: {anterior} → {variante} ({candidato.velocidad_mbps:.1f}Mbps medidos)")
+            if anterior.bandwidth and variante.bandwidth:
+                # Mismo throughput, menos bytes por segundo de video
+                candidato.factor_tiempo_real *= anterior.mbps / variante.mbps
+                candidato.score -= (anterior.mbps - variante.mbps) * 5
+            candidato.url = variante.url
+            candidato.variante_idx = idx
+            if variante.bandwidth:
+                candidato.bitrate = variante.mbps
+    
+    penalizacion = 0.0
+    if candidato.factor_tiempo_real < 1.0:
+        penalizacion += PENALIZACION_STALL
+    elif candidato.factor_tiempo_real < FACTOR_TIEMPO_REAL_MINIMO:
+        faltante = (FACTOR_TIEMPO_REAL_MINIMO - candidato.factor_tiempo_real) / (FACTOR_TIEMPO_REAL_MINIMO - 1.0)
+        penalizacion += PENALIZACION_STALL * faltante
+    
+    penalizacion += max(0.0, candidato.ttfb - 0.5) * PENALIZACION_POR_SEG_TTFB
+    if candidato.latencia_refresco is not None:
+        penalizacion += max(0.0, candidato.latencia_refresco - 1.0) * PENALIZACION_POR_SEG_REFRESCO
+    
+    candidato.score -= penalizacion
+    
+    print(
+        f"   📶 {candidato.fuente}: TTFB {candidato.ttfb:.2f}s, "
+        f"{candidato.velocidad_mbps:.1f}Mbps ({candidato.factor_tiempo_real:.1f}x tiempo real), "
+        f"Score: {candidato.score:.1f}"
+    )
+
+def auditoria_profunda_async(candidato, playlist):
+    """
+    Descarga los últimos segmentos y re-lee el playlist para medir
+    TTFB, velocidad frente a la duración del segmento y latencia de refresco.
+    Retorna un Future con el candidato re-puntuado.
+    """
+    resultado = Future()
+    segmentos = playlist.segmentos_recientes(SEGMENTOS_AUDITORIA_PROFUNDA)
+    
+    if not segmentos:
+        motor_auditoria.resolver(resultado, candidato)
+        return resultado
+    
+    motor = motor_auditoria.obtener_motor()
+    headers = _headers_candidato(candidato)
+    inicio = time.monotonic()
+    
+    futuros_segmentos = [
+        motor.get(
+            seg.url,
+            headers=_headers_segmento(headers, seg),
+            cookies=candidato.cookies,
+            timeout=TIMEOUT_SEGMENTO
+        )
+        for seg in segmentos
+    ]
+    futuro_refresco = motor.get(
+        candidato.url, headers=headers, cookies=candidato.cookies, timeout=TIMEOUT_AUDITAR
+    )
+    
+    def _medir(f_segmentos):
+        tiempo_total = time.monotonic() - inicio
+        
+        def _finalizar(f_refresco):
+            try:
+                _aplicar_mediciones(
+                    candidato, segmentos, f_segmentos.result(), f_refresco.result()[0], tiempo_total
+                )
+            except Exception:
+                pass
+            motor_auditoria.resolver(resultado, candidato)
+        
+        motor_auditoria.combinar([futuro_refresco]).add_done_callback(_finalizar)
+    
+    motor_auditoria.combinar(futuros_segmentos).add_done_callback(_medir)
+    return resultado
+
+def muestrear_latencia_async(candidato, muestras=1, intervalo=0):
+    """
+    Lee el playlist del candidato `muestras` veces, espaciadas `intervalo` s,
+    alimentando su seguidor de latencia. Retorna un Future con el candidato.
+    """
+    resultado = Future()
+    motor = motor_auditoria.obtener_motor()
+    headers = _headers_candidato(candidato)
+    
+    def _leer(restantes):
+        def _registrar(f):
+            try:
+                resp = f.result()
+                if resp.status_code == 200:
+                    candidato.latencia.registrar(hls_parser.parsear_playlist(resp.text, resp.url))
+            except Exception:
+                pass
             
-            if candidato.score > 0:
-                print(f"   ✅ {candidato.fuente}: OK (Delay: {candidato.delay:.1f}s, Bitrate: {candidato.bitrate:.1f}Mbps)")
-                print(f"      URL final: {candidato.url[:80]}...")
+            if restantes > 1:
+                motor.programar(intervalo, lambda: _leer(restantes - 1))
+            else:
+                motor_auditoria.resolver(resultado, candidato)
+        
+        motor.get(
+            candidato.url, headers=headers, cookies=candidato.cookies, timeout=TIMEOUT_AUDITAR
+        ).add_done_callback(_registrar)
+    
+    if muestras <= 0:
+        motor_auditoria.resolver(resultado, candidato)
+    else:
+        motor.programar(intervalo, lambda: _leer(muestras))
+    return resultado
+
+def _aplicar_latencia(candidato):
+    """Re-puntúa con el delay y la deriva de cadencia acumulados por el seguidor"""
+    nuevo = candidato.latencia.delay
+    if nuevo is not None:
+        candidato.score += min(candidato.delay, 100) - min(nuevo, 100)
+        candidato.delay = nuevo
+    
+    deriva = candidato.latencia.deriva_cadencia
+    if deriva is not None and deriva > TOLERANCIA_DERIVA_CADENCIA:
+        candidato.score -= (deriva - 1.0) * PENALIZACION_POR_DERIVA_CADENCIA
+    
+    print(f"   ⏱️ {candidato.fuente}: {candidato.latencia.resumen()} (Score: {candidato.score:.1f})")
+
+def _completar_auditoria_async(candidato, playlist):
+    """Auditoría profunda (si está activa) + lecturas extra del borde vivo"""
+    resultado = Future()
+    intervalo = min((playlist.target_duration or 2.0) / 2, INTERVALO_MUESTRA_LATENCIA_MAX)
+    
+    def _muestrear(_=None):
+        if candidato.score <= 0:
+            motor_auditoria.resolver(resultado, candidato)
+            return
+        
+        faltan = MUESTRAS_LATENCIA_AUDITORIA - candidato.latencia.cantidad
+        if faltan <= 0:
+            _finalizar()
             return
+        muestrear_latencia_async(candidato, faltan, intervalo).add_done_callback(_finalizar)
+    
+    def _finalizar(_=None):
+        try:
+            _aplicar_latencia(candidato)
+        except Exception:
+            pass
+        motor_auditoria.resolver(resultado, candidato)
+    
+    if AUDITORIA_PROFUNDA:
+        auditoria_profunda_async(candidato, playlist).add_done_callback(_muestrear)
+    else:
+        _muestrear()
+    return resultado
+
+def medir_throughput(candidato, url_playlist=None):
+    """
+    Mbps medidos descargando el último segmento de un playlist de media
+    (por defecto el del candidato). Retorna None si no se pudo medir.
+    """
+    return medir_segmento(candidato, url_playlist)[0]
 
-        except requests.Timeout:
-            if intento < MAX_INTENTOS_AUDITAR - 1: 
-                time.sleep(2)
-        except Exception as e:
-            if intento < MAX_INTENTOS_AUDITAR - 1: 
-                time.sleep(2)
+def medir_segmento(candidato, url_playlist=None):
+    """
+    Descarga el último segmento del playlist de media.
+    Retorna (throughput_mbps, bitrate_mbps): velocidad de descarga y bitrate
+    real del segmento (bytes / EXTINF); (None, None) si no se pudo medir.
+    """
+    motor = motor_auditoria.obtener_motor()
+    headers = _headers_candidato(candidato)
     
-    candidato.score = -1
+    try:
+        resp = motor.get(
+            url_playlist or candidato.url,
+            headers=headers,
+            cookies=candidato.cookies,
+            timeout=TIMEOUT_AUDITAR,
+            validar=_playlist_valido
+        ).result(timeout=TIMEOUT_AUDITAR + 5)
+        
+        playlist = hls_parser.parsear_playlist(resp.text, resp.url)
+        if playlist is None or playlist.es_master or not playlist.segmentos:
+            return None, None
+        
+        segmento = playlist.ultimo_segmento
+        resp_seg = motor.get(
+            segmento.url,
+            headers=_headers_segmento(headers, segmento),
+            cookies=candidato.cookies,
+            timeout=TIMEOUT_SEGMENTO
+        ).result(timeout=TIMEOUT_SEGMENTO + 5)
+    except Exception:
+        return None, None
+    
+    if resp_seg.status_code not in (200, 206) or not resp_seg.content:
+        return None, None
+    bits = len(resp_seg.content) * 8
+    bitrate = bits / segmento.duracion / 1_000_000 if segmento.duracion else None
+    return bits / max(resp_seg.duracion_total, 0.001) / 1_000_000, bitrate
 
-def buscar_m3u8_en_trafico(driver, timeout=15):
+def auditar_stream(candidato):
+    """Auditoría con resolución de master playlist"""
+    try:
+        auditar_stream_async(candidato).result(timeout=TIMEOUT_AUDITORIA_TOTAL)
+    except Exception:
+        candidato.score = -1
+
+def buscar_m3u8_en_trafico(driver, timeout=15, cancelar=None):
     """Espera activa hasta que aparezca el m3u8"""
     inicio = time.time()
     urls_bloqueadas = [
@@ -172,7 +620,7 @@ def buscar_m3u8_en_trafico(driver, timeout=15):
                     elif '/index.m3u8' not in url and '.m3u8' in url:
                         print(f"      📺 Playlist detectado: {request.url[:80]}...")
                         # Seguir buscando por si hay uno mejor
-                        time.sleep(0.5)
+                        _pausa(0.5, cancelar)
                         continue
                     
                     # PRIORIDAD 3: Master playlist (último recurso)
@@ -181,10 +629,12 @@ def buscar_m3u8_en_trafico(driver, timeout=15):
                             print(f"      📋 Master detectado (guardando como respaldo)")
                             master_backup = (request.url, referer, ua, cookies)
         
+        except EscaneoCancelado:
+            raise
         except:
             pass
         
-        time.sleep(0.5)
+        _pausa(0.5, cancelar)
     
     # Si no encontramos playlist final, devolver master
     if master_backup:
@@ -211,6 +661,63 @@ def intentar_reproducir_clappr(driver):
         except: 
             pass
 
+def _host_bloqueado(host):
+    if any(host == d or host.endswith('.' + d) for d in DOMINIOS_BLOQUEADOS):
+        return True
+    return any(p in host for p in PALABRAS_HOST_BLOQUEADAS)
+
+def _interceptor_ligero(request):
+    """request_interceptor de selenium-wire: aborta publicidad, trackers y recursos estáticos"""
+    url = urlparse(request.url)
+    host = url.netloc.lower().split(':')[0]
+    if _host_bloqueado(host) or url.path.lower().endswith(EXTENSIONES_BLOQUEADAS):
+        request.abort()
+
+def aplicar_perfil_ligero(driver):
+    """Bloqueo a nivel de red + sin popups (window.open)"""
+    driver.request_interceptor = _interceptor_ligero
+    try:
+        driver.execute_cdp_cmd(
+            'Page.addScriptToEvaluateOnNewDocument',
+            {'source': 'window.open = function() { return null; };'}
+        )
+    except Exception:
+        pass
+
+SCRIPT_VIDEO_LISTO = (
+    "return Array.from(document.querySelectorAll('video')).some(v => v.readyState >= 1);"
+)
+
+def esperar_reproductor(driver, timeout=ESPERA_CLAPPR, cancelar=None):
+    """
+    Espera la señal de reproductor listo en lugar de un sleep fijo:
+    primer request .m3u8 (también desde iframes) o un <video> con metadata.
+    Retorna 'm3u8', 'video' o None si se agotó el timeout.
+    """
+    limite = time.time() + timeout
+    
+    while time.time() < limite:
+        try:
+            if any('.m3u8' in r.url.lower() for r in driver.requests):
+                return 'm3u8'
+            if driver.execute_script(SCRIPT_VIDEO_LISTO):
+                return 'video'
+        except Exception:
+            pass
+        _pausa(INTERVALO_SONDEO_REPRODUCTOR, cancelar)
+    
+    return None
+
+def pausar_reproduccion(driver):
+    """Silencia y pausa el video (pestañas que quedan abiertas entre refrescos)"""
+    try:
+        driver.execute_script(
+            "document.querySelectorAll('video').forEach(v => { v.muted=true; v.pause(); });"
+            "if(window.player && window.player.pause) { window.player.pause(); }"
+        )
+    except:
+        pass
+
 def obtener_opciones_chrome():
     """Chrome optimizado"""
     opts = Options()
@@ -234,82 +741,116 @@ def obtener_opciones_chrome():
     
     return opts
 
-def extraer_de_web(nombre, url_web, resultados):
-    """Extracción optimizada para streamtpcloud"""
-    print(f"🕵️  Escaneando {nombre}...")
+def crear_driver():
+    """Chrome con selenium-wire (y perfil liviano si está activo)"""
+    seleniumwire_options = {
+        'disable_encoding': True, 
+        'connection_timeout': 30,
+        'verify_ssl': False,
+    }
     
-    driver = None
+    driver = webdriver.Chrome(
+        service=Service(ChromeDriverManager().install()), 
+        options=obtener_opciones_chrome(), 
+        seleniumwire_options=seleniumwire_options
+    )
+    
+    driver.set_page_load_timeout(TIMEOUT_PAGINA)
+    if PERFIL_LIGERO:
+        aplicar_perfil_ligero(driver)
+    return driver
+
+def capturar_stream(driver, nombre, url_web, cancelar=None):
+    """
+    Carga la página en un driver ya abierto y captura el m3u8 del tráfico.
+    Retorna un StreamCandidato SIN auditar (o None). Puede lanzar EscaneoCancelado.
+    """
+    inicio = time.time()
+    candidato = None
+    
+    # PASO 1: Cargar página
     try:
-        seleniumwire_options = {
-            'disable_encoding': True, 
-            'connection_timeout': 30,
-            'verify_ssl': False,
-        }
-        
-        driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()), 
-            options=obtener_opciones_chrome(), 
-            seleniumwire_options=seleniumwire_options
-        )
-        
-        driver.set_page_load_timeout(TIMEOUT_PAGINA)
-        
-        # PASO 1: Cargar página
-        try:
-            del driver.requests
-            driver.get(url_web)
-        except TimeoutException:
-            print(f"   ⏱️ {nombre}: Timeout carga (continuando)")
-        
-        # PASO 2: Esperar que Clappr cargue
-        print(f"      ⏳ Esperando Clappr ({ESPERA_CLAPPR}s)...")
-        time.sleep(ESPERA_CLAPPR)
-        
-        # PASO 3: Intentar reproducir
+        del driver.requests
+        driver.get(url_web)
+    except TimeoutException:
+        print(f"   ⏱️ {nombre}: Timeout carga (continuando)")
+    
+    # PASO 2: Esperar que Clappr cargue (señal de reproductor, máx ESPERA_CLAPPR)
+    inicio_espera = time.time()
+    senal = esperar_reproductor(driver, ESPERA_CLAPPR, cancelar)
+    if senal:
+        print(f"      ⚡ Reproductor listo ({senal}) en {time.time() - inicio_espera:.1f}s")
+    else:
+        print(f"      ⏳ Sin señal de reproductor tras {ESPERA_CLAPPR}s")
+    
+    # PASO 3: Intentar reproducir
+    intentar_reproducir_clappr(driver)
+    if senal != 'm3u8':
+        _pausa(2, cancelar)
+    
+    # PASO 4: Esperar y buscar m3u8 activamente (ESPERA_M3U8 para capturar playlist final)
+    print(f"      🔍 Buscando playlist final en tráfico de red...")
+    m3u8, ref, ua, cookies = buscar_m3u8_en_trafico(driver, timeout=ESPERA_M3U8, cancelar=cancelar)
+    
+    # PASO 5: Si solo capturamos master, esperar a que aparezca el playlist final
+    if m3u8 and '/index.m3u8' in m3u8.lower():
+        print(f"      ⏳ Master detectado, esperando playlist final...")
+        _pausa(5, cancelar)  # Dar tiempo a que Clappr cargue el playlist
         intentar_reproducir_clappr(driver)
-        time.sleep(2)
-        
-        # PASO 4: Esperar y buscar m3u8 activamente (aumentado a 25s para capturar playlist final)
-        print(f"      🔍 Buscando playlist final en tráfico de red...")
-        m3u8, ref, ua, cookies = buscar_m3u8_en_trafico(driver, timeout=25)
-        
-        # PASO 5: Si solo capturamos master, esperar a que aparezca el playlist final
-        if m3u8 and '/index.m3u8' in m3u8.lower():
-            print(f"      ⏳ Master detectado, esperando playlist final...")
-            time.sleep(5)  # Dar tiempo a que Clappr cargue el playlist
-            intentar_reproducir_clappr(driver)
-            # Buscar específicamente el playlist final
-            m3u8_final, ref2, ua2, cookies2 = buscar_m3u8_en_trafico(driver, timeout=15)
-            if m3u8_final and 'tracks-v1a1' in m3u8_final.lower():
-                print(f"      ✅ Playlist final capturado!")
-                m3u8, ref, ua, cookies = m3u8_final, ref2, ua2, cookies2
-            else:
-                print(f"      ⚠️ Usando master (no se pudo capturar playlist final)")
-        
-        # PASO 6: Si no hay nada, reintento final
-        if not m3u8:
-            print(f"      🔄 No detectado, reintento final...")
-            intentar_reproducir_clappr(driver)
-            time.sleep(3)
-            intentar_reproducir_clappr(driver)
-            m3u8, ref, ua, cookies = buscar_m3u8_en_trafico(driver, timeout=10)
+        # Buscar específicamente el playlist final
+        m3u8_final, ref2, ua2, cookies2 = buscar_m3u8_en_trafico(driver, timeout=ESPERA_PLAYLIST_FINAL, cancelar=cancelar)
+        if m3u8_final and 'tracks-v1a1' in m3u8_final.lower():
+            print(f"      ✅ Playlist final capturado!")
+            m3u8, ref, ua, cookies = m3u8_final, ref2, ua2, cookies2
+        else:
+            print(f"      ⚠️ Usando master (no se pudo capturar playlist final)")
+    
+    # PASO 6: Si no hay nada, reintento final
+    if not m3u8:
+        print(f"      🔄 No detectado, reintento final...")
+        intentar_reproducir_clappr(driver)
+        _pausa(3, cancelar)
+        intentar_reproducir_clappr(driver)
+        m3u8, ref, ua, cookies = buscar_m3u8_en_trafico(driver, timeout=ESPERA_REINTENTO_FINAL, cancelar=cancelar)
+    
+    # PASO 6: Validar y agregar
+    if m3u8:
+        if not m3u8.startswith('http'): 
+            m3u8 = urljoin(driver.current_url, m3u8)
         
-        # PASO 6: Validar y agregar
-        if m3u8:
-            if not m3u8.startswith('http'): 
-                m3u8 = urljoin(driver.current_url, m3u8)
-            
-            # Filtrar archivos estáticos
-            if any(ext in m3u8.lower() for ext in ['.mp4', '.avi', '.mkv']):
-                print(f"   ⚠️ {nombre}: Descartado (archivo estático)")
-            else:
-                cand = StreamCandidato(nombre, m3u8, ua, ref or driver.current_url, cookies)
-                auditar_stream(cand)
-                if cand.score > 0: 
-                    resultados.append(cand)
+        # Filtrar archivos estáticos
+        if any(ext in m3u8.lower() for ext in ['.mp4', '.avi', '.mkv']):
+            print(f"   ⚠️ {nombre}: Descartado (archivo estático)")
         else:
-            print(f"   ❌ {nombre}: Sin stream detectado")
+            candidato = StreamCandidato(nombre, m3u8, ua, ref or driver.current_url, cookies)
+            candidato.url_fuente = url_web
+            candidato.tiempo_escaneo = time.time() - inicio
+    else:
+        print(f"   ❌ {nombre}: Sin stream detectado")
+    
+    return candidato
 
+def extraer_candidato(nombre, url_web, cancelar=None):
+    """
+    Extracción optimizada para streamtpcloud
+    Retorna un StreamCandidato SIN auditar (o None)
+    cancelar: threading.Event opcional para abortar el escaneo en curso
+    """
+    if cancelar is not None and cancelar.is_set():
+        return None
+    
+    print(f"🕵️  Escaneando {nombre}...")
+    
+    inicio_escaneo = time.time()
+    candidato = None
+    driver = None
+    try:
+        driver = crear_driver()
+        candidato = capturar_stream(driver, nombre, url_web, cancelar)
+        if candidato:
+            candidato.tiempo_escaneo = time.time() - inicio_escaneo
+    except EscaneoCancelado:
+        print(f"   ⏹️ {nombre}: Escaneo cancelado")
     except Exception as e:
         print(f"   💀 {nombre}: Error - {str(e)[:80]}")
     finally:
@@ -318,38 +859,225 @@ def extraer_de_web(nombre, url_web, resultados):
                 driver.quit()
             except: 
                 pass
-        time.sleep(1)
+        if cancelar is None:
+            time.sleep(1)
+    
+    return candidato
+
+def escanear_fuente(nombre, url_web, cancelar=None):
+    """
+    Camino rápido con yt-dlp (sin navegador); si no resuelve, escaneo aislado
+    en el pool de procesos (o en este proceso si está desactivado)
+    """
+    candidato = extractor_ytdlp.resolver(nombre, url_web)
+    if candidato or (cancelar is not None and cancelar.is_set()):
+        return candidato
+
+    if ESCANEO_EN_PROCESOS:
+        return pool_escaneo.obtener_pool().escanear(nombre, url_web, cancelar)
+    return extraer_candidato(nombre, url_web, cancelar)
+
+def objetivo_fuente(url_web):
+    """Clave del embed real de una fuente (iframe decodificado del vc, sin tokens)"""
+    return reputacion_fuentes.clave_fuente(extractor_ytdlp.url_embed(url_web))
+
+def agrupar_fuentes_por_objetivo(lista_fuentes):
+    """
+    Colapsa opciones que apuntan al mismo iframe (mismo vc con otro &o=, o el
+    mismo global1.php?stream=... publicado en varios canales).
+    La primaria de cada grupo es la de mejor reputación (las muertas al final):
+    es la que planificar() evalúa en nombre del grupo.
+    Retorna: (primarias [(nombre, url)], {url_primaria: [(nombre, url) alternativas]})
+    """
+    grupos = {}
+    for nombre, url in lista_fuentes:
+        grupos.setdefault(objetivo_fuente(url), []).append((nombre, url))
+
+    reputacion = reputacion_fuentes.reputacion
+    for objetivo, grupo in grupos.items():
+        if len(grupo) > 1:
+            grupos[objetivo] = sorted(
+                grupo, key=lambda f: (not reputacion.esta_muerta(f[1]), reputacion.tasa_exito(f[1])), reverse=True
+            )
+
+    primarias = [g[0] for g in grupos.values()]
+    alternativas = {g[0][1]: g[1:] for g in grupos.values() if len(g) > 1}
+    return primarias, alternativas
+
+def escanear_con_alternativas(nombre, url_web, alternativas, cancelar=None, al_fallar=None):
+    """
+    Escanea la fuente; si no da candidato, prueba sus alternativas (mismo embed, otra página).
+    al_fallar(url): invocado por cada página que no dio candidato (no si se canceló)
+    """
+    intentos = [(nombre, url_web)] + list(alternativas)
+    for i, (nombre_intento, url_intento) in enumerate(intentos):
+        if cancelar is not None and cancelar.is_set():
+            break
+        if i:
+            print(f"   ↪️ {nombre}: probando alternativa {nombre_intento}")
+        candidato = escanear_fuente(nombre_intento, url_intento, cancelar)
+        if candidato:
+            return candidato
+        if al_fallar and not (cancelar is not None and cancelar.is_set()):
+            al_fallar(url_intento)
+    return None
+
+def extraer_de_web(nombre, url_web, resultados):
+    """Extrae y audita una fuente (API bloqueante)"""
+    cand = escanear_fuente(nombre, url_web)
+    if cand:
+        auditar_stream(cand)
+        if cand.score > 0: 
+            resultados.append(cand)
+
+def presupuesto_escaneo(plan, alternativas, workers):
+    """
+    Segundos máximos para que lleguen todos los resultados del plan: cada trabajo
+    puede recorrer su primaria y sus alternativas en serie (yt-dlp + escaneo de
+    página hasta el timeout del pool), repartidos en orden entre los workers,
+    más la auditoría final
+    """
+    por_pagina = extractor_ytdlp.TIMEOUT_YTDLP + (
+        pool_escaneo.TIMEOUT_TRABAJO_ESCANEO if ESCANEO_EN_PROCESOS else DURACION_MAXIMA_CAPTURA
+    )
+    libres = [0.0] * max(1, workers)
+    for _, url in plan:
+        inicio = heapq.heappop(libres)
+        heapq.heappush(libres, inicio + por_pagina * (1 + len(alternativas.get(url, ()))))
+    return max(libres) + TIMEOUT_AUDITORIA_TOTAL
+
+def iterar_mejores_streams(lista_fuentes, max_buenos=None, al_encontrar=None):
+    """
+    Generador: entrega candidatos auditados (score > 0) a medida que aparecen.
+    Los que llegan juntos se entregan de mayor a menor score.
+    max_buenos: cortar tras K candidatos válidos y cancelar los escaneos restantes
+    al_encontrar: callback opcional invocado con cada candidato entregado
+    """
+    if not lista_fuentes: 
+        return
+    
+    # Un escaneo por embed real: las opciones repetidas quedan como alternativas
+    primarias, alternativas = agrupar_fuentes_por_objetivo(lista_fuentes)
+    if len(primarias) < len(lista_fuentes):
+        print(f"   🧬 {len(lista_fuentes) - len(primarias)} opciones duplicadas colapsadas "
+              f"({len(lista_fuentes)} → {len(primarias)} escaneos)")
+    
+    # Orden y workers según historial (explorar/explotar)
+    reputacion = reputacion_fuentes.reputacion
+    max_workers = MAX_WORKERS or carga_host.concurrencia_escaneo()
+    plan, workers = reputacion.planificar(primarias, max_buenos=max_buenos, max_workers=max_workers)
+    total = len(plan)
+    if total < len(primarias):
+        print(f"   📉 {len(primarias) - total} fuentes con mala reputación omitidas")
+    
+    cancelar = threading.Event()
+    llegadas = queue.Queue()
+    
+    # Cada fuente deja exactamente un elemento en la cola: candidato auditado o None
+    def _auditar_al_extraer(f, url_fuente):
+        try:
+            cand = f.result()
+            fallo_sin_registrar = False
+        except Exception:
+            cand = None
+            fallo_sin_registrar = True
+        
+        if cancelar.is_set():
+            llegadas.put(None)
+            return
+        
+        # Las páginas que no dieron candidato ya se registraron (al_fallar)
+        if not cand:
+            if fallo_sin_registrar:
+                reputacion.registrar_escaneo(url_fuente, False)
+            llegadas.put(None)
+            return
+        
+        # Crédito a la página que resolvió (la primaria o una alternativa)
+        url_ganadora = cand.url_fuente or url_fuente
+        inicio_auditoria = time.time()
+        
+        def _registrar(a):
+            if cand.score > 0:
+                precalentamiento.precalentador.registrar_candidato(url_ganadora, cand.url)
+            reputacion.registrar_escaneo(
+                url_ganadora,
+                cand.score > 0,
+                score=cand.score,
+                tiempo_primer_segmento=(cand.tiempo_escaneo or 0) + time.time() - inicio_auditoria
+            )
+            llegadas.put(cand)
+        
+        auditar_stream_async(cand).add_done_callback(_registrar)
+    
+    executor = ThreadPoolExecutor(max_workers=workers)
+    for nombre, url in plan:
+        f = executor.submit(
+            escanear_con_alternativas, nombre, url, alternativas.get(url, []), cancelar,
+            lambda u: reputacion.registrar_escaneo(u, False)
+        )
+        f.add_done_callback(lambda f, url=url: _auditar_al_extraer(f, url))
+    
+    limite = time.time() + presupuesto_escaneo(plan, alternativas, workers)
+    
+    recibidos = 0
+    ya_entregados = []
+    
+    try:
+        while recibidos < total and time.time() < limite:
+            try:
+                lote = [llegadas.get(timeout=max(0.1, min(1.0, limite - time.time())))]
+            except queue.Empty:
+                continue
+            
+            # Drenar lo que haya llegado junto para entregarlo ordenado
+            while True:
+                try:
+                    lote.append(llegadas.get_nowait())
+                except queue.Empty:
+                    break
+            
+            recibidos += len(lote)
+            validos = [c for c in lote if c is not None and c.score > 0]
+            validos.sort(key=lambda x: x.score, reverse=True)
+            
+            for cand in validos:
+                # Espejo del mismo stream: queda como alternativa, no ocupa un lugar
+                original = next((e for e in ya_entregados if cand.misma_senal(e)), None)
+                if original is not None:
+                    original.alternativas.append(cand)
+                    print(f"   🔗 {cand.fuente}: mismo stream que {original.fuente} (alternativa)")
+                    continue
+                
+                ya_entregados.append(cand)
+                if al_encontrar:
+                    al_encontrar(cand)
+                yield cand
+                
+                if max_buenos and len(ya_entregados) >= max_buenos:
+                    return
+    finally:
+        cancelar.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        reputacion.guardar()
 
-def obtener_mejores_streams(lista_fuentes):
+def obtener_mejores_streams(lista_fuentes, max_buenos=None):
     """Retorna streams válidos ordenados"""
     if not lista_fuentes: 
         return []
     
-    candidatos = []
     total = len(lista_fuentes)
     
     print(f"\n{'='*70}")
     print(f"🔬 ANÁLISIS: {total} fuentes")
     print(f"{'='*70}")
     
-    workers = min(MAX_WORKERS, total)
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        futures = [
-            executor.submit(extraer_de_web, nombre, url, candidatos) 
-            for nombre, url in lista_fuentes
-        ]
-        
-        for f in futures:
-            try: 
-                f.result(timeout=TIMEOUT_PAGINA + 30)
-            except:
-                pass
-
-    validos = [c for c in candidatos if c.score > 0]
+    validos = list(iterar_mejores_streams(lista_fuentes, max_buenos=max_buenos))
     validos.sort(key=lambda x: x.score, reverse=True)
 
     if validos:
-        print(f"\n✅ {len(validos)} streams encontrados.")
+        alternativas = sum(len(c.alternativas) for c in validos)
+        print(f"\n✅ {len(validos)} streams encontrados ({alternativas} espejos colapsados).")
         print(f"🏆 MEJOR: {validos[0].fuente} (Score: {validos[0].score:.1f})")
         return validos
     
@@ -9,6 +9,7 @@ import json
 import re
 from datetime import datetime
 import time
+import nombres_equipos
 
 # Cache para evitar spam
 _cache_metadata = {}
@@ -74,6 +75,7 @@ def obtener_metadata_partido(url_sofascore, reintentos=3):
             # Extraer equipos
             team_1 = event.get('homeTeam', {}).get('shortName', 'Team1')
             team_2 = event.get('awayTeam', {}).get('shortName', 'Team2')
+            nombres_equipos.registrar_alias_de_equipos([event.get('homeTeam'), event.get('awayTeam')])
             nombre_archivo = f"{team_1}_vs_{team_2}".replace(" ", "_").replace("/", "-")
             
             # Extraer hora
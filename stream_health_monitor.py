@@ -11,6 +11,8 @@ import time
 import threading
 from datetime import datetime
 import json
+import hls_parser
+import motor_auditoria
 
 # ============ CONFIGURACIÓN ============
 
@@ -167,6 +169,55 @@ def capturar_frame_para_analisis(ruta_video, timestamp_segundos, output_path):
     except:
         return False
 
+def verificar_playlist_en_vivo(url, headers=None, secuencia_anterior=None, timeout=10, seguidor=None):
+    """
+    Verifica en el origen si el playlist sigue avanzando
+    seguidor: latencia_borde.SeguidorLatencia opcional que recibe la lectura como muestra
+    Retorna: dict con 'ok', 'secuencia' (último segmento) y 'razon'
+    """
+    resultado = {'ok': False, 'secuencia': None, 'razon': ''}
+    
+    try:
+        # Session compartida: reutiliza la conexión keep-alive al CDN
+        resp = motor_auditoria.obtener_motor().session.get(url, headers=headers, timeout=timeout)
+        
+        if resp.status_code != 200:
+            resultado['razon'] = f"HTTP {resp.status_code}"
+            return resultado
+        
+        playlist = hls_parser.parsear_playlist(resp.text, resp.url)
+        
+        if playlist is None:
+            resultado['razon'] = 'Respuesta no es un playlist'
+            return resultado
+        
+        if playlist.es_master:
+            resultado['ok'] = bool(playlist.variantes)
+            resultado['razon'] = f"Master con {len(playlist.variantes)} variantes"
+            return resultado
+        
+        if playlist.finalizado:
+            resultado['razon'] = 'Playlist finalizado (ENDLIST)'
+            return resultado
+        
+        if seguidor is not None:
+            seguidor.registrar(playlist)
+        
+        resultado['secuencia'] = playlist.ultima_secuencia
+        
+        if secuencia_anterior is not None and resultado['secuencia'] is not None \
+                and resultado['secuencia'] <= secuencia_anterior:
+            resultado['razon'] = f"Sin segmentos nuevos (#{resultado['secuencia']})"
+            return resultado
+        
+        resultado['ok'] = True
+        resultado['razon'] = f"OK (#{resultado['secuencia']})"
+        return resultado
+        
+    except Exception as e:
+        resultado['razon'] = f"Error: {str(e)[:60]}"
+        return resultado
+
 # ============ MONITOR DE STREAM ============
 
 class StreamHealthMonitor:
@@ -8,10 +8,10 @@ Garantiza 0% pérdida de contenido mediante:
 """
 
 import time
-import requests
+import motor_auditoria
 from datetime import datetime, timedelta
-from dateutil import parser
-import re
+import hls_parser
+import latencia_borde
 
 # ============ CONSTANTES DE CALIBRACIÓN ============
 DELAY_PROMEDIO_PROMIEDOS = 45  # segundos de delay típico en Promiedos
@@ -32,13 +32,13 @@ class SyncManager:
         self.hora_inicio_real = None
         self.hora_inicio_grabacion = None
         
-    def calcular_delay_total(self):
+    def calcular_delay_total(self, streams=None):
         """
         Calcula el delay total desde hora programada hasta que empezamos a grabar
         
         Componentes:
         1. Delay de Promiedos (consultar API)
-        2. Delay del stream (extraer de playlist)
+        2. Delay del stream (borde vivo medido en streams auditados, o promedio)
         3. Tiempo de escaneo de fuentes
         4. Tiempo de inicio de ffmpeg
         """
@@ -56,19 +56,22 @@ class SyncManager:
         except:
             delay_components['promiedos'] = DELAY_PROMEDIO_PROMIEDOS
             
-        # 2. Delay del stream (se medirá cuando tengamos el stream)
-        # Por ahora usar promedio
-        delay_components['stream'] = DELAY_PROMEDIO_STREAM
+        # 2. Delay del stream: el mayor delay medido entre los streams candidatos
+        medidos = [
+            s.latencia.delay_medido for s in (streams or [])
+            if getattr(s, 'latencia', None) is not None and s.latencia.delay_medido is not None
+        ]
+        delay_components['stream'] = max(medidos) if medidos else DELAY_PROMEDIO_STREAM
         
         self.delay_total_calculado = sum(delay_components.values())
         
         print(f"\n📊 ANÁLISIS DE DELAYS:")
         print(f"   Promiedos: {delay_components['promiedos']}s")
-        print(f"   Stream HLS: {delay_components['stream']}s")
+        print(f"   Stream HLS: {delay_components['stream']:.0f}s ({'medido' if medidos else 'promedio'})")
         print(f"   Escaneo: {delay_components['escaneo']}s")
         print(f"   Inicio FFmpeg: {delay_components['ffmpeg']}s")
         print(f"   Buffer seguridad: {delay_components['buffer']}s")
-        print(f"   ⏱️  DELAY TOTAL: {self.delay_total_calculado}s ({self.delay_total_calculado/60:.1f}min)")
+        print(f"   ⏱️  DELAY TOTAL: {self.delay_total_calculado:.0f}s ({self.delay_total_calculado/60:.1f}min)")
         
         return delay_components
         
@@ -108,14 +111,14 @@ class SyncManager:
             
         return DELAY_PROMEDIO_PROMIEDOS
         
-    def calcular_hora_inicio_optima(self):
+    def calcular_hora_inicio_optima(self, streams=None):
         """
         Calcula a qué hora debemos iniciar la grabación para capturar el kickoff
         
         Fórmula:
         hora_inicio = hora_programada - delay_total - margen_extra
         """
-        delays = self.calcular_delay_total()
+        delays = self.calcular_delay_total(streams)
         
         # Calcular hora de inicio con todos los delays
         self.hora_inicio_grabacion = self.hora_programada - timedelta(
@@ -140,23 +143,29 @@ class SyncManager:
                 'Referer': stream_candidato.referer,
             }
             
-            resp = requests.get(stream_candidato.url, headers=headers, timeout=10)
+            session = motor_auditoria.obtener_motor().session
+            resp = session.get(stream_candidato.url, headers=headers, timeout=10)
             
             if resp.status_code != 200:
                 return False, "No se pudo verificar"
                 
-            m3u8_txt = resp.text
-            
-            # Extraer timestamp del stream
-            match = re.search(r'#EXT-X-PROGRAM-DATE-TIME:(.*)', m3u8_txt)
-            if not match:
+            playlist = hls_parser.parsear_playlist(resp.text, resp.url)
+            if playlist is None:
                 return True, "Sin timestamp (asumiendo OK)"
-                
-            stream_time = parser.parse(match.group(1).strip())
             
-            # Calcular si el stream está "vivo" o retrasado
-            ahora = datetime.now(stream_time.tzinfo)
-            delay_stream = (ahora - stream_time).total_seconds()
+            # Master: verificar sobre la primera variante
+            if playlist.es_master and playlist.variantes:
+                resp = session.get(playlist.variantes[0].url, headers=headers, timeout=10)
+                playlist = hls_parser.parsear_playlist(resp.text, resp.url)
+                if playlist is None or playlist.es_master:
+                    return True, "Sin timestamp (asumiendo OK)"
+            
+            # Delay respecto del borde vivo (sumado a las muestras previas del stream)
+            seguidor = getattr(stream_candidato, 'latencia', None) or latencia_borde.SeguidorLatencia()
+            seguidor.registrar(playlist)
+            delay_stream = seguidor.delay_medido
+            if delay_stream is None:
+                return True, "Sin timestamp (asumiendo OK)"
             
             # Si el stream tiene menos de 2 minutos de delay, capturará el inicio
             if delay_stream < 120:
@@ -310,6 +319,7 @@ class StreamMonitor:
 def crear_plan_grabacion(url_promiedos, hora_programada, nombre_partido):
     """
     Crea un plan de grabación completo con todas las sincronizaciones
+    (se planifica antes de escanear: el delay del stream es el promedio)
     """
     sync = SyncManager(url_promiedos, hora_programada)
     
@@ -433,6 +433,239 @@ def test_overlapping():
         print(f"   ❌ Error: {e}")
         return False
 
+# ============ TEST 8: NOMBRES DE EQUIPOS (offline) ============
+def test_nombres_equipos():
+    """Emparejamiento de partidos de Promiedos contra la agenda"""
+    print("\n8️⃣  TEST: Nombres de equipos")
+    
+    try:
+        import nombres_equipos
+        
+        casos = [
+            # (Promiedos, agenda, ¿mismo partido?)
+            (["Barracas", "Boca Juniors"], ["Barracas Central", "Boca Juniors"], True),
+            (["Godoy Cruz", "River Plate"], ["Godoy Cruz Antonio Tomba", "River Plate"], True),
+            (["Independiente", "Lanús"], ["Independiente Rivadavia", "Lanus"], True),
+            (["PSG", "Metz"], ["Metz", "Paris Saint-Germain"], True),
+            (["Estudiantes LP", "Racing"], ["Racing Club", "Estudiantes (LP)"], True),
+            # Nombre corto sin el rival: no alcanza
+            (["Barracas", "Boca Juniors"], ["Barracas Central", "Talleres"], False),
+            (["Real Madrid", "Barcelona"], ["Atlético Madrid", "Barcelona"], False),
+            (["Inter Milan", "Juventus"], ["AC Milan", "Juventus"], False),
+        ]
+        
+        for promiedos, agenda, esperado in casos:
+            puntaje = nombres_equipos.similitud_partido(promiedos, agenda)
+            if (puntaje > 0) != esperado:
+                print(f"   ❌ {promiedos} vs {agenda}: {puntaje:.3f} (esperado {'match' if esperado else 'sin match'})")
+                return False
+        print(f"   ✅ {len(casos)} emparejamientos correctos")
+        
+        # Un código de 3 letras compartido no se aprende como alias
+        nombres_equipos.registrar_alias_de_equipos([{'name': 'Rosario Central', 'shortName': 'Central', 'nameCode': 'CEN'}])
+        nombres_equipos.registrar_alias_de_equipos([{'name': 'Central Córdoba', 'shortName': 'Central', 'nameCode': 'CEN'}])
+        if nombres_equipos.nombre_canonico('CEN') != 'cen' or nombres_equipos.nombre_canonico('Central') != 'central':
+            print("   ❌ Alias ambiguo aprendido")
+            return False
+        print("   ✅ Alias ambiguos descartados")
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
+        return False
+
+# ============ TEST 9: PARSER HLS (offline) ============
+def test_hls_parser():
+    """Parseo de playlists media: PDT, BYTERANGE y DRM"""
+    print("\n9️⃣  TEST: Parser HLS")
+
+    try:
+        import hls_parser
+
+        texto = "\n".join([
+            "#EXTM3U",
+            "#EXT-X-TARGETDURATION:6",
+            "#EXT-X-MEDIA-SEQUENCE:100",
+            "#EXT-X-PROGRAM-DATE-TIME:2025-01-01T20:00:00.000Z",
+            "#EXTINF:6.0,",
+            "seg100.ts",
+            "#EXTINF:6.0,",
+            "seg101.ts",
+            "#EXT-X-DISCONTINUITY",
+            "#EXTINF:4.0,",
+            "ad0.ts",
+            "#EXT-X-DISCONTINUITY",
+            "#EXT-X-PROGRAM-DATE-TIME:2025-01-01T20:01:00.000Z",
+            "#EXTINF:6.0,",
+            "seg102.ts",
+            "#EXTINF:6.0,",
+            "seg103.ts",
+        ])
+        playlist = hls_parser.parsear_playlist(texto, "https://cdn.ejemplo.com/live/index.m3u8")
+        segmentos = playlist.segmentos
+
+        if [s.secuencia for s in segmentos] != [100, 101, 102, 103, 104]:
+            print(f"   ❌ Secuencias incorrectas: {[s.secuencia for s in segmentos]}")
+            return False
+        if segmentos[0].url != "https://cdn.ejemplo.com/live/seg100.ts":
+            print(f"   ❌ URL relativa mal resuelta: {segmentos[0].url}")
+            return False
+
+        # El PDT sigue al segmento anterior, pero no cruza una discontinuidad
+        if segmentos[1].pdt != segmentos[0].fin:
+            print(f"   ❌ PDT no heredado: {segmentos[1].pdt}")
+            return False
+        if not segmentos[2].discontinuidad or segmentos[2].pdt is not None:
+            print(f"   ❌ PDT heredado a través de DISCONTINUITY: {segmentos[2].pdt}")
+            return False
+        if segmentos[3].pdt.minute != 1 or segmentos[4].pdt != segmentos[3].fin:
+            print(f"   ❌ PDT tras la discontinuidad incorrecto: {segmentos[3].pdt}, {segmentos[4].pdt}")
+            return False
+        print("   ✅ PDT heredado y cortado en DISCONTINUITY")
+
+        # BYTERANGE sin @offset: continúa donde terminó el rango anterior del mismo recurso
+        texto = "\n".join([
+            "#EXTM3U",
+            "#EXT-X-TARGETDURATION:4",
+            "#EXTINF:4.0,",
+            "#EXT-X-BYTERANGE:1000@0",
+            "video.mp4",
+            "#EXTINF:4.0,",
+            "#EXT-X-BYTERANGE:1500",
+            "video.mp4",
+            "#EXTINF:4.0,",
+            "#EXT-X-BYTERANGE:800",
+            "video.mp4",
+        ])
+        rangos = [s.byterange for s in hls_parser.parsear_playlist(texto, "https://cdn.ejemplo.com/vod/").segmentos]
+        if rangos != [(1000, 0), (1500, 1000), (800, 2500)]:
+            print(f"   ❌ Offsets implícitos incorrectos: {rangos}")
+            return False
+        print("   ✅ Offsets implícitos de BYTERANGE")
+
+        # DRM: SAMPLE-AES / Widevine sí, AES-128 común no
+        base = "#EXTM3U\n#EXT-X-TARGETDURATION:6\n{}\n#EXTINF:6.0,\nseg.ts"
+        casos = [
+            ('#EXT-X-KEY:METHOD=AES-128,URI="key.bin"', False),
+            ('#EXT-X-KEY:METHOD=SAMPLE-AES,URI="skd://clave"', True),
+            ('#EXT-X-KEY:METHOD=SAMPLE-AES-CTR,URI="data:text/plain;base64,AAAA",'
+             'KEYFORMAT="urn:uuid:edef8ba9-79d6-4ace-a3c8-27dcd51d21ed"', True),
+            ('#EXT-X-KEY:METHOD=NONE', False),
+        ]
+        for linea_clave, esperado in casos:
+            playlist = hls_parser.parsear_playlist(base.format(linea_clave), "https://cdn.ejemplo.com/")
+            if playlist.tiene_drm != esperado:
+                print(f"   ❌ DRM mal detectado en {linea_clave[:40]}: {playlist.tiene_drm}")
+                return False
+        print(f"   ✅ {len(casos)} claves clasificadas (DRM / AES-128)")
+        return True
+
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
+        return False
+
+# ============ TEST 10: PAYLOADS VC (offline) ============
+def test_payloads_vc():
+    """Decodificación de transmision?vc=...&o=N sin navegador"""
+    print("\n🔟 TEST: Payloads vc de AngulismoTV")
+    
+    try:
+        import angulismo_scraper
+        from config_tv import GRILLA_CANALES
+        
+        total = 0
+        for canal, fuentes in GRILLA_CANALES.items():
+            for nombre, url in fuentes:
+                payload, indice = angulismo_scraper.decodificar_url_transmision(url)
+                if payload is None or not 0 <= indice < len(payload.opciones):
+                    print(f"   ❌ {nombre}: payload u opción inválidos ({payload}, {indice})")
+                    return False
+                if not payload.opciones[indice].iframe.startswith("http"):
+                    print(f"   ❌ {nombre}: iframe inválido {payload.opciones[indice].iframe}")
+                    return False
+                # La URL de la opción vuelve a decodificar al mismo iframe
+                otra, otro_indice = angulismo_scraper.decodificar_url_transmision(payload.url_opcion(indice))
+                if otro_indice != indice or otra.opciones[indice].iframe != payload.opciones[indice].iframe:
+                    print(f"   ❌ {nombre}: url_opcion no es reversible")
+                    return False
+                total += 1
+        print(f"   ✅ {total} URLs de config_tv decodificadas")
+        
+        # Payloads en latin-1 ('Fútbol') y entidades HTML ('&amp;')
+        nombres = [
+            angulismo_scraper.decodificar_url_transmision(url)[0].nombre
+            for fuentes in GRILLA_CANALES.values() for _, url in fuentes
+        ]
+        if "LaLiga: Atlético Madrid vs Valencia" not in nombres or not any("Brighton & Hove" in n for n in nombres):
+            print(f"   ❌ Nombres mal decodificados: {sorted(set(nombres))}")
+            return False
+        print("   ✅ latin-1 y entidades HTML")
+        
+        # Lo que no es un payload no se inventa
+        for invalida in ("https://angulismotv-dnh.pages.dev/transmision?o=1",
+                         "https://angulismotv-dnh.pages.dev/transmision?vc=no-es-base64&o=0",
+                         "https://streamtpcloud.com/global1.php?stream=espnpremium"):
+            if angulismo_scraper.decodificar_url_transmision(invalida) != (None, None):
+                print(f"   ❌ URL sin payload aceptada: {invalida}")
+                return False
+        print("   ✅ URLs sin payload rechazadas")
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
+        return False
+
+# ============ TEST 11: EXPIRACIÓN DE TOKENS (offline) ============
+def test_expiracion_tokens():
+    """Expiración leída de la URL firmada y deadline de rotación"""
+    print("\n1️⃣1️⃣ TEST: Expiración de tokens")
+    
+    try:
+        import base64
+        import json
+        import expiracion_tokens
+        
+        ahora = 1765600000
+        cuerpo = base64.urlsafe_b64encode(json.dumps({"exp": 1765690000}).encode()).decode().rstrip("=")
+        jwt = f"eyJhbGciOiJIUzI1NiJ9.{cuerpo}.firma"
+        
+        casos = [
+            ("https://cdn.ejemplo.com/live.m3u8?expires=1765675000&sig=abc", 1765675000),
+            ("https://cdn.ejemplo.com/live.m3u8?hdnts=st=1765600000~exp=1765680000~hmac=ff", 1765680000),
+            (f"https://cdn.ejemplo.com/live.m3u8?token={jwt}", 1765690000),
+            # hash-ttl-EXPIRACIÓN-EMISIÓN: el mayor timestamp futuro
+            ("https://51a1.crackstreamslivehd.com/espndeportes/tracks-v1a1/mono.m3u8?ip=181.27.51.162"
+             "&token=fe52e9fc44d4c1b02da588457291229d87ef2fa2-98-1765675000-1765621000", 1765675000),
+            ("https://cdn.ejemplo.com/live.m3u8?token=abc-1765500000", None),   # Ya vencido
+            ("https://cdn.ejemplo.com/live.m3u8?expires=123", None),             # Fuera de rango
+            ("https://cdn.ejemplo.com/live.m3u8", None),
+        ]
+        for url, esperado in casos:
+            obtenido = expiracion_tokens.extraer_expiracion_token(url, ahora=ahora)
+            if obtenido != esperado:
+                print(f"   ❌ {url[-50:]}: {obtenido} (esperado {esperado})")
+                return False
+        print(f"   ✅ {len(casos)} URLs interpretadas")
+        
+        # Deadline: expiración menos el margen, nunca antes de la rotación mínima
+        class Stream:
+            url = casos[0][0]
+        deadline, origen = expiracion_tokens.calcular_deadline_rotacion(Stream, ahora, 3600, ahora=ahora)
+        if origen != "token" or deadline != 1765675000 - expiracion_tokens.MARGEN_ROTACION_TOKEN:
+            print(f"   ❌ Deadline por token incorrecto: {deadline} ({origen})")
+            return False
+        Stream.url = f"https://cdn.ejemplo.com/live.m3u8?expires={ahora + 30}"
+        deadline, origen = expiracion_tokens.calcular_deadline_rotacion(Stream, ahora, 3600, ahora=ahora)
+        if deadline != ahora + expiracion_tokens.ROTACION_MINIMA_SEGUNDOS:
+            print(f"   ❌ Deadline por debajo del mínimo: {deadline - ahora}s")
+            return False
+        print("   ✅ Deadline de rotación con margen y mínimo")
+        return True
+        
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
+        return False
+
 # ============ EJECUTAR TODOS LOS TESTS ============
 def ejecutar_todos_los_tests():
     """Ejecuta todos los tests y muestra resumen"""
@@ -445,6 +678,10 @@ def ejecutar_todos_los_tests():
         ("Grabación Básica", test_grabacion_basica, False),  # Opcional
         ("Overlapping", test_overlapping, False),  # Opcional
         ("Smart Selector", test_smart_selector, False),  # Opcional (lento)
+        ("Nombres de Equipos", test_nombres_equipos, False),  # Offline
+        ("Parser HLS", test_hls_parser, False),  # Offline
+        ("Payloads vc", test_payloads_vc, False),  # Offline
+        ("Expiración de Tokens", test_expiracion_tokens, False),  # Offline
     ]
     
     print("\n🎯 Ejecutando tests esenciales primero...\n")